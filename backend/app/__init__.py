@@ -1,12 +1,134 @@
-from flask import Flask
+"""
+Flask application factory.
+
+create_app() builds the app for both the development server (python app.py) and
+gunicorn (gunicorn -c gunicorn.conf.py wsgi:app). Under gunicorn the master calls
+preload() before forking, so the archive snapshot, passage indexes and meetings are
+built once and shared copy-on-write by every worker; each worker then starts its own
+background threads (snapshot watcher, scheduled refresh) after the fork.
+
+Configuration (environment):
+    CORS_ORIGINS   comma-separated allowed origins, or * (default http://localhost:3000)
+"""
+import os
+
+from flask import Flask, jsonify, send_from_directory, Response
 from flask_cors import CORS
 
-def create_app():
+
+def cors_origins():
+    """Allowed CORS origins from CORS_ORIGINS"""
+    origins = [o.strip() for o in os.getenv('CORS_ORIGINS', 'http://localhost:3000').split(',') if o.strip()]
+    return '*' if origins == ['*'] else origins
+
+
+def create_app(start_background=True):
+    """
+    Build the Flask app with every route under /api.
+
+    Args:
+        start_background: Start the snapshot watcher and scheduled refresh now.
+                          gunicorn passes False and starts them in each worker after the fork.
+    """
+    from app import live, metrics, profiling
+    from chatbot_module import resilient
+    from app.routes import main_bp, chat_bp, get_meetings_store, get_snapshot_holder, get_data_path
+
     app = Flask(__name__)
-    CORS(app)
-    
-    from app.routes import main_bp, chat_bp
-    app.register_blueprint(main_bp)
-    app.register_blueprint(chat_bp)
-    
+    CORS(app, resources={r"/*": {"origins": cors_origins()}})
+
+    # Latency, status and in-flight metrics for every request
+    metrics.init_app(app)
+    # cProfile + span timings for requests that opt in with the admin token (X-Profile: 1 / ?profile=1) or are sampled
+    profiling.init_app(app)
+    # WebSocket for live meeting transcription
+    live.init_app(app)
+    # Backboard call outcomes, retries and circuit breaker transitions
+    if metrics.record_backboard_event not in resilient.LISTENERS:
+        resilient.LISTENERS.append(metrics.record_backboard_event)
+        metrics.REGISTRY.gauge("backboard_circuit_state", breaker=resilient.BREAKER.name,
+                               state=resilient.BREAKER.state).inc()
+
+    # Register blueprints
+    app.register_blueprint(main_bp, url_prefix='/api')
+    app.register_blueprint(chat_bp, url_prefix='/api')
+
+    app.extensions['archive_refresher'] = None
+
+    @app.route('/api/events', methods=['GET'])
+    def get_events():
+        """Return all meetings (transcripts are fetched separately via /api/meetings/<id>/transcript)"""
+        try:
+            events_data = get_meetings_store().load()
+        except Exception as e:
+            print(f"Error loading meetings: {e}")
+            events_data = []
+        return jsonify(events_data)
+
+    @app.route('/api/archive/status', methods=['GET'])
+    def get_archive_status():
+        """Return the serving snapshot version, the state of the scheduled refresh and of the Backboard circuit breaker"""
+        snapshot = get_snapshot_holder().current()
+        refresher = app.extensions['archive_refresher']
+        return jsonify({
+            'snapshot_version': snapshot.version,
+            'snapshot_built_at': snapshot.built_at,
+            'categories': len(snapshot.all_data),
+            'refresh': refresher.status if refresher else None,
+            'backboard': resilient.BREAKER.status,
+            'pid': os.getpid()
+        })
+
+    @app.route('/metrics', methods=['GET'])
+    def get_metrics():
+        """Request metrics of this worker process in the Prometheus text format (series carry a pid label)"""
+        return Response(metrics.REGISTRY.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/api/recordings/<filename>', methods=['GET'])
+    def get_recording(filename):
+        """Serve audio recording files"""
+        from werkzeug.utils import secure_filename
+        # Secure the filename to prevent directory traversal
+        safe_filename = secure_filename(filename)
+        recordings_dir = get_data_path() / "recordings"
+        return send_from_directory(str(recordings_dir), safe_filename)
+
+    if start_background:
+        start_background_tasks(app)
     return app
+
+
+def start_background_tasks(app):
+    """
+    Hot-swap archive snapshots when the data folder changes (and refresh it on a schedule if configured),
+    and save live sessions left unfinished by a worker that was recycled or killed
+    """
+    from app.live import recover_orphans
+    from app.refresh import start_refresher_from_env
+    from app.routes import get_meetings_store, get_snapshot_holder, get_data_path
+
+    if app.extensions.get('archive_refresher') is None:
+        app.extensions['archive_refresher'] = start_refresher_from_env(
+            get_data_path(), get_snapshot_holder(), get_meetings_store())
+    try:
+        recover_orphans(get_data_path() / "recordings", get_meetings_store())
+    except Exception as e:
+        print(f"Error recovering live sessions: {e}", flush=True)
+
+
+def preload():
+    """
+    Build everything the first requests would otherwise build: the archive snapshot with
+    its passages and indexes, the meetings, indexes of the
+    live categories, the dashboard aggregates and the transcript index.
+    """
+    from chatbot_module.analyzer import index_for
+    from chatbot_module.chunking import passages_for
+    from app.routes import get_aggregates, get_snapshot_holder, get_transcript_index, load_live_data
+
+    get_snapshot_holder().current()
+    for name, items in load_live_data().items():
+        if isinstance(items, list):
+            index_for(name, passages_for(name, items))
+    get_aggregates().compute()
+    get_transcript_index().refresh()
@@ -0,0 +1,230 @@
+"""
+Precomputed aggregates for the dashboard and timeline (/api/stats).
+
+The timeline used to download /api/data, /api/pending-requests and /api/events in
+full just to count things client-side. AggregatesService keeps the counts here
+instead. Each part (archive categories, meetings, pending requests, chat usage)
+remembers the version of the data it was computed from and is only recomputed
+when that source changes: the snapshot version for the archive, the journal/file
+fingerprint for meetings, and the mtime-cached object for the live JSON files.
+"""
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from app.storage import load_json_cached
+from chatbot_module.snapshot import LIVE_CATEGORIES
+
+_MONTHS = {name: i for i, name in enumerate(
+    ["january", "february", "march", "april", "may", "june", "july",
+     "august", "september", "october", "november", "december"], 1)}
+_DATE_RE = re.compile(r"([A-Za-z]+)\.?\s+(\d{1,2}),\s*(\d{4})")
+_RECORDED_RE = re.compile(r"^Meeting - \d")
+_NUMERIC_DATE_RE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+_ISO_DATE_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+
+CHAT_DAYS = 30
+
+
+def meeting_month(date_text):
+    """'November 4, 2024 6:00 pm - 8:00 pm' -> '2024-11', or None if the date cannot be read."""
+    match = _DATE_RE.search(date_text or "")
+    if not match:
+        return None
+    month = _MONTHS.get(match.group(1).lower())
+    if month is None:
+        return None
+    return f"{match.group(3)}-{month:02d}"
+
+
+def parse_date(value):
+    """datetime from 'November 4, 2024 6:00 pm', '2/7/2026', '2026-02-07...' or an epoch timestamp; None if unreadable."""
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.replace('.', '', 1).isdigit()):
+        ts = parse_timestamp(value)
+        return datetime.fromtimestamp(ts) if ts is not None else None
+    if not isinstance(value, str):
+        return None
+    try:
+        match = _DATE_RE.search(value)
+        if match and match.group(1).lower() in _MONTHS:
+            return datetime(int(match.group(3)), _MONTHS[match.group(1).lower()], int(match.group(2)))
+        match = _NUMERIC_DATE_RE.search(value)
+        if match:
+            return datetime(int(match.group(3)), int(match.group(1)), int(match.group(2)))
+        match = _ISO_DATE_RE.search(value)
+        if match:
+            return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    except ValueError:
+        pass
+    return None
+
+
+def committee_name(meeting_title):
+    """Committee a meeting belongs to (drops ' - Cancelled'; recordings without a name are grouped)."""
+    title = (meeting_title or "").strip()
+    if not title or _RECORDED_RE.match(title):
+        return "Recorded meetings"
+    if title.endswith(" - Cancelled"):
+        title = title[: -len(" - Cancelled")]
+    return title
+
+
+def parse_timestamp(value):
+    """Epoch seconds from a stored timestamp (seconds or milliseconds), or None if it is not wall-clock time."""
+    try:
+        ts = float(value)
+    except (TypeError, ValueError):
+        return None
+    if ts > 1e12:
+        ts /= 1000.0
+    # Older responses were stamped with the event loop clock, which is not a date
+    return ts if ts > 1e9 else None
+
+
+def meeting_aggregates(meetings):
+    per_month = Counter()
+    committees = Counter()
+    with_transcript = 0
+    for meeting in meetings:
+        if not isinstance(meeting, dict):
+            continue
+        month = meeting_month(meeting.get('date'))
+        if month:
+            per_month[month] += 1
+        committees[committee_name(meeting.get('meeting'))] += 1
+        if meeting.get('transcript_file') or meeting.get('transcript'):
+            with_transcript += 1
+    return {
+        'total': len(meetings),
+        'withTranscript': with_transcript,
+        'perMonth': dict(sorted(per_month.items())),
+        'committees': dict(committees.most_common()),
+    }
+
+
+def pending_aggregates(requests):
+    by_status = Counter(r.get('status') or 'pending' for r in requests if isinstance(r, dict))
+    by_type = Counter(r.get('type') or 'other' for r in requests if isinstance(r, dict))
+    return {
+        'total': sum(by_status.values()),
+        'byStatus': dict(by_status),
+        'byType': dict(by_type.most_common()),
+    }
+
+
+def chat_aggregates(responses, now=None):
+    now = now or time.time()
+    per_day = Counter()
+    last = None
+    for response in responses:
+        if not isinstance(response, dict):
+            continue
+        ts = parse_timestamp(response.get('timestamp'))
+        if ts is None:
+            continue
+        last = ts if last is None else max(last, ts)
+        if now - ts <= CHAT_DAYS * 86400:
+            per_day[datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d')] += 1
+    return {
+        'totalMessages': len(responses),
+        'lastMessageAt': last,
+        'perDay': dict(sorted(per_day.items())),
+    }
+
+
+def timeline_counts(archive, meetings, pending):
+    """Timeline events per status (the rules of app.timeline), from the other aggregates."""
+    passed, failed = pending['byStatus'].get('passed', 0), pending['byStatus'].get('failed', 0)
+    return {
+        'inProgress': pending['total'] - passed - failed,
+        'completed': sum(archive.values()) + meetings['total'] + passed,
+        'failed': failed,
+    }
+
+
+def _same_version(a, b):
+    # Live JSON lists are versioned by identity (load_json_cached returns the same object while unchanged)
+    if isinstance(b, tuple):
+        return isinstance(a, tuple) and len(a) == len(b) and all(map(_same_version, a, b))
+    return a is b if isinstance(b, list) else a == b
+
+
+class AggregatesService:
+    """Dashboard aggregates, recomputed per source only when that source changes."""
+
+    def __init__(self, data_dir, holder, meetings_store):
+        """
+        Args:
+            data_dir: backend/data
+            holder: SnapshotHolder serving the archive
+            meetings_store: MeetingsStore
+        """
+        self.data_dir = data_dir
+        self.holder = holder
+        self.meetings_store = meetings_store
+        self._parts = {}
+        self._lock = threading.Lock()
+
+    def _part(self, name, version, compute):
+        """Cached value of a part, recomputed when version is no longer the one it was computed from."""
+        with self._lock:
+            cached = self._parts.get(name)
+            if cached is not None and _same_version(cached[0], version):
+                return cached[1]
+        value = compute()
+        with self._lock:
+            self._parts[name] = (version, value)
+        return value
+
+    def _live(self, name):
+        try:
+            data = load_json_cached(self.data_dir / f"{name}.json", default=[])
+        except Exception as e:
+            print(f"Error loading {name}: {e}")
+            data = []
+        return data if isinstance(data, list) else []
+
+    def compute(self):
+        """The /api/stats payload."""
+        snapshot = self.holder.current()
+        archive = self._part('archive', snapshot.version, lambda: {
+            name: len(items) for name, items in snapshot.all_data.items()
+            if isinstance(items, list) and name not in LIVE_CATEGORIES
+        })
+
+        # meetings_store.version changes whenever the file or the journal does
+        meetings = self._part('meetings', self.meetings_store.version(),
+                              lambda: meeting_aggregates(self.meetings_store.load()))
+
+        pending_list = self._live('pending_requests')
+        pending = self._part('pending', pending_list, lambda: pending_aggregates(pending_list))
+
+        responses = self._live('ai_responses')
+        chat = self._part('chat', responses, lambda: chat_aggregates(responses))
+
+        categories = dict(archive)
+        categories['meeting_data'] = meetings['total']
+        categories['pending_requests'] = pending['total']
+        categories['ai_responses'] = chat['totalMessages']
+        return {
+            'archiveVersion': snapshot.version,
+            'categories': categories,
+            'totalRecords': sum(archive.values()) + meetings['total'],
+            'meetings': meetings,
+            'pendingRequests': pending,
+            'chat': chat,
+            'timeline': timeline_counts(archive, meetings, pending),
+            'generatedAt': time.time(),
+        }
+
+    def timeline(self):
+        """All timeline events (app.timeline), rebuilt when the archive, the meetings or the pending requests change."""
+        from app.timeline import timeline_items  # app.timeline uses this module's date parsing
+
+        snapshot = self.holder.current()
+        pending = self._live('pending_requests')
+        version = (snapshot.version, self.meetings_store.version(), pending)
+        return self._part('timeline', version,
+                          lambda: timeline_items(snapshot.all_data, self.meetings_store.load(), pending))
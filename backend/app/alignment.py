@@ -0,0 +1,60 @@
+"""
+Speaker alignment for recorded meetings: each Whisper segment is labelled with the
+pyannote speaker whose turn overlaps it most.
+"""
+
+
+def align_segments(whisper_segments, diarization_segments):
+    """
+    Label transcription segments with speakers.
+
+    Args:
+        whisper_segments: [{'start', 'end', 'text'}] from Whisper
+        diarization_segments: [{'start', 'end', 'speaker'}] from pyannote, sorted by start
+
+    Returns:
+        [{'speaker', 'start', 'end', 'text'}] sorted by start; segments without text are dropped,
+        segments that overlap no turn get the first speaker (or SPEAKER_00)
+    """
+    transcript_segments = []
+    for whisper_seg in whisper_segments:
+        seg_start = whisper_seg['start']
+        seg_end = whisper_seg['end']
+        seg_text = whisper_seg['text'].strip()
+
+        if not seg_text:
+            continue
+
+        # Find the diarization segment that best matches this transcription segment
+        best_match = None
+        best_overlap = 0
+
+        for diar_seg in diarization_segments:
+            # Calculate overlap
+            overlap_start = max(seg_start, diar_seg['start'])
+            overlap_end = min(seg_end, diar_seg['end'])
+            overlap = max(0, overlap_end - overlap_start)
+
+            if overlap > best_overlap:
+                best_overlap = overlap
+                best_match = diar_seg
+
+        # If we found a match, add it to transcript
+        if best_match and best_overlap > 0:
+            transcript_segments.append({
+                'speaker': best_match['speaker'],
+                'start': seg_start,
+                'end': seg_end,
+                'text': seg_text
+            })
+        else:  # Fallback: use first speaker if no match
+            transcript_segments.append({
+                'speaker': diarization_segments[0]['speaker'] if diarization_segments else 'SPEAKER_00',
+                'start': seg_start,
+                'end': seg_end,
+                'text': seg_text
+            })
+
+    # Sort transcript segments by start time
+    transcript_segments.sort(key=lambda x: x['start'])
+    return transcript_segments
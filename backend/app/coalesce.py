@@ -0,0 +1,79 @@
+"""
+Single-flight request coalescing.
+
+When the same question is asked by many people at once, only the first request
+(the leader) runs the search, the context and the LLM call; identical requests that
+arrive while it is running wait for it and return its result. Nothing is kept once
+the leader finishes, so a later request always computes a fresh answer.
+
+Flask serves each request on its own thread with its own event loop, so callers
+wait on a threading.Event rather than an asyncio future.
+
+Coalescing is per worker process: under gunicorn with several workers, the same
+question arriving at two workers is answered (and saved) once by each.
+"""
+import re
+import threading
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query):
+    """Case, surrounding whitespace and punctuation, and runs of spaces do not change the answer."""
+    return _SPACE_RE.sub(" ", query.casefold()).strip(" ?!.,;:")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs fn once per key among concurrent callers."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """
+        Run fn() unless a call with the same key is in flight, in which case wait for it.
+
+        Returns:
+            (result, shared): shared is True if the result came from another caller's call.
+            If that call raised, the same exception is raised here.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        """{key: waiting followers} of the calls running now."""
+        with self._lock:
+            return {key: call.waiters for key, call in self._calls.items()}
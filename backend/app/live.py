@@ -0,0 +1,525 @@
+"""
+Live meeting transcription over a WebSocket (/api/live-transcription).
+
+The browser streams the meeting's audio while it is recorded; the server cuts it into
+utterances at pauses, transcribes each one with the resident transcription engine
+(app/transcription.py), labels it with a speaker by online clustering of voice
+embeddings, and sends the finished segments back straight away. When the stream ends
+the recording and its transcript are saved as a meeting, so the minutes are ready
+when the meeting is.
+
+Protocol:
+    client -> server  text   {"type": "start", "meeting_name": "...", "sample_rate": 16000}  (optional, first)
+                      binary 16-bit little-endian mono PCM at sample_rate (default 16000)
+                      text   {"type": "stop"}  (or just close the socket)
+    server -> client  {"type": "ready", "session": id, "sampleRate": 16000}
+                      {"type": "segment", "index": n, "segment": {"speaker", "start", "end", "text"}}
+                      {"type": "saved", "meeting": {...}}   after stop
+                      {"type": "error", "error": "..."}
+
+While a session runs, its audio goes to recordings/.live-<session>.wav and its
+segments to .live-<session>.jsonl, under a lock held by the worker serving it. A
+worker recycled by gunicorn (max_requests) or killed after graceful_timeout leaves
+these behind; recover_orphans(), run when a worker starts, saves them as the meeting
+the session would have saved (the lock tells an orphan from a session still
+streaming in another worker).
+
+Speaker embeddings come from pyannote's embedding model when HF_TOKEN is set and
+pyannote.audio is installed, and otherwise from the utterance's MFCCs and pitch
+(cruder, but enough to tell apart clearly different voices).
+
+Configuration (environment):
+    LIVE_MIN_SILENCE        pause (seconds) that ends an utterance (default 0.8)
+    LIVE_MAX_UTTERANCE      longest utterance before it is cut anyway (default 20)
+    LIVE_SPEAKER_THRESHOLD  cosine similarity to join an existing speaker
+                            (default 0.5 with pyannote embeddings, 0.8 without)
+    LIVE_MAX_SPEAKERS       most speakers per meeting (default 10)
+"""
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+import wave
+from collections import deque
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from app.storage import append_jsonl, file_lock, read_jsonl
+
+RATE = 16000
+FRAME = 480  # 30 ms at 16 kHz
+# Shorter utterances are given the closest existing speaker rather than a new one
+MIN_NEW_SPEAKER = 2.0
+
+
+def to_float(pcm, rate=RATE):
+    """16-bit PCM bytes at rate -> float32 samples at 16 kHz."""
+    samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768
+    if rate != RATE and len(samples):
+        positions = np.arange(0, len(samples), rate / RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    return samples
+
+
+class OnlineSegmenter:
+    """
+    Cuts a stream of samples into utterances at pauses, with an energy VAD whose noise
+    floor is learned from the last minute of audio; silence between utterances is dropped.
+    """
+
+    def __init__(self, min_silence=0.8, max_utterance=20.0, pad=0.2):
+        self.min_silence_frames = int(min_silence * RATE / FRAME)
+        self.max_frames = int(max_utterance * RATE / FRAME)
+        self.pad_frames = int(pad * RATE / FRAME)
+        self.history = deque(maxlen=2000)  # dB of the last minute of frames
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.speech = []  # per pending frame: speech or not
+        self.offset = 0.0  # stream time of pending[0], in seconds
+
+    def _threshold(self):
+        db = np.fromiter(self.history, dtype=np.float32)
+        return max(np.percentile(db, 10) + 12, np.percentile(db, 99) - 40)
+
+    def push(self, samples):
+        """Add samples; returns [(start seconds, utterance samples)] completed by them."""
+        done_frames = len(self.speech) * FRAME
+        self.pending = np.concatenate([self.pending, samples])
+        new = self.pending[done_frames:]
+        frames = new[:len(new) // FRAME * FRAME].reshape(-1, FRAME)
+        if not len(frames):
+            return []
+        db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        self.history.extend(db.tolist())
+        threshold = self._threshold()
+        self.speech.extend((db > threshold).tolist())
+        return self._cut()
+
+    def _cut(self):
+        utterances = []
+        while True:
+            voiced = [i for i, s in enumerate(self.speech) if s]
+            if not voiced:
+                # Only silence so far: drop all but the padding that may lead into speech
+                self._drop(max(0, len(self.speech) - self.pad_frames))
+                return utterances
+            first, last = voiced[0], voiced[-1]
+            trailing = len(self.speech) - 1 - last
+            if trailing >= self.min_silence_frames:
+                end = last + 1 + self.pad_frames
+            elif len(self.speech) - first >= self.max_frames:
+                end = first + self.max_frames
+            else:
+                return utterances
+            start = max(0, first - self.pad_frames)
+            utterances.append((self.offset + start * FRAME / RATE, self.pending[start * FRAME:end * FRAME]))
+            self._drop(end)
+
+    def _drop(self, frames):
+        self.pending = self.pending[frames * FRAME:]
+        self.speech = self.speech[frames:]
+        self.offset += frames * FRAME / RATE
+
+    def flush(self):
+        """The utterance still buffered at the end of the stream, if it has speech."""
+        utterances = []
+        if any(self.speech):
+            first = max(0, self.speech.index(True) - self.pad_frames)
+            utterances.append((self.offset + first * FRAME / RATE, self.pending[first * FRAME:]))
+        self._drop(len(self.speech))
+        return utterances
+
+
+def _mel_filterbank(n_fft=512, n_mels=40, low=60, high=7600):
+    mel = np.linspace(2595 * np.log10(1 + low / 700), 2595 * np.log10(1 + high / 700), n_mels + 2)
+    bins = np.floor((n_fft + 1) * 700 * (10 ** (mel / 2595) - 1) / RATE).astype(int)
+    bank = np.zeros((n_mels, n_fft // 2 + 1))
+    for m in range(1, n_mels + 1):
+        left, centre, right = bins[m - 1], bins[m], bins[m + 1]
+        bank[m - 1, left:centre] = (np.arange(left, centre) - left) / max(centre - left, 1)
+        bank[m - 1, centre:right] = (right - np.arange(centre, right)) / max(right - centre, 1)
+    return bank
+
+
+_MEL_BANK = _mel_filterbank()
+_DCT = np.cos(np.pi / 40 * (np.arange(40)[None, :] + 0.5) * np.arange(1, 13)[:, None])
+
+
+def spectral_embedding(samples, pitch_weight=2.0):
+    """
+    Voice of an utterance without a trained model: mean MFCCs 1-12 of its louder frames
+    (vocal tract), plus its median pitch (log F0 by autocorrelation), unit length.
+    """
+    n_fft, hop = 512, 160
+    if len(samples) < n_fft * 4:
+        return None
+    frames = np.lib.stride_tricks.sliding_window_view(samples, n_fft)[::hop]
+    energy = frames.std(axis=1)
+    frames = frames[energy > np.percentile(energy, 50)]
+    power = np.abs(np.fft.rfft(frames * np.hanning(n_fft), axis=1)) ** 2
+    ceps = np.log(power @ _MEL_BANK.T + 1e-8) @ _DCT.T
+    mfcc = ceps.mean(axis=0)
+    mfcc /= np.linalg.norm(mfcc) + 1e-8
+    # Pitch between 70 and 400 Hz from the autocorrelation of the voiced frames
+    ac = np.fft.irfft(np.abs(np.fft.rfft(frames, n=2 * n_fft, axis=1)) ** 2, axis=1)[:, :n_fft]
+    lo, hi = RATE // 400, RATE // 70
+    lag = lo + np.argmax(ac[:, lo:hi], axis=1)
+    voiced = ac[np.arange(len(ac)), lag] > 0.5 * ac[:, 0]
+    pitch = np.log(RATE / np.median(lag[voiced]) / 150) if voiced.any() else 0.0
+    # Trust the pitch less when few frames are clearly voiced
+    confidence = min(1.0, voiced.mean() / 0.3)
+    vector = np.append(mfcc, pitch_weight * confidence * pitch)
+    return vector / np.linalg.norm(vector)
+
+
+# Cosine similarity above which two utterances are taken to be the same speaker
+spectral_embedding.threshold = 0.8
+
+
+class PyannoteEmbedder:
+    """Speaker embeddings from pyannote's embedding model (needs HF_TOKEN)."""
+
+    threshold = 0.5
+
+    def __init__(self, token):
+        from pyannote.audio import Inference, Model
+        import torch
+
+        self.torch = torch
+        model = Model.from_pretrained("pyannote/embedding", use_auth_token=token)
+        self.inference = Inference(model, window="whole")
+
+    def __call__(self, samples):
+        vector = np.asarray(self.inference({"waveform": self.torch.from_numpy(samples[None, :]), "sample_rate": RATE}))
+        return vector.ravel() / (np.linalg.norm(vector) + 1e-8)
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    """The process-wide speaker embedder (pyannote if available, else spectral_embedding)."""
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            token = os.getenv("HF_TOKEN")
+            try:
+                _embedder = PyannoteEmbedder(token) if token else spectral_embedding
+            except Exception as e:
+                print(f"[live] pyannote embedding model unavailable ({e}); using spectral embeddings", flush=True)
+                _embedder = spectral_embedding
+        return _embedder
+
+
+class SpeakerClusterer:
+    """
+    Online clustering: an utterance joins the most similar speaker (cosine similarity of
+    its embedding to the speaker's running mean) if it is similar enough, otherwise it
+    starts a new speaker, up to max_speakers.
+    """
+
+    def __init__(self, threshold=0.8, max_speakers=10):
+        self.threshold = threshold
+        self.max_speakers = max_speakers
+        self.centroids = []
+        self.counts = []
+        self.last = "SPEAKER_00"
+
+    def assign(self, embedding, may_add=True):
+        """Speaker label for an utterance; may_add=False joins the closest speaker (for utterances too short to trust)."""
+        if embedding is None:
+            # Too short to embed: most likely whoever spoke last
+            return self.last
+        best, similarity = None, -1.0
+        for i, centroid in enumerate(self.centroids):
+            s = float(np.dot(centroid, embedding) / (np.linalg.norm(centroid) + 1e-8))
+            if s > similarity:
+                best, similarity = i, s
+        if best is None or (may_add and similarity < self.threshold and len(self.centroids) < self.max_speakers):
+            self.centroids.append(embedding.copy())
+            self.counts.append(1)
+            best = len(self.centroids) - 1
+        else:
+            self.counts[best] += 1
+            self.centroids[best] += (embedding - self.centroids[best]) / self.counts[best]
+        self.last = f"SPEAKER_{best:02d}"
+        return self.last
+
+
+def _partial_files(recordings_dir, session_id):
+    """(audio, segment journal, lock) of a session that has not finished yet."""
+    base = Path(recordings_dir) / f".live-{session_id}"
+    return Path(f"{base}.wav"), Path(f"{base}.jsonl"), Path(f"{base}.lock")
+
+
+def _meeting_record(meeting_id, meeting_name, started, audio_filename, segments):
+    return {
+        'id': meeting_id,
+        'date': started.strftime('%B %d, %Y %I:%M %p'),
+        'meeting': meeting_name,
+        'meeting_url': '',
+        'documents': {},
+        'transcript': sorted(segments, key=lambda s: s['start']),
+        'audio_file': f'/api/recordings/{audio_filename}' if audio_filename else ''
+    }
+
+
+def _repair_wav(path):
+    """
+    Fix the sizes in the header of a WAV whose writer never closed it (the wave module only
+    writes them on close). Returns False if no audio reached the file.
+    """
+    header = 44  # RIFF + fmt + data headers as written by the wave module for PCM
+    size = path.stat().st_size
+    if size <= header:
+        return False
+    data = (size - header) // 2 * 2
+    with open(path, 'r+b') as f:
+        f.seek(4)
+        f.write((36 + data).to_bytes(4, 'little'))
+        f.seek(40)
+        f.write(data.to_bytes(4, 'little'))
+        f.truncate(header + data)
+    return True
+
+
+def _recover(session_id, recordings_dir, store):
+    wav_path, journal_path, _ = _partial_files(recordings_dir, session_id)
+    records = read_jsonl(journal_path)
+    meta = records[0] if records and records[0].get('type') == 'session' else {}
+    segments = [r for r in records if r.get('type') != 'session']
+    if meta.get('started'):
+        started = datetime.fromisoformat(meta['started'])
+    else:
+        started = datetime.fromtimestamp((wav_path if wav_path.exists() else journal_path).stat().st_mtime)
+    audio_filename = meta.get('audio_filename') or f"{started:%Y%m%d_%H%M%S}_Live_Meeting.wav"
+    audio_path = Path(recordings_dir) / audio_filename
+    if wav_path.exists():
+        if _repair_wav(wav_path):
+            os.replace(wav_path, audio_path)
+        else:
+            wav_path.unlink()
+    meeting = None
+    if audio_path.exists() or segments:
+        from app.meetings_store import MeetingsStore
+        # The id was chosen when the session started, so saving again after a crash here
+        # replaces the record instead of adding a second one
+        meeting = store.append(_meeting_record(
+            meta.get('meeting_id') or MeetingsStore.new_meeting_id(), meta.get('meeting_name') or 'Live Meeting',
+            started, audio_filename if audio_path.exists() else '', segments))
+    journal_path.unlink(missing_ok=True)
+    return meeting
+
+
+def recover_orphans(recordings_dir, store):
+    """
+    Save the meetings of live sessions whose worker died mid-stream, and remove the
+    lock files of sessions that died before writing anything.
+
+    Returns:
+        The meetings saved
+    """
+    recordings_dir = Path(recordings_dir)
+    session_ids = {p.name[len(".live-"):].rsplit(".", 1)[0]
+                   for pattern in (".live-*.wav", ".live-*.jsonl", ".live-*.lock")
+                   for p in recordings_dir.glob(pattern)}
+    recovered = []
+    for session_id in sorted(session_ids):
+        wav_path, journal_path, lock_path = _partial_files(recordings_dir, session_id)
+        try:
+            with file_lock(lock_path, blocking=False):
+                # No files: the session died before its first write, or another worker got to it first
+                meeting = None
+                if wav_path.exists() or journal_path.exists():
+                    meeting = _recover(session_id, recordings_dir, store)
+        except BlockingIOError:
+            continue  # still streaming in another worker
+        except Exception as e:
+            print(f"[live] could not recover session {session_id}: {e}", flush=True)
+            continue
+        lock_path.unlink(missing_ok=True)
+        if meeting is not None:
+            print(f"[live] recovered unfinished session {session_id} as meeting {meeting['id']} "
+                  f"({meeting.get('transcript_segments', 0)} segments)", flush=True)
+            recovered.append(meeting)
+    return recovered
+
+
+class LiveSession:
+    """
+    One streamed meeting: audio is appended to a WAV in the recordings folder as it
+    arrives, utterances are transcribed on a worker thread, and finish() saves the meeting.
+    """
+
+    def __init__(self, meeting_name, send, recordings_dir, engine, sample_rate=RATE):
+        self.id = uuid.uuid4().hex[:12]
+        self.meeting_name = meeting_name
+        self.send = send
+        self.sample_rate = sample_rate
+        self.engine = engine
+        self.segmenter = OnlineSegmenter(
+            min_silence=float(os.getenv("LIVE_MIN_SILENCE", "0.8")),
+            max_utterance=float(os.getenv("LIVE_MAX_UTTERANCE", "20")))
+        self.embedder = get_embedder()
+        self.speakers = SpeakerClusterer(
+            threshold=float(os.getenv("LIVE_SPEAKER_THRESHOLD") or self.embedder.threshold),
+            max_speakers=int(os.getenv("LIVE_MAX_SPEAKERS", "10")))
+        self.segments = []
+        self.started = datetime.now()
+
+        from app.meetings_store import MeetingsStore
+        self.meeting_id = MeetingsStore.new_meeting_id()
+        recordings_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = self.started.strftime('%Y%m%d_%H%M%S')
+        safe_meeting_name = "".join(c for c in meeting_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        safe_meeting_name = safe_meeting_name.replace(' ', '_')[:50]
+        self.audio_filename = f"{timestamp}_{safe_meeting_name}.wav"
+        self.audio_path = recordings_dir / self.audio_filename
+        self.partial_path, self.journal_path, self.lock_path = _partial_files(recordings_dir, self.id)
+        # Held until finish(): recover_orphans only touches sessions whose lock is free
+        self._owner = ExitStack()
+        self._owner.enter_context(file_lock(self.lock_path))
+        append_jsonl(self.journal_path, {
+            'type': 'session', 'meeting_id': self.meeting_id, 'meeting_name': meeting_name,
+            'started': self.started.isoformat(), 'audio_filename': self.audio_filename})
+        self.wav = wave.open(str(self.partial_path), "wb")
+        self.wav.setnchannels(1)
+        self.wav.setsampwidth(2)
+        self.wav.setframerate(RATE)
+
+        self.utterances = queue.Queue()
+        self.worker = threading.Thread(target=self._work, name=f"live-{self.id}", daemon=True)
+        self.worker.start()
+
+    def add_audio(self, pcm):
+        samples = to_float(pcm, self.sample_rate)
+        self.wav.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+        for utterance in self.segmenter.push(samples):
+            self.utterances.put(utterance)
+
+    def _work(self):
+        while True:
+            utterance = self.utterances.get()
+            if utterance is None:
+                return
+            try:
+                self._transcribe(*utterance)
+            except Exception as e:
+                print(f"[live] {self.id}: transcription failed: {e}", flush=True)
+                self.send({"type": "error", "error": f"Transcription failed: {e}"})
+
+    def _transcribe(self, start, samples):
+        # Sessions share the resident model; the engine serializes calls if it has to
+        result = self.engine.transcribe(samples)
+        speaker = self.speakers.assign(self.embedder(samples), may_add=len(samples) >= MIN_NEW_SPEAKER * RATE)
+        for seg in result.get("segments", []):
+            text = seg["text"].strip()
+            if not text:
+                continue
+            segment = {
+                "speaker": speaker,
+                "start": round(start + seg["start"], 2),
+                "end": round(start + seg["end"], 2),
+                "text": text,
+            }
+            self.segments.append(segment)
+            append_jsonl(self.journal_path, segment)
+            self.send({"type": "segment", "index": len(self.segments) - 1, "segment": segment})
+
+    def finish(self, store):
+        """Transcribe what is left, then save the recording and the meeting; returns the meeting."""
+        for utterance in self.segmenter.flush():
+            self.utterances.put(utterance)
+        self.utterances.put(None)
+        self.worker.join()
+        self.wav.close()
+        os.replace(self.partial_path, self.audio_path)
+
+        meeting = _meeting_record(self.meeting_id, self.meeting_name, self.started, self.audio_filename, self.segments)
+        store.append(meeting)
+        self.journal_path.unlink(missing_ok=True)
+        self._owner.close()
+        self.lock_path.unlink(missing_ok=True)
+        return meeting
+
+
+def _is_stop(message):
+    try:
+        return json.loads(message).get('type') == 'stop'
+    except (ValueError, AttributeError):
+        return False
+
+
+def init_app(app):
+    """Register the /api/live-transcription WebSocket (needs flask-sock)."""
+    try:
+        from flask_sock import Sock
+    except ImportError:
+        print("flask-sock is not installed; live transcription is disabled", flush=True)
+        return
+
+    from app.metrics import REGISTRY
+    from app.routes import get_data_path, get_meetings_store
+    from app.transcription import get_engine
+
+    sock = Sock(app)
+
+    @sock.route('/api/live-transcription')
+    def live_transcription(ws):
+        """Stream audio in, transcript segments out; the meeting is saved when the stream ends"""
+        send_lock = threading.Lock()
+
+        def send(message):
+            with send_lock:
+                try:
+                    ws.send(json.dumps(message))
+                except Exception:
+                    pass  # client went away; the meeting is still saved
+
+        meeting_name, sample_rate = 'Live Meeting', RATE
+        first = ws.receive()
+        if isinstance(first, str):
+            try:
+                start = json.loads(first)
+            except ValueError:
+                start = {}
+            meeting_name = start.get('meeting_name') or meeting_name
+            sample_rate = int(start.get('sample_rate') or RATE)
+            first = None
+
+        try:
+            engine = get_engine()
+            engine.load()
+        except Exception as e:
+            send({"type": "error", "error": f"Error loading Whisper model: {e}"})
+            return
+
+        session = LiveSession(meeting_name, send, get_data_path() / "recordings", engine, sample_rate)
+        REGISTRY.gauge("live_sessions").inc()
+        started = time.perf_counter()
+        print(f"[live] {session.id}: '{meeting_name}' started", flush=True)
+        send({"type": "ready", "session": session.id, "sampleRate": RATE})
+        try:
+            message = first
+            while True:
+                if isinstance(message, (bytes, bytearray)):
+                    session.add_audio(message)
+                elif message is not None and _is_stop(message):
+                    break
+                message = ws.receive()
+                if message is None:
+                    break
+        except Exception as e:
+            # Disconnects end the stream like a stop message
+            print(f"[live] {session.id}: stream ended: {e}", flush=True)
+        finally:
+            REGISTRY.gauge("live_sessions").dec()
+            meeting = session.finish(get_meetings_store())
+            REGISTRY.observe_stage('/api/live-transcription', 'session', time.perf_counter() - started)
+            print(f"[live] {session.id}: saved meeting {meeting['id']} ({len(meeting['transcript'])} segments)", flush=True)
+        send({"type": "saved", "meeting": meeting})
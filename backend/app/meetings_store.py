@@ -0,0 +1,455 @@
+"""
+Meetings store backing /api/events and /api/process-audio.
+
+Layout in the data folder:
+    meeting_data.json        compacted list of meetings (newest first)
+    meeting_journal.jsonl    meetings appended since the last compaction, one per line
+    transcripts/<id>.jsonl   one transcript segment per line, referenced by the meeting record
+    transcripts/<id>.idx.json  start times, running max end times and byte offsets of those lines
+    .meeting_data.lock       inter-process lock file
+
+Adding a meeting appends a single line to the journal and writes its transcript to its
+own file, so the cost does not grow with the number of past meetings. The journal is
+folded back into meeting_data.json (temp file + atomic rename) once it gets long.
+
+Meeting records only carry 'transcript_file' and 'transcript_segments', so listing
+meetings never parses transcript text; load_transcript_range() uses the .idx.json
+offsets to read just the lines for a time window.
+
+Older meeting_data.json files embed transcripts in the meeting records; those are
+still served as they are. Moving them out (and compacting the journal) is an explicit
+one-off, never done by a request:
+
+    python -m app.meetings_store migrate
+    python -m app.meetings_store compact
+"""
+import bisect
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+
+from app.storage import file_lock, atomic_write_bytes, atomic_write_json, append_jsonl, read_jsonl
+
+# Parsed transcripts kept for load_transcript(); the rest are read from their files again
+TRANSCRIPT_CACHE_SIZE = 16
+
+
+class MeetingsStore:
+    """Journaled, lock-protected store for meeting_data.json and per-meeting transcripts."""
+
+    def __init__(self, data_dir, compact_threshold=50, transcript_cache_size=TRANSCRIPT_CACHE_SIZE):
+        """
+        Args:
+            data_dir: Path to backend/data
+            compact_threshold: Number of journal entries after which append() compacts
+            transcript_cache_size: Number of parsed transcripts load_transcript() keeps
+        """
+        self.data_dir = Path(data_dir)
+        self.meetings_file = self.data_dir / "meeting_data.json"
+        self.journal_file = self.data_dir / "meeting_journal.jsonl"
+        self.lock_file = self.data_dir / ".meeting_data.lock"
+        self.transcripts_dir = self.data_dir / "transcripts"
+        self.compact_threshold = compact_threshold
+        self.transcript_cache_size = transcript_cache_size
+
+        self._cache_lock = threading.Lock()
+        self._cache_key = None
+        self._cache = None
+        self._hydrated = None
+        self._transcript_cache = OrderedDict()
+        self._index_cache = {}
+        # (journal stat key, entries) as of this process's last append
+        self._journal_count = None
+
+    # ---- reading ----
+
+    def _stat_key(self):
+        """Cheap fingerprint of the on-disk state, used to reuse the last parse."""
+        key = []
+        for path in (self.meetings_file, self.journal_file):
+            try:
+                st = path.stat()
+                key.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                key.append(None)
+        return tuple(key)
+
+    def version(self):
+        """Token that changes whenever meetings are added or replaced (for callers caching derived data)."""
+        return self._stat_key()
+
+    def _read_unlocked(self):
+        base = []
+        if self.meetings_file.exists():
+            with open(self.meetings_file, 'r', encoding='utf-8') as f:
+                base = json.load(f)
+        journal = read_jsonl(self.journal_file)
+        return self._merge(base, journal)
+
+    @staticmethod
+    def _merge(base, journal):
+        """Newest journal entries first, then the compacted list. Duplicate ids keep the first copy."""
+        merged = []
+        seen_ids = set()
+        for meeting in list(reversed(journal)) + list(base):
+            meeting_id = meeting.get('id') if isinstance(meeting, dict) else None
+            if meeting_id:
+                if meeting_id in seen_ids:
+                    continue
+                seen_ids.add(meeting_id)
+            merged.append(meeting)
+        return merged
+
+    def load(self, include_transcripts=False):
+        """
+        Return all meetings, newest first.
+
+        Args:
+            include_transcripts: Inline each meeting's transcript segments (read lazily
+                                 from transcripts/<id>.jsonl). Listing callers should leave this off.
+                                 Meetings unchanged since the previous call keep their hydrated
+                                 copy, so after an append only the new transcript is read.
+        """
+        key = self._stat_key()
+        with self._cache_lock:
+            if self._cache_key != key:
+                with file_lock(self.lock_file, shared=True):
+                    meetings = self._read_unlocked()
+                # Re-stat after reading: if a writer slipped in, the next call re-reads
+                self._cache_key = key if key == self._stat_key() else None
+                self._cache = meetings
+            meetings = self._cache
+
+        if not include_transcripts:
+            return list(meetings)
+        with self._cache_lock:
+            previous = self._hydrated
+        if previous is not None and previous[0] is meetings:
+            # Same records as last time, so hand out the same hydrated objects (lets callers cache per item)
+            return list(previous[1])
+        reusable = {}
+        if previous is not None:
+            for record, hydrated_record in zip(*previous):
+                if isinstance(record, dict) and record.get('transcript_file'):
+                    reusable[record['transcript_file']] = (record, hydrated_record)
+        hydrated = []
+        for meeting in meetings:
+            if isinstance(meeting, dict) and meeting.get('transcript_file') and 'transcript' not in meeting:
+                old = reusable.get(meeting['transcript_file'])
+                if old is not None and old[0] == meeting:
+                    meeting = old[1]
+                else:
+                    # Read past the transcript cache: hydrating every meeting would only flush it
+                    meeting = {**meeting, 'transcript': self.read_transcript(meeting)}
+            hydrated.append(meeting)
+        with self._cache_lock:
+            self._hydrated = (meetings, hydrated)
+        return list(hydrated)
+
+    def get(self, meeting_id):
+        """Return the meeting record with this id, or None."""
+        for meeting in self.load():
+            if isinstance(meeting, dict) and meeting.get('id') == meeting_id:
+                return meeting
+        return None
+
+    def load_transcript(self, meeting):
+        """Return the transcript segments for a meeting record (inline or from its transcript file)."""
+        if meeting.get('transcript') is not None:
+            return meeting['transcript']
+        file_name = meeting.get('transcript_file')
+        if not file_name:
+            return []
+        with self._cache_lock:
+            cached = self._transcript_cache.get(file_name)
+            if cached is not None:
+                self._transcript_cache.move_to_end(file_name)
+                return cached
+        segments = read_jsonl(self.transcripts_dir / file_name)
+        # Transcript files are write-once, so parsed copies never go stale
+        with self._cache_lock:
+            self._transcript_cache[file_name] = segments
+            if len(self._transcript_cache) > self.transcript_cache_size:
+                self._transcript_cache.popitem(last=False)
+        return segments
+
+    def _load_transcript_index(self, file_name):
+        with self._cache_lock:
+            cached = self._index_cache.get(file_name)
+        if cached is not None:
+            return cached
+        index_path = self.transcripts_dir / self._index_name(file_name)
+        if not index_path.exists():
+            return None
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        with self._cache_lock:
+            self._index_cache[file_name] = index
+        return index
+
+    def load_transcript_range(self, meeting, start=None, end=None):
+        """
+        Return the transcript segments that overlap [start, end) seconds.
+
+        Args:
+            meeting: Meeting record
+            start: Window start in seconds (None = beginning of the recording)
+            end: Window end in seconds (None = end of the recording)
+        """
+        def overlaps(seg):
+            return (start is None or seg.get('end', 0) > start) and (end is None or seg.get('start', 0) < end)
+
+        file_name = meeting.get('transcript_file')
+        index = self._load_transcript_index(file_name) if file_name and 'transcript' not in meeting else None
+        if index is None:
+            return [seg for seg in self.load_transcript(meeting) if overlaps(seg)]
+        if start is None and end is None:
+            return self.load_transcript(meeting)
+
+        # Segments are sorted by start; max_ends is the running maximum of end times so it is
+        # sorted too. Everything before `first` ends before the window, everything from `last` on
+        # starts after it.
+        first = bisect.bisect_right(index['max_ends'], start) if start is not None else 0
+        last = bisect.bisect_left(index['starts'], end) if end is not None else len(index['starts'])
+        if first >= last:
+            return []
+        segments = []
+        with open(self.transcripts_dir / file_name, 'rb') as f:
+            f.seek(index['offsets'][first])
+            for _ in range(last - first):
+                seg = json.loads(f.readline())
+                if overlaps(seg):
+                    segments.append(seg)
+        return segments
+
+    def read_transcript(self, meeting):
+        """Transcript segments of a meeting read from its file each time, without going through the cache."""
+        if meeting.get('transcript') is not None:
+            return meeting['transcript']
+        file_name = meeting.get('transcript_file')
+        return read_jsonl(self.transcripts_dir / file_name) if file_name else []
+
+    def load_segment(self, meeting, number):
+        """
+        Segment `number` of a meeting's transcript, read at its offset in the transcript file
+        (from the .idx.json written with it) instead of loading the whole transcript.
+
+        Raises:
+            IndexError: No such segment
+        """
+        file_name = meeting.get('transcript_file')
+        index = self._load_transcript_index(file_name) if file_name and 'transcript' not in meeting else None
+        if index is None:
+            return self.read_transcript(meeting)[number]
+        offsets = index['offsets']
+        if not 0 <= number < len(offsets):
+            raise IndexError(number)
+        with open(self.transcripts_dir / file_name, 'rb') as f:
+            f.seek(offsets[number])
+            return json.loads(f.readline())
+
+    # ---- writing ----
+
+    @staticmethod
+    def new_meeting_id():
+        return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+    @staticmethod
+    def _index_name(file_name):
+        return file_name.rsplit('.', 1)[0] + ".idx.json"
+
+    def _write_transcript(self, meeting_id, segments):
+        file_name = f"{meeting_id}.jsonl"
+        segments = sorted(segments, key=lambda seg: seg.get('start', 0))
+        chunks = []
+        starts, max_ends, offsets = [], [], []
+        offset = 0
+        max_end = float('-inf')
+        for seg in segments:
+            line = (json.dumps(seg, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+            max_end = max(max_end, seg.get('end', 0))
+            starts.append(seg.get('start', 0))
+            max_ends.append(max_end)
+            offsets.append(offset)
+            chunks.append(line)
+            offset += len(line)
+        atomic_write_bytes(self.transcripts_dir / file_name, b"".join(chunks))
+        # The index is written second: a missing index just means load_transcript_range falls back to a full read
+        atomic_write_json(
+            self.transcripts_dir / self._index_name(file_name),
+            {'starts': starts, 'max_ends': max_ends, 'offsets': offsets},
+            indent=None,
+        )
+        return file_name
+
+    def _externalize(self, meeting):
+        """Copy of meeting with an id and its transcript moved to a separate file."""
+        record = dict(meeting)
+        record.setdefault('id', self.new_meeting_id())
+        transcript = record.pop('transcript', None)
+        if transcript:
+            record['transcript_file'] = self._write_transcript(record['id'], transcript)
+            record['transcript_segments'] = len(transcript)
+        return record
+
+    def append(self, meeting):
+        """
+        Add a new meeting in front of the existing ones.
+
+        Returns:
+            The stored record (with 'id' and 'transcript_file' instead of the inline transcript)
+        """
+        record = self._externalize(meeting)
+        with file_lock(self.lock_file):
+            journal_len = self._journal_entries_unlocked() + 1
+            append_jsonl(self.journal_file, record)
+            if journal_len >= self.compact_threshold:
+                self._compact_unlocked()
+            else:
+                self._journal_count = (self._journal_key(), journal_len)
+        return record
+
+    def _journal_key(self):
+        try:
+            st = self.journal_file.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _journal_entries_unlocked(self):
+        """Entries in the journal; only re-read if another process changed it since our last append."""
+        if self._journal_count is not None and self._journal_count[0] == self._journal_key():
+            return self._journal_count[1]
+        return len(read_jsonl(self.journal_file))
+
+    def compact(self):
+        """Fold the journal into meeting_data.json."""
+        with file_lock(self.lock_file):
+            self._compact_unlocked()
+
+    def _compact_unlocked(self):
+        meetings = self._read_unlocked()
+        atomic_write_json(self.meetings_file, meetings)
+        # A crash between these two steps leaves journal entries that are also in the
+        # compacted file; _merge drops them by id, so the rename above is the commit point.
+        atomic_write_bytes(self.journal_file, b"")
+
+    def migrate_inline_transcripts(self):
+        """
+        Move transcripts still embedded in meeting_data.json / the journal into their own files.
+
+        Returns:
+            Number of meetings migrated
+        """
+        with file_lock(self.lock_file):
+            meetings = self._read_unlocked()
+            if not any(isinstance(m, dict) and m.get('transcript') for m in meetings):
+                return 0
+            migrated = 0
+            records = []
+            for meeting in meetings:
+                if isinstance(meeting, dict) and meeting.get('transcript'):
+                    meeting = self._externalize(meeting)
+                    migrated += 1
+                records.append(meeting)
+            atomic_write_json(self.meetings_file, records)
+            atomic_write_bytes(self.journal_file, b"")
+        print(f"Moved {migrated} inline transcript(s) to {self.transcripts_dir}")
+        return migrated
+
+    def merge(self, records, key, date=None):
+        """
+        Upsert records (e.g. freshly scraped meetings) without touching anything else.
+
+        Existing meetings with the same key keep their extra fields (id, transcript, audio)
+        and get the new values for the fields present in the record. New records keep the
+        list newest first: each goes in front of the first existing meeting that is older.
+
+        Args:
+            records: Meeting dicts to upsert
+            key: key(meeting) -> identity string, e.g. "date|meeting"
+            date: date(meeting) -> datetime or None, used to place new records. Without it,
+                  or for records whose date is unreadable, new records go in front.
+
+        Returns:
+            dict with 'added' and 'modified' record lists
+        """
+        added, modified = [], []
+        with file_lock(self.lock_file):
+            meetings = self._read_unlocked()
+            positions = {}
+            for i, meeting in enumerate(meetings):
+                if isinstance(meeting, dict):
+                    positions.setdefault(key(meeting), i)
+            for record in records:
+                record_key = key(record)
+                if record_key not in positions:
+                    positions[record_key] = None
+                    added.append(record)
+                    continue
+                i = positions[record_key]
+                if i is None:
+                    # Repeated within records: the first copy is already added
+                    continue
+                updated = {**meetings[i], **record}
+                if updated != meetings[i]:
+                    meetings[i] = updated
+                    modified.append(updated)
+            if added:
+                meetings = self._insert_by_date(meetings, added, date)
+            if added or modified:
+                atomic_write_json(self.meetings_file, meetings)
+                atomic_write_bytes(self.journal_file, b"")
+        return {'added': added, 'modified': modified}
+
+    @staticmethod
+    def _insert_by_date(meetings, new, date):
+        """meetings (newest first) with new records merged in by date."""
+        def day(meeting):
+            return date(meeting) if date is not None and isinstance(meeting, dict) else None
+
+        # Undated records first, then newest to oldest
+        new_days = [day(m) for m in new]
+        order = [i for i in range(len(new)) if new_days[i] is None] + sorted(
+            (i for i in range(len(new)) if new_days[i] is not None), key=lambda i: new_days[i], reverse=True)
+        merged = []
+        j = 0
+        for meeting in meetings:
+            current = day(meeting)
+            while j < len(order) and (new_days[order[j]] is None
+                                      or (current is not None and new_days[order[j]] >= current)):
+                merged.append(new[order[j]])
+                j += 1
+            merged.append(meeting)
+        merged.extend(new[i] for i in order[j:])
+        return merged
+
+    def replace_all(self, meetings):
+        """Atomically replace every stored meeting (used by bulk rewrites such as the scrapers)."""
+        with file_lock(self.lock_file):
+            atomic_write_json(self.meetings_file, meetings)
+            atomic_write_bytes(self.journal_file, b"")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Maintenance of the meetings store")
+    parser.add_argument("command", choices=["migrate", "compact"],
+                        help="migrate: move inline transcripts to transcripts/; compact: fold the journal into meeting_data.json")
+    parser.add_argument("--data", default=str(Path(__file__).parent.parent / "data"), help="data folder")
+    args = parser.parse_args()
+
+    store = MeetingsStore(args.data)
+    if args.command == "migrate":
+        store.migrate_inline_transcripts()
+    else:
+        store.compact()
+        print(f"Compacted the journal into {store.meetings_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Request metrics for the Flask app: per-endpoint latency histograms, in-flight
+requests, status counts and per-stage timings, served as JSON in /api/stats and in
+the Prometheus text format at /metrics.
+
+Recording runs on every request, so it takes no locks: every metric keeps one
+array of numbers per thread (each thread only writes its own) and readers add the
+arrays up. When a thread exits its numbers are folded into a retired total.
+Histograms use fixed buckets, so an observation is a bisect plus two additions.
+
+All of this is per process. Under a multi-worker server each worker keeps its own
+numbers (per-stage timings included), so /metrics labels every series with the
+worker's pid and leaves the aggregation to Prometheus (sum without (pid)), and
+/api/stats reports the pid of the worker that answered it.
+"""
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+from flask import g, request
+
+# Upper bounds in seconds; chat requests wait on the LLM and audio processing on whisper
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+class _Shard:
+    __slots__ = ("values", "__weakref__")
+
+    def __init__(self, size):
+        self.values = [0] * size
+
+
+class ShardedArray:
+    """Fixed-size array of numbers that threads add to without locking."""
+
+    def __init__(self, size):
+        self.size = size
+        self._local = threading.local()
+        self._shards = weakref.WeakSet()
+        self._retired = [0] * size
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            # Once per thread: register the shard and fold it into _retired when the thread goes away
+            shard = _Shard(self.size)
+            with self._lock:
+                self._shards.add(shard)
+            weakref.finalize(shard, self._retire, shard.values)
+            self._local.shard = shard
+        return shard
+
+    def add(self, index, amount=1):
+        self._shard().values[index] += amount
+
+    def _retire(self, values):
+        with self._lock:
+            for i, v in enumerate(values):
+                self._retired[i] += v
+
+    def totals(self):
+        with self._lock:
+            totals = list(self._retired)
+            for shard in list(self._shards):
+                for i, v in enumerate(shard.values):
+                    totals[i] += v
+        return totals
+
+
+class Counter:
+    def __init__(self):
+        self._values = ShardedArray(1)
+
+    def inc(self, amount=1):
+        self._values.add(0, amount)
+
+    def value(self):
+        return self._values.totals()[0]
+
+
+class Gauge(Counter):
+    """Counter that can go down (e.g. requests in flight)."""
+
+    def dec(self, amount=1):
+        self._values.add(0, -amount)
+
+
+class Histogram:
+    """Fixed-bucket histogram: counts per bucket (last one is +Inf) and the sum of observations."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One slot per bucket, one for +Inf, one for the sum
+        self._values = ShardedArray(len(self.buckets) + 2)
+
+    def observe(self, value):
+        self._values.add(bisect_left(self.buckets, value))
+        self._values.add(len(self.buckets) + 1, value)
+
+    def snapshot(self):
+        """(per-bucket counts incl. +Inf, total count, sum)"""
+        totals = self._values.totals()
+        counts = totals[:-1]
+        return counts, sum(counts), totals[-1]
+
+    def quantile(self, q, snapshot=None):
+        """Estimate of the q-quantile, interpolated inside its bucket (None if empty)."""
+        counts, count, _ = snapshot or self.snapshot()
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for i, c in enumerate(counts):
+            if seen + c >= rank and c:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / c
+            seen += c
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """Named metrics with labels, created on first use."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind, name, labels):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = self._metrics[key] = kind()
+        return metric
+
+    def counter(self, name, **labels):
+        return self._get(Counter, name, labels)
+
+    def gauge(self, name, **labels):
+        return self._get(Gauge, name, labels)
+
+    def histogram(self, name, **labels):
+        return self._get(Histogram, name, labels)
+
+    def items(self, name):
+        """[(labels dict, metric)] for every label set of a metric name."""
+        return [(dict(labels), metric) for (n, labels), metric in list(self._metrics.items()) if n == name]
+
+    def observe_stage(self, endpoint, stage, seconds):
+        """Record the duration of one stage of a request (e.g. the Backboard call inside /api/chat)."""
+        self.histogram("stage_duration_seconds", endpoint=endpoint, stage=stage).observe(seconds)
+
+    def summary(self):
+        """Per-endpoint and per-stage numbers for /api/stats (milliseconds), for this process only."""
+        endpoints = {}
+        for labels, hist in self.items("request_duration_seconds"):
+            snap = hist.snapshot()
+            if not snap[1]:
+                continue
+            key = f"{labels['method']} {labels['endpoint']}"
+            errors = sum(c.value() for l, c in self.items("requests_total")
+                         if l['endpoint'] == labels['endpoint'] and l['method'] == labels['method'] and l['status'].startswith('5'))
+            in_flight = self.gauge("requests_in_flight", endpoint=labels['endpoint']).value()
+            endpoints[key] = dict(_latency_summary(hist, snap), errors=errors,
+                                  errorRate=round(errors / snap[1], 4), inFlight=in_flight)
+        stages = {}
+        for labels, hist in self.items("stage_duration_seconds"):
+            snap = hist.snapshot()
+            if snap[1]:
+                stages.setdefault(labels['endpoint'], {})[labels['stage']] = _latency_summary(hist, snap)
+        total = sum(e['count'] for e in endpoints.values())
+        avg = sum(e['avgMs'] * e['count'] for e in endpoints.values()) / total if total else None
+        return {
+            'pid': os.getpid(),
+            'totalRequests': total,
+            'avgResponseTime': round(avg, 1) if avg is not None else None,
+            'inFlight': sum(gauge.value() for _, gauge in self.items("requests_in_flight")),
+            'endpoints': endpoints,
+            'stages': stages,
+        }
+
+    def render_prometheus(self):
+        """All metrics in the Prometheus text exposition format, each series labelled with this process's pid."""
+        pid = os.getpid()
+        lines = []
+        by_name = {}
+        for (name, labels), metric in sorted(list(self._metrics.items()), key=lambda kv: kv[0]):
+            by_name.setdefault(name, []).append((dict(labels), metric))
+        for name, series in by_name.items():
+            full = f"kingston_{name}"
+            kind = type(series[0][1])
+            lines.append(f"# TYPE {full} {'histogram' if kind is Histogram else kind.__name__.lower()}")
+            for labels, metric in series:
+                labels = dict(labels, pid=pid)
+                if isinstance(metric, Histogram):
+                    counts, count, total = metric.snapshot()
+                    cumulative = 0
+                    for bound, c in zip(list(metric.buckets) + ["+Inf"], counts):
+                        cumulative += c
+                        lines.append(f"{full}_bucket{_labels(labels, le=bound)} {cumulative}")
+                    lines.append(f"{full}_sum{_labels(labels)} {total:.6f}")
+                    lines.append(f"{full}_count{_labels(labels)} {count}")
+                else:
+                    lines.append(f"{full}{_labels(labels)} {metric.value()}")
+        return "\n".join(lines) + "\n"
+
+
+def _latency_summary(hist, snap):
+    _, count, total = snap
+    ms = lambda q: round(hist.quantile(q, snap) * 1000, 1)
+    return {'count': count, 'avgMs': round(total / count * 1000, 1), 'p50Ms': ms(0.5), 'p95Ms': ms(0.95), 'p99Ms': ms(0.99)}
+
+
+def _labels(labels, **extra):
+    items = list(labels.items()) + list(extra.items())
+    if not items:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+class StageTimer:
+    """Times consecutive stages of a request: mark(name) records the time since the previous mark."""
+
+    def __init__(self, endpoint, registry=None):
+        self.endpoint = endpoint
+        self.registry = registry or REGISTRY
+        self.timings = {}
+        self._last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        seconds = now - self._last
+        self._last = now
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+        self.registry.observe_stage(self.endpoint, stage, seconds)
+        return seconds
+
+
+REGISTRY = MetricsRegistry()
+
+
+def init_app(app, registry=REGISTRY):
+    """Record latency, status and in-flight count of every request handled by app."""
+
+    @app.before_request
+    def _start_request_metrics():
+        endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        g._metrics = (time.perf_counter(), endpoint)
+        registry.gauge("requests_in_flight", endpoint=endpoint).inc()
+
+    @app.after_request
+    def _record_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_request_metrics(exc):
+        started = g.pop("_metrics", None)
+        if started is None:
+            return
+        start, endpoint = started
+        status = g.pop("_metrics_status", 500 if exc is not None else 200)
+        registry.gauge("requests_in_flight", endpoint=endpoint).dec()
+        registry.histogram("request_duration_seconds", method=request.method, endpoint=endpoint).observe(time.perf_counter() - start)
+        registry.counter("requests_total", method=request.method, endpoint=endpoint, status=str(status)).inc()
+
+
+def record_backboard_event(name, registry=REGISTRY, **labels):
+    """
+    Listener for chatbot_module.resilient events: circuit breaker transitions and state,
+    Backboard call outcomes and durations, and retries.
+    """
+    if name == "transition":
+        registry.counter("backboard_circuit_transitions_total", **labels).inc()
+        registry.gauge("backboard_circuit_state", breaker=labels["breaker"], state=labels["from_state"]).dec()
+        registry.gauge("backboard_circuit_state", breaker=labels["breaker"], state=labels["to_state"]).inc()
+    elif name == "call":
+        seconds = labels.pop("seconds", None)
+        registry.counter("backboard_calls_total", **labels).inc()
+        if seconds is not None:
+            registry.histogram("backboard_call_duration_seconds", call=labels["call"]).observe(seconds)
+    elif name == "retry":
+        registry.counter("backboard_retries_total", **labels).inc()
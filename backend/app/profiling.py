@@ -0,0 +1,137 @@
+"""
+Opt-in request profiling.
+
+A request is profiled when it carries an "X-Profile: 1" header or a "profile=1"
+query parameter, or when it is picked by PROFILE_SAMPLE_RATE. A profiled request
+runs under cProfile and collects span timings (the chat stages of
+EventsChatbot.get_response, the process-audio stages); the result is kept in
+memory (last PROFILE_KEEP profiles) and served by /api/admin/profiles. Requests
+that are not profiled only pay for the header/sampling check.
+
+Configuration (environment):
+    PROFILE_SAMPLE_RATE   fraction of requests to profile (default 0)
+    PROFILE_KEEP          number of profiles kept (default 20)
+    PROFILE_ADMIN_TOKEN   required as X-Admin-Token to enable profiling per request or read
+                          profiles; while unset, both are disabled (sampling still runs)
+"""
+import hmac
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import deque
+
+from flask import g, request
+
+# cProfile can only profile one thread at a time on newer Pythons; concurrent
+# profiled requests fall back to span timings only
+_cprofile_lock = threading.Lock()
+
+
+class ProfileStore:
+    """The last N request profiles."""
+
+    def __init__(self, keep=20):
+        self._profiles = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    def add(self, profile):
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list(self):
+        """Summaries, newest first."""
+        with self._lock:
+            profiles = list(self._profiles)
+        return [{k: v for k, v in p.items() if k != 'stats'} for p in reversed(profiles)]
+
+    def get(self, profile_id):
+        with self._lock:
+            for profile in self._profiles:
+                if profile['id'] == profile_id:
+                    return profile
+        return None
+
+
+STORE = ProfileStore(int(os.getenv('PROFILE_KEEP', '20')))
+
+
+def admin_allowed():
+    """True if the request carries PROFILE_ADMIN_TOKEN (never when no token is configured)."""
+    token = os.getenv('PROFILE_ADMIN_TOKEN')
+    return bool(token) and hmac.compare_digest(request.headers.get('X-Admin-Token', '').encode(), token.encode())
+
+
+def active():
+    """True if the current request is being profiled."""
+    return g.get('_profile') is not None
+
+
+def add_spans(timings, prefix=""):
+    """Attach {name: seconds} span timings to the current profile (no-op when not profiling)."""
+    profile = g.get('_profile')
+    if profile is None:
+        return
+    for name, seconds in timings.items():
+        profile['spans'].append({'name': f"{prefix}{name}", 'ms': round(seconds * 1000, 2)})
+
+
+def _wanted():
+    if request.headers.get('X-Profile') == '1' or request.args.get('profile') == '1':
+        return admin_allowed()
+    rate = float(os.getenv('PROFILE_SAMPLE_RATE', '0') or 0)
+    return rate > 0 and random.random() < rate
+
+
+def init_app(app, store=STORE, top=40):
+    """Profile opted-in or sampled requests handled by app."""
+
+    @app.before_request
+    def _start_profile():
+        if not _wanted():
+            return
+        profile = {
+            'id': uuid.uuid4().hex[:12],
+            'method': request.method,
+            'path': request.path,
+            'startedAt': time.time(),
+            'spans': [],
+            'stats': None,
+        }
+        profiler = None
+        if _cprofile_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+            profiler.enable()
+        g._profile = profile
+        g._profiler = profiler
+        g._profile_start = time.perf_counter()
+
+    @app.after_request
+    def _tag_response(response):
+        profile = g.get('_profile')
+        if profile is not None:
+            profile['status'] = response.status_code
+            response.headers['X-Profile-Id'] = profile['id']
+        return response
+
+    @app.teardown_request
+    def _finish_profile(exc):
+        profile = g.pop('_profile', None)
+        if profile is None:
+            return
+        profiler = g.pop('_profiler', None)
+        profile['durationMs'] = round((time.perf_counter() - g.pop('_profile_start')) * 1000, 2)
+        if profiler is not None:
+            profiler.disable()
+            _cprofile_lock.release()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(top)
+            profile['stats'] = out.getvalue()
+        else:
+            profile['stats'] = "cProfile was busy with another request; span timings only"
+        profile.setdefault('status', 500 if exc is not None else None)
+        store.add(profile)
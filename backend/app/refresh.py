@@ -0,0 +1,226 @@
+"""
+Scheduled background refresh of the archive.
+
+Every ARCHIVE_REFRESH_INTERVAL seconds the refresher copies backend/data into a
+staging folder, runs the scrapers in backend/archive-scrape against the copy,
+builds a new archive snapshot from it, publishes the changed files back with
+os.replace, and hot-swaps the snapshot into the serving process. Requests keep
+using the snapshot they started with, so nothing waits on a refresh or sees a
+half-written file. Other worker processes pick the new files up through the
+snapshot watcher.
+
+Every gunicorn worker runs this timer, but a refresh only starts when the time of
+the last one, kept in data/.refresh.last and read under the refresh lock, is at
+least an interval ago. Workers forked at different times (or recycled) therefore
+share one schedule instead of each running the scrapers once per interval.
+
+Configuration (environment):
+    ARCHIVE_REFRESH_INTERVAL   seconds between refreshes (unset or 0 = disabled)
+    ARCHIVE_REFRESH_SCRAPERS   comma-separated subset of SCRAPERS (default: allpermits,bylaws,events)
+    ARCHIVE_WATCH_INTERVAL     seconds between checks for files published by other processes (default 30)
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from app.storage import atomic_write_bytes, file_lock, load_json_cached
+from chatbot_module.compiled import SNAPSHOT_FILE, write_compiled
+from chatbot_module.snapshot import LIVE_CATEGORIES, archive_fingerprint, build_snapshot
+
+SCRAPE_DIR = Path(__file__).parent.parent / "archive-scrape"
+
+# Scraper name -> command line; {out} is replaced by the staging folder
+SCRAPERS = {
+    'allpermits': ['allpermits.py', '--out', '{out}'],
+    'bylaws': ['bylaws.py', '--out', '{out}'],
+    'events': ['events.py', '--out', '{out}'],
+    'pdfs': ['pdf_ingest.py', '--data', '{out}'],
+}
+DEFAULT_SCRAPERS = ('allpermits', 'bylaws', 'events')
+# Longest sleep of the timer between checks of the shared schedule
+POLL_SECONDS = 60
+
+
+def _meeting_key(meeting):
+    return f"{meeting.get('date')}|{meeting.get('meeting')}"
+
+
+class ArchiveRefresher:
+    """Runs the scrapers on a cadence and swaps in the resulting snapshot."""
+
+    def __init__(self, data_dir, holder, meetings_store, scrapers=DEFAULT_SCRAPERS,
+                 interval=None, scraper_timeout=3600):
+        """
+        Args:
+            data_dir: backend/data
+            holder: SnapshotHolder of this process
+            meetings_store: MeetingsStore; scraped meetings are merged into it instead of replacing the file
+            scrapers: Names from SCRAPERS to run, in order
+            interval: Seconds between refreshes for start()
+            scraper_timeout: Seconds before a scraper run is killed
+        """
+        unknown = [s for s in scrapers if s not in SCRAPERS]
+        if unknown:
+            raise ValueError(f"Unknown scrapers: {unknown}")
+        self.data_dir = Path(data_dir)
+        self.holder = holder
+        self.meetings_store = meetings_store
+        self.scrapers = list(scrapers)
+        self.interval = interval
+        self.scraper_timeout = scraper_timeout
+        self.lock_file = self.data_dir / ".refresh.lock"
+        self.stamp_file = self.data_dir / ".refresh.last"
+        self.status = {'running': False, 'last_started': None, 'last_finished': None,
+                       'last_error': None, 'published': [], 'snapshot_version': None}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stage(self):
+        """Copy the archive into a fresh staging folder next to data/ (same filesystem, so os.replace works)."""
+        staging = Path(tempfile.mkdtemp(prefix=".refresh-", dir=str(self.data_dir.parent)))
+        for json_file in self.data_dir.glob("*.json"):
+            shutil.copy2(json_file, staging / json_file.name)
+        if (self.data_dir / "crawl_state").is_dir():
+            shutil.copytree(self.data_dir / "crawl_state", staging / "crawl_state")
+        # Content-addressed and write-once, so it can be shared instead of copied. Created first:
+        # otherwise pdf_ingest would fill a cache inside staging that is deleted after the run
+        (self.data_dir / "pdf_cache").mkdir(exist_ok=True)
+        try:
+            os.symlink(self.data_dir.resolve() / "pdf_cache", staging / "pdf_cache", target_is_directory=True)
+        except OSError:
+            pass  # no symlinks here: the staged cache is moved into data/ by _publish
+        return staging
+
+    def _run_scrapers(self, staging):
+        for name in self.scrapers:
+            cmd = [sys.executable] + [arg.replace('{out}', str(staging)) for arg in SCRAPERS[name]]
+            print(f"[refresh] running {name}", flush=True)
+            started = time.monotonic()
+            result = subprocess.run(cmd, cwd=str(SCRAPE_DIR), timeout=self.scraper_timeout,
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+            if result.returncode != 0:
+                tail = "\n".join(result.stdout.splitlines()[-20:])
+                raise RuntimeError(f"{name} exited with {result.returncode}:\n{tail}")
+            print(f"[refresh] {name} finished in {time.monotonic() - started:.1f}s", flush=True)
+
+    def _publish(self, staging):
+        """Move changed files from staging into data/. Returns the names published."""
+        published = []
+        for staged in sorted(staging.glob("*.json")):
+            name = staged.stem
+            if name == 'meeting_data':
+                # Recorded meetings may have been added since staging; merge scraped ones in
+                scraped = [m for m in load_json_cached(staged, default=[]) if isinstance(m, dict) and m.get('meeting_url')]
+                changes = self.meetings_store.merge(scraped, _meeting_key)
+                if changes['added'] or changes['modified']:
+                    published.append(staged.name)
+                continue
+            if name in LIVE_CATEGORIES:
+                continue
+            target = self.data_dir / staged.name
+            if target.exists() and target.read_bytes() == staged.read_bytes():
+                continue
+            os.replace(staged, target)
+            published.append(staged.name)
+        # The crawl state records what has been fetched and parsed, so it only goes out together
+        # with those results: PDF text extracted into an unshared staging cache is kept first
+        cache_dir = staging / "pdf_cache"
+        if cache_dir.is_dir() and not cache_dir.is_symlink():
+            for staged in cache_dir.iterdir():
+                os.replace(staged, self.data_dir / "pdf_cache" / staged.name)
+        state_dir = staging / "crawl_state"
+        if state_dir.is_dir():
+            (self.data_dir / "crawl_state").mkdir(exist_ok=True)
+            for staged in state_dir.iterdir():
+                os.replace(staged, self.data_dir / "crawl_state" / staged.name)
+        return published
+
+    def last_run(self):
+        """Start time of the last refresh by any process, or None."""
+        try:
+            return float(self.stamp_file.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def refresh_once(self, force=False):
+        """
+        Run one refresh. Skipped (returns False) if another process is already refreshing or,
+        unless force, if any process started one less than an interval ago.
+        """
+        try:
+            with file_lock(self.lock_file, blocking=False):
+                last = self.last_run()
+                if not force and self.interval and last is not None and time.time() - last < self.interval:
+                    return False
+                atomic_write_bytes(self.stamp_file, str(time.time()).encode())
+                self._refresh_locked()
+        except BlockingIOError:
+            print("[refresh] another refresh is running, skipping", flush=True)
+            return False
+        return True
+
+    def _refresh_locked(self):
+        self.status.update(running=True, last_started=time.time(), last_error=None)
+        staging = None
+        try:
+            staging = self._stage()
+            self._run_scrapers(staging)
+            # Built from staging before anything is published; a failure leaves data/ untouched
+            snapshot = build_snapshot(staging, strict=True)
+            published = self._publish(staging)
+            snapshot.fingerprint = archive_fingerprint(self.data_dir)
+            self.holder.swap(snapshot)
+            if published and (self.data_dir / SNAPSHOT_FILE).exists():
+                # Keep the compiled snapshot current so other workers and restarts open it instead of rebuilding
+                write_compiled(self.data_dir / SNAPSHOT_FILE, snapshot.all_data, snapshot.fingerprint,
+                               exclude=LIVE_CATEGORIES)
+            self.status.update(published=published, snapshot_version=snapshot.version)
+            print(f"[refresh] published {published or 'nothing'}, snapshot {snapshot.version}", flush=True)
+        except Exception as e:
+            self.status['last_error'] = str(e)
+            print(f"[refresh] failed: {e}", flush=True)
+        finally:
+            self.status.update(running=False, last_finished=time.time())
+            if staging is not None:
+                shutil.rmtree(staging, ignore_errors=True)
+
+    def start(self):
+        """Refresh every self.interval seconds (on the schedule shared by all processes) in a daemon thread."""
+        if self._thread is not None or not self.interval:
+            return
+
+        def loop():
+            if self.last_run() is None:
+                # First start on this data folder: the first refresh is due an interval from now
+                try:
+                    with file_lock(self.lock_file, blocking=False):
+                        if self.last_run() is None:
+                            atomic_write_bytes(self.stamp_file, str(time.time()).encode())
+                except BlockingIOError:
+                    pass
+            while not self._stop.wait(min(self.interval, POLL_SECONDS)):
+                self.refresh_once()
+
+        self._thread = threading.Thread(target=loop, name="archive-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def start_refresher_from_env(data_dir, holder, meetings_store):
+    """Start the snapshot watcher and, if ARCHIVE_REFRESH_INTERVAL is set, the scheduled refresher."""
+    holder.start_watcher(interval=float(os.getenv('ARCHIVE_WATCH_INTERVAL', '30')))
+    interval = float(os.getenv('ARCHIVE_REFRESH_INTERVAL', '0') or 0)
+    if not interval:
+        return None
+    scrapers = [s.strip() for s in os.getenv('ARCHIVE_REFRESH_SCRAPERS', ','.join(DEFAULT_SCRAPERS)).split(',') if s.strip()]
+    refresher = ArchiveRefresher(data_dir, holder, meetings_store, scrapers=scrapers, interval=interval)
+    refresher.start()
+    print(f"Archive refresh every {interval:.0f}s: {', '.join(scrapers)}", flush=True)
+    return refresher
@@ -1,12 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
 import asyncio
 import sys
 import json
 import traceback
 import os
+import queue
 import tempfile
-import ssl
+import threading
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from werkzeug.utils import secure_filename
 
@@ -15,6 +17,17 @@ backend_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_dir))
 
 from chatbot_module.chatbot import EventsChatbot
+from chatbot_module.snapshot import SnapshotHolder, LIVE_CATEGORIES
+from app.meetings_store import MeetingsStore
+from app.aggregates import AggregatesService
+from app.timeline import STATUSES as TIMELINE_STATUSES, timeline_page
+from app.transcript_index import TranscriptIndex, parse_query, highlight_spans
+from app.metrics import REGISTRY, StageTimer
+from app.alignment import align_segments
+from app.coalesce import SingleFlight, normalize_query
+from app.transcription import get_engine as get_transcription_engine
+from app import profiling
+from app.storage import extend_json_list, load_json_cached
 
 main_bp = Blueprint('main', __name__)
 chat_bp = Blueprint('chat', __name__)
@@ -22,8 +35,47 @@ chat_bp = Blueprint('chat', __name__)
 # Chatbot instance is created per request so each request runs in its own context
 # (avoids Backboard client/thread tied to a previous request's event loop causing 500 on second prompt)
 def get_chatbot():
-    """Create a fresh chatbot instance for this request."""
-    return EventsChatbot()
+    """Create a fresh chatbot instance for this request, sharing the current archive snapshot."""
+    snapshot = get_snapshot_holder().current()
+    chatbot = EventsChatbot(data_folder_path=get_data_path(), snapshot=snapshot)
+    chatbot.all_data.update(load_live_data())
+    return chatbot
+
+def get_data_path():
+    project_root = Path(__file__).parent.parent.parent
+    return project_root / "backend" / "data"
+
+_snapshot_holder = None
+
+def get_snapshot_holder():
+    """Process-wide holder of the current immutable archive snapshot"""
+    global _snapshot_holder
+    if _snapshot_holder is None:
+        _snapshot_holder = SnapshotHolder(get_data_path())
+    return _snapshot_holder
+
+def load_live_data():
+    """Categories that change between snapshot refreshes, read from disk (cached by mtime)"""
+    live = {}
+    for name in LIVE_CATEGORIES:
+        if name == 'meeting_data':
+            # meeting_data.json alone misses meetings still in the journal
+            live[name] = load_meetings()
+            continue
+        try:
+            data = load_json_cached(get_data_path() / f"{name}.json")
+        except Exception as e:
+            print(f"Error loading {name}: {e}")
+            data = None
+        if data is not None:
+            live[name] = data
+    return live
+
+def get_archive_data():
+    """Current snapshot plus live categories, as {category: items}"""
+    data = dict(get_snapshot_holder().current().all_data)
+    data.update(load_live_data())
+    return data
 
 def get_pending_requests_file():
     """Get path to pending requests JSON file"""
@@ -58,54 +110,138 @@ def get_meetings_file():
     data_path = project_root / "backend" / "data"
     return data_path / "meeting_data.json"
 
+_meetings_store = None
+_meetings_store_lock = threading.Lock()
+
+def get_meetings_store():
+    """Shared meetings store for this process (journal + per-meeting transcript files)"""
+    global _meetings_store
+    if _meetings_store is None:
+        # Request threads race here on the first requests; all of them must share one store
+        with _meetings_store_lock:
+            if _meetings_store is None:
+                # Inline transcripts left in meeting_data.json are served as they are; moving them to
+                # transcripts/ is a one-off: python -m app.meetings_store migrate
+                _meetings_store = MeetingsStore(get_meetings_file().parent)
+    return _meetings_store
+
 def load_meetings():
-    """Load meetings from JSON file"""
-    file_path = get_meetings_file()
-    if file_path.exists():
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading meetings: {e}")
-            return []
-    return []
+    """Load meetings (compacted file + journal), with transcripts inlined"""
+    try:
+        return get_meetings_store().load(include_transcripts=True)
+    except Exception as e:
+        print(f"Error loading meetings: {e}")
+        return []
 
 def save_meetings(meetings):
-    """Save meetings to JSON file"""
+    """Atomically replace all meetings under the meetings lock"""
     try:
-        file_path = get_meetings_file()
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(meetings, f, indent=2, ensure_ascii=False)
+        get_meetings_store().replace_all(meetings)
     except Exception as e:
         print(f"Error saving meetings: {e}")
 
-# Sample data for stats
-STATS = {
-    'totalUsers': 1245,
-    'activeUsers': 342,
-    'totalMessages': 5829,
-    'avgResponseTime': 145
-}
+_aggregates = None
+
+def get_aggregates():
+    """Shared dashboard aggregates for this process"""
+    global _aggregates
+    if _aggregates is None:
+        _aggregates = AggregatesService(get_data_path(), get_snapshot_holder(), get_meetings_store())
+    return _aggregates
+
+_transcript_index = None
+_transcript_index_lock = threading.Lock()
+
+def get_transcript_index():
+    """Shared segment-level transcript index for this process"""
+    global _transcript_index
+    if _transcript_index is None:
+        # Two indexes built by racing requests would each hold every transcript's postings
+        with _transcript_index_lock:
+            if _transcript_index is None:
+                _transcript_index = TranscriptIndex(get_meetings_store())
+    return _transcript_index
 
 @main_bp.route('/stats', methods=['GET'])
 def get_stats():
-    """Get dashboard statistics"""
-    return jsonify(STATS)
+    """Get dashboard statistics (category counts, meetings per month and committee, request statuses, chat usage, request metrics)"""
+    try:
+        stats = get_aggregates().compute()
+        # Live request metrics of the worker answering (latency per endpoint, error rates, per-stage timings)
+        stats['requests'] = REGISTRY.summary()
+        stats['avgResponseTime'] = stats['requests']['avgResponseTime']
+        return jsonify(stats)
+    except Exception as e:
+        print(f"Error computing stats: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@main_bp.route('/timeline', methods=['GET'])
+def get_timeline():
+    """One page of policy timeline events, newest first (?q=&status=in-progress|completed|failed&offset=&limit=)"""
+    status = request.args.get('status') or None
+    if status is not None and status not in TIMELINE_STATUSES:
+        return jsonify({'error': f"status must be one of {', '.join(TIMELINE_STATUSES)}"}), 400
+    try:
+        offset = max(int(request.args.get('offset', 0)), 0)
+        limit = min(max(int(request.args.get('limit', 10)), 1), 100)
+    except ValueError:
+        return jsonify({'error': 'offset and limit must be integers'}), 400
+    try:
+        total, items = timeline_page(get_aggregates().timeline(), request.args.get('q', ''), status, offset, limit)
+        return jsonify({'items': items, 'total': total, 'offset': offset, 'limit': limit})
+    except Exception as e:
+        print(f"Error building timeline: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@main_bp.route('/admin/profiles', methods=['GET'])
+def list_profiles():
+    """List the most recent request profiles (enable with X-Profile: 1 or ?profile=1; both need X-Admin-Token)"""
+    if not profiling.admin_allowed():
+        return jsonify({'error': 'Forbidden'}), 403
+    return jsonify(profiling.STORE.list())
+
+@main_bp.route('/admin/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """Return one profile: span timings and cProfile output (?format=text for the cProfile report only)"""
+    if not profiling.admin_allowed():
+        return jsonify({'error': 'Forbidden'}), 403
+    profile = profiling.STORE.get(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    if request.args.get('format') == 'text':
+        return profile['stats'] or '', 200, {'Content-Type': 'text/plain; charset=utf-8'}
+    return jsonify(profile)
 
 @main_bp.route('/data', methods=['GET'])
 def get_all_data():
     """Get all data from the data folder"""
     try:
-        chatbot = get_chatbot()
         # Return all loaded data organized by category
         data = {}
-        for category, items in chatbot.all_data.items():
+        for category, items in get_archive_data().items():
             if isinstance(items, list):
                 data[category] = items
         return jsonify(data)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Concurrent identical questions (same normalized text, same archive snapshot) share one answer
+CHAT_FLIGHTS = SingleFlight()
+
+def _answer(message):
+    """Run the chatbot for one question on its own event loop, recording its stage timings"""
+    chatbot = get_chatbot()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(chatbot.get_response(message))
+    finally:
+        loop.close()
+        # Stages that completed (search, context, backboard, save)
+        for stage, seconds in chatbot.last_timings.items():
+            REGISTRY.observe_stage('/api/chat', stage, seconds)
+        profiling.add_spans(chatbot.last_timings, prefix='chat.')
+
 @chat_bp.route('/chat', methods=['POST'])
 def chat():
     """Handle chat messages with local JSON search and AI fallback"""
@@ -116,18 +252,17 @@ def chat():
         if not message:
             return jsonify({'error': 'No message provided'}), 400
         
-        chatbot = get_chatbot()
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            response_data = loop.run_until_complete(chatbot.get_response(message))
-        finally:
-            loop.close()
+        # Only the first of several identical in-flight questions searches, asks the AI and saves the answer
+        key = (normalize_query(message), get_snapshot_holder().current().version)
+        response_data, shared = CHAT_FLIGHTS.do(key, lambda: _answer(message))
+        if shared:
+            REGISTRY.counter("chat_coalesced_total").inc()
         
         return jsonify({
             'response': response_data.get('response', ''),
             'source': response_data.get('source', 'ai'),
-            'events': response_data.get('events', [])
+            'events': response_data.get('events', []),
+            'prompt_tokens': response_data.get('prompt_tokens')
         })
         
     except Exception as e:
@@ -139,6 +274,94 @@ def chat():
             'traceback': tb
         }), 500
 
+def _run_batch(chatbot, questions, concurrency, on_result=None):
+    """Answer a batch on its own event loop; stage timings go to the metrics like /api/chat's"""
+    loop = asyncio.new_event_loop()
+    # Clients that wrap blocking calls in asyncio.to_thread need a thread per concurrent request
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    try:
+        return loop.run_until_complete(chatbot.get_responses(questions, concurrency=concurrency, on_result=on_result))
+    finally:
+        # A deadline cannot stop a call already running in a thread: close() lets the executor
+        # go without joining it, so the response is not held until a hung call returns (the
+        # client's own HTTP timeout ends those threads)
+        loop.close()
+        for stage, seconds in chatbot.last_timings.items():
+            REGISTRY.observe_stage('/api/chat/batch', stage, seconds)
+
+@chat_bp.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    """
+    Answer many questions in one request: {"questions": [...], "concurrency": n, "stream": bool}
+    The archive is searched once for the whole batch and the AI requests run concurrently
+    (at most CHAT_BATCH_CONCURRENCY at a time, default 8; a lower "concurrency" is honoured).
+    Returns {"results": [...in question order], "count", "errors"}, or with "stream": true,
+    one JSON line per answer as it completes ({"index", ...}) followed by {"done": true, "count", "errors"}.
+    """
+    try:
+        data = request.get_json() or {}
+        questions = data.get('questions')
+        if not isinstance(questions, list) or not questions:
+            return jsonify({'error': 'No questions provided'}), 400
+        questions = [q.strip() if isinstance(q, str) else '' for q in questions]
+        if not all(questions):
+            return jsonify({'error': 'Every question must be a non-empty string'}), 400
+        max_questions = int(os.getenv('CHAT_BATCH_MAX', '500'))
+        if len(questions) > max_questions:
+            return jsonify({'error': f'At most {max_questions} questions per batch'}), 400
+        max_concurrency = int(os.getenv('CHAT_BATCH_CONCURRENCY', '8'))
+        try:
+            concurrency = max(1, min(int(data.get('concurrency') or max_concurrency), max_concurrency))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'concurrency must be an integer'}), 400
+        
+        chatbot = get_chatbot()
+        
+        if data.get('stream'):
+            results = queue.Queue()
+            
+            def work():
+                try:
+                    _run_batch(chatbot, questions, concurrency, on_result=lambda i, r: results.put({'index': i, **r}))
+                except Exception as e:
+                    print(f"[CHAT BATCH] {e}\n{traceback.format_exc()}", flush=True)
+                    results.put({'error': str(e)})
+                results.put(None)
+            
+            def generate():
+                count = errors = 0
+                while True:
+                    line = results.get()
+                    if line is None:
+                        break
+                    count += 1
+                    errors += 'error' in line
+                    yield json.dumps(line) + '\n'
+                yield json.dumps({'done': True, 'count': count, 'errors': errors}) + '\n'
+            
+            threading.Thread(target=work, daemon=True).start()
+            return Response(generate(), mimetype='application/x-ndjson')
+        
+        try:
+            answers = _run_batch(chatbot, questions, concurrency)
+        finally:
+            profiling.add_spans(chatbot.last_timings, prefix='chat.batch.')
+        
+        return jsonify({
+            'results': answers,
+            'count': len(answers),
+            'errors': sum(1 for a in answers if 'error' in a)
+        })
+        
+    except Exception as e:
+        tb = traceback.format_exc()
+        print(f"[CHAT BATCH 500] {e}\n{tb}", flush=True)
+        return jsonify({
+            'error': 'An error occurred processing your request',
+            'details': str(e),
+            'traceback': tb
+        }), 500
+
 @main_bp.route('/pending-requests', methods=['GET'])
 def get_pending_requests():
     """Get all pending requests"""
@@ -180,32 +403,96 @@ def archive_failed_request():
     """Archive a failed request to ai_responses.json"""
     try:
         data = request.get_json()
-        project_root = Path(__file__).parent.parent.parent
-        data_path = project_root / "backend" / "data"
-        ai_responses_file = data_path / "ai_responses.json"
+        data_path = get_data_path()
         
-        # Load existing responses or create new list
-        if ai_responses_file.exists():
-            with open(ai_responses_file, 'r', encoding='utf-8') as f:
-                ai_responses = json.load(f)
-        else:
-            ai_responses = []
-        
-        # Add the failed request
-        ai_responses.append({
+        # Same lock as the chatbot's writes, so neither overwrites the other's entries
+        extend_json_list(data_path / "ai_responses.json", [{
             'query': data.get('query'),
             'response': data.get('response'),
             'timestamp': data.get('timestamp')
-        })
-        
-        # Save back to file
-        with open(ai_responses_file, 'w', encoding='utf-8') as f:
-            json.dump(ai_responses, f, indent=2, ensure_ascii=False)
+        }], data_path / ".ai_responses.lock")
         
         return jsonify({'success': True, 'message': 'Request archived successfully'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@main_bp.route('/meetings/<meeting_id>/transcript', methods=['GET'])
+def get_meeting_transcript(meeting_id):
+    """Get a meeting's transcript, optionally limited to ?start=&end= (seconds)"""
+    try:
+        start = request.args.get('start', type=float)
+        end = request.args.get('end', type=float)
+        if (request.args.get('start') and start is None) or (request.args.get('end') and end is None):
+            return jsonify({'error': 'start and end must be numbers of seconds'}), 400
+
+        store = get_meetings_store()
+        meeting = store.get(meeting_id)
+        if meeting is None:
+            return jsonify({'error': 'Meeting not found'}), 404
+
+        segments = store.load_transcript_range(meeting, start=start, end=end)
+        return jsonify({
+            'meeting_id': meeting_id,
+            'start': start,
+            'end': end,
+            'total_segments': meeting.get('transcript_segments', len(meeting.get('transcript') or [])),
+            'segments': segments
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+TRANSCRIPT_SEARCH_MAX = 100
+
+@main_bp.route('/transcripts/search', methods=['GET'])
+def search_transcripts():
+    """
+    Find transcript segments matching ?q= (words and "quoted phrases"), optionally of one
+    ?speaker= or ?meeting_id=, paged with ?limit=&offset=. Each hit carries its start/end
+    seconds and an audio_url (#t=start,end) that seeks into /api/recordings/<file>.
+    """
+    try:
+        query = (request.args.get('q') or '').strip()
+        if not query:
+            return jsonify({'error': 'q is required'}), 400
+        limit = request.args.get('limit', type=int)
+        offset = request.args.get('offset', type=int)
+        if (request.args.get('limit') and limit is None) or (request.args.get('offset') and offset is None):
+            return jsonify({'error': 'limit and offset must be integers'}), 400
+        limit = 20 if limit is None else limit
+        offset = offset or 0
+        if limit < 1 or offset < 0:
+            return jsonify({'error': 'limit must be positive and offset not negative'}), 400
+        limit = min(limit, TRANSCRIPT_SEARCH_MAX)
+
+        store = get_meetings_store()
+        total, hits = get_transcript_index().search(
+            query, speaker=request.args.get('speaker'), meeting_id=request.args.get('meeting_id'),
+            limit=limit, offset=offset)
+        clauses = parse_query(query)
+        results = []
+        for hit in hits:
+            meeting = hit['meeting']
+            # Only the hit's line is read from the transcript file
+            text = store.load_segment(meeting, hit['segment']).get('text', '')
+            audio_file = meeting.get('audio_file')
+            results.append({
+                'meeting_id': meeting.get('id'),
+                'meeting': meeting.get('meeting'),
+                'date': meeting.get('date'),
+                'segment': hit['segment'],
+                'speaker': hit['speaker'],
+                'start': hit['start'],
+                'end': hit['end'],
+                'text': text,
+                'highlights': highlight_spans(text, clauses),
+                'score': hit['score'],
+                'audio_file': audio_file,
+                'audio_url': f"{audio_file}#t={hit['start']:.2f},{hit['end']:.2f}" if audio_file else None,
+            })
+        return jsonify({'query': query, 'total': total, 'limit': limit, 'offset': offset, 'results': results})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @main_bp.route('/process-audio', methods=['POST'])
 def process_audio():
     """Process audio file with speaker diarization and transcription"""
@@ -225,10 +512,10 @@ def process_audio():
             audio_file.save(tmp_file.name)
             temp_audio_path = tmp_file.name
         
+        stages = StageTimer('/api/process-audio')
         try:
             # Import here to avoid loading heavy dependencies on startup
             from pyannote.audio import Pipeline
-            import whisper
             from pydub import AudioSegment
             from pydub.utils import which
             import torch
@@ -288,6 +575,23 @@ def process_audio():
             wav_path = temp_audio_path.rsplit('.', 1)[0] + '.wav'
             audio.export(wav_path, format='wav')
             print(f"Converted to WAV: {wav_path}", flush=True)
+            stages.mark('decode')
+            
+            # Find the speech once; both models then process only the speech (see app/vad.py)
+            from app.vad import detect_speech, whole_recording
+            try:
+                speech = detect_speech(wav_path, temp_audio_path.rsplit('.', 1)[0] + '.speech.wav')
+            except Exception as e:
+                # Skipping silence is an optimization: without it the models get the whole recording
+                print(f"Voice activity detection failed, using the whole recording: {e}", flush=True)
+                speech = whole_recording(wav_path, len(audio) / 1000.0, 'error', error=str(e))
+            model_audio_path = speech.path
+            print(f"Voice activity: {speech.report['speechSeconds']}s of speech in {speech.report['totalSeconds']}s, "
+                  f"skipping {speech.report['skippedFraction']:.0%}", flush=True)
+            REGISTRY.counter("audio_seconds_total").inc(speech.report['totalSeconds'])
+            REGISTRY.counter("audio_skipped_seconds_total").inc(
+                speech.report['totalSeconds'] * speech.report['skippedFraction'])
+            stages.mark('vad')
             
             # Initialize pyannote pipeline for speaker diarization
             # Note: You'll need to set HUGGINGFACE_TOKEN environment variable
@@ -338,7 +642,7 @@ def process_audio():
                 diarization_result = None
                 try:
                     diarization_result = pipeline(
-                        {"uri": "audio", "audio": wav_path},
+                        {"uri": "audio", "audio": model_audio_path},
                         min_speakers=2,
                         max_speakers=2
                     )
@@ -347,14 +651,14 @@ def process_audio():
                     print(f"Method 1 failed: {e1}", flush=True)
                     # Method 2: Try with file path and parameters
                     try:
-                        diarization_result = pipeline(wav_path, min_speakers=2, max_speakers=2)
+                        diarization_result = pipeline(model_audio_path, min_speakers=2, max_speakers=2)
                         print("✓ Diarization with min_speakers=2, max_speakers=2 (path format)", flush=True)
                     except Exception as e2:
                         print(f"Method 2 failed: {e2}", flush=True)
                         # Method 3: Try with flexible speaker count
                         try:
                             diarization_result = pipeline(
-                                {"uri": "audio", "audio": wav_path},
+                                {"uri": "audio", "audio": model_audio_path},
                                 min_speakers=1,
                                 max_speakers=10
                             )
@@ -362,7 +666,7 @@ def process_audio():
                         except Exception as e3:
                             print(f"Method 3 failed: {e3}", flush=True)
                             # Method 4: Simple call
-                            diarization_result = pipeline(wav_path)
+                            diarization_result = pipeline(model_audio_path)
                             print("✓ Diarization with simple call (no parameters)", flush=True)
                 
                 if diarization_result is None:
@@ -406,39 +710,27 @@ def process_audio():
                     'error': f'Error during speaker diarization: {error_details}'
                 }), 500
             
-            # Initialize Whisper for transcription
-            print("Loading Whisper model...", flush=True)
+            stages.mark('diarize')
+            
+            # Speech-to-text engine (openai-whisper by default, see app/transcription.py); loaded once per process
             try:
-                # Handle SSL certificate issues for model download
-                # Temporarily disable SSL verification for model downloads
-                # Save original SSL context
-                original_ssl_context = ssl._create_default_https_context
-                
-                # Create unverified SSL context
-                ssl._create_default_https_context = ssl._create_unverified_context
-                
-                try:
-                    model = whisper.load_model("base")
-                    print("Whisper model loaded", flush=True)
-                finally:
-                    # Restore original SSL context
-                    ssl._create_default_https_context = original_ssl_context
+                engine = get_transcription_engine()
+                print(f"Loading transcription model ({engine.label})...", flush=True)
+                engine.load()
+                print("Transcription model loaded", flush=True)
             except Exception as e:
                 error_details = str(e)
                 print(f"Error loading Whisper model: {error_details}", flush=True)
-                # Restore SSL context even on error
-                try:
-                    ssl._create_default_https_context = original_ssl_context
-                except:
-                    pass
                 return jsonify({
                     'error': f'Error loading Whisper model: {error_details}'
                 }), 500
+            stages.mark('load_model')
             
             print("Transcribing audio...", flush=True)
             try:
-                result = model.transcribe(wav_path)
+                result = engine.transcribe(model_audio_path)
                 print("Transcription completed", flush=True)
+                stages.mark('transcribe')
             except Exception as e:
                 error_details = str(e)
                 print(f"Error during transcription: {error_details}", flush=True)
@@ -446,9 +738,8 @@ def process_audio():
                     'error': f'Error during transcription: {error_details}'
                 }), 500
             
-            # Combine diarization and transcription
-            transcript_segments = []
-            whisper_segments = result.get('segments', [])
+            # Combine diarization and transcription (on the original recording's timeline)
+            whisper_segments = speech.remap(result.get('segments', []))
             
             # Create a list of diarization segments
             # Handle different pyannote.audio API versions
@@ -489,50 +780,14 @@ def process_audio():
                     # Last resort: create empty segments and use transcription only
                     diarization_segments = []
             
+            diarization_segments = speech.remap(diarization_segments)
+            
             # Sort both by start time
             diarization_segments.sort(key=lambda x: x['start'])
             
-            # Map transcription segments to diarization segments
-            for whisper_seg in whisper_segments:
-                seg_start = whisper_seg['start']
-                seg_end = whisper_seg['end']
-                seg_text = whisper_seg['text'].strip()
-                
-                if not seg_text:
-                    continue
-                
-                # Find the diarization segment that best matches this transcription segment
-                best_match = None
-                best_overlap = 0
-                
-                for diar_seg in diarization_segments:
-                    # Calculate overlap
-                    overlap_start = max(seg_start, diar_seg['start'])
-                    overlap_end = min(seg_end, diar_seg['end'])
-                    overlap = max(0, overlap_end - overlap_start)
-                    
-                    if overlap > best_overlap:
-                        best_overlap = overlap
-                        best_match = diar_seg
-                
-                # If we found a match, add it to transcript
-                if best_match and best_overlap > 0:
-                    transcript_segments.append({
-                        'speaker': best_match['speaker'],
-                        'start': seg_start,
-                        'end': seg_end,
-                        'text': seg_text
-                    })
-                elif whisper_segments:  # Fallback: use first speaker if no match
-                    transcript_segments.append({
-                        'speaker': diarization_segments[0]['speaker'] if diarization_segments else 'SPEAKER_00',
-                        'start': seg_start,
-                        'end': seg_end,
-                        'text': seg_text
-                    })
-            
-            # Sort transcript segments by start time
-            transcript_segments.sort(key=lambda x: x['start'])
+            # Label each transcription segment with the speaker whose turn overlaps it most
+            transcript_segments = align_segments(whisper_segments, diarization_segments)
+            stages.mark('align')
             
             # Save audio file to data directory
             from datetime import datetime
@@ -554,6 +809,7 @@ def process_audio():
             
             # Create meeting object
             new_meeting = {
+                'id': MeetingsStore.new_meeting_id(),
                 'date': datetime.now().strftime('%B %d, %Y %I:%M %p'),
                 'meeting': meeting_name,
                 'meeting_url': '',  # No URL for recorded meetings
@@ -562,14 +818,14 @@ def process_audio():
                 'audio_file': f'/api/recordings/{audio_filename}'  # API endpoint to serve the audio
             }
             
-            # Save to meetings JSON
-            meetings = load_meetings()
-            meetings.insert(0, new_meeting)  # Add to beginning
-            save_meetings(meetings)
+            # Append to the meetings journal (transcript goes to its own file)
+            get_meetings_store().append(new_meeting)
+            stages.mark('save')
             
             return jsonify({
                 'success': True,
                 'meeting': new_meeting,
+                'vad': speech.report,
                 'message': 'Audio processed successfully'
             })
             
@@ -583,6 +839,7 @@ def process_audio():
                 'traceback': tb if os.getenv('FLASK_DEBUG') else None
             }), 500
         finally:
+            profiling.add_spans(stages.timings, prefix='audio.')
             # Clean up temporary files (but keep the saved recording)
             try:
                 if os.path.exists(temp_audio_path):
@@ -592,6 +849,9 @@ def process_audio():
                 wav_path = temp_audio_path.rsplit('.', 1)[0] + '.wav'
                 if os.path.exists(wav_path) and 'recordings' not in str(wav_path):
                     os.unlink(wav_path)
+                speech_path = temp_audio_path.rsplit('.', 1)[0] + '.speech.wav'
+                if os.path.exists(speech_path):
+                    os.unlink(speech_path)
             except Exception as cleanup_error:
                 print(f"Error cleaning up temp files: {cleanup_error}", flush=True)
                 
@@ -0,0 +1,168 @@
+"""
+Helpers for crash-safe, multi-process access to the files in backend/data.
+
+Several workers (and the scrapers) may touch the same JSON files, so writes go
+through a temp file + os.replace (readers see either the old or the new file,
+never half of one) and read-modify-write cycles hold an inter-process lock.
+"""
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(lock_path, shared=False, blocking=True):
+    """
+    Hold an inter-process lock on lock_path for the duration of the block.
+
+    Args:
+        lock_path: Path of the lock file (created if missing)
+        shared: Take a shared (reader) lock instead of an exclusive one.
+                Windows has no shared locks, so there it is always exclusive.
+        blocking: If False, raise BlockingIOError instead of waiting for the lock
+    """
+    lock_path = Path(lock_path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a+') as fh:
+        if fcntl:
+            flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+            fcntl.flock(fh.fileno(), flags if blocking else flags | fcntl.LOCK_NB)
+        else:
+            fh.seek(0)
+            try:
+                msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+            except OSError as e:
+                raise BlockingIOError(str(e)) from e
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write_bytes(path, data):
+    """Write data to path so that readers never observe a partially written file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path, data, indent=2):
+    """Atomically replace path with data serialized as JSON."""
+    text = json.dumps(data, indent=indent, ensure_ascii=False)
+    atomic_write_bytes(path, text.encode('utf-8'))
+
+
+def extend_json_list(path, records, lock_path):
+    """
+    Append records to the JSON array in path, holding lock_path across the read and the
+    atomic rewrite so concurrent writers (threads or worker processes) never drop entries.
+
+    Args:
+        path: JSON file holding a list (treated as empty if missing)
+        records: Records to append
+        lock_path: Lock file shared by every writer of path
+
+    Returns:
+        The list as written
+    """
+    path = Path(path)
+    with file_lock(lock_path):
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                items = json.load(f)
+        else:
+            items = []
+        items.extend(records)
+        atomic_write_json(path, items)
+    return items
+
+
+def append_jsonl(path, record):
+    """
+    Append one record as a JSON line and fsync it before returning.
+    If the file ends in a torn line (crash mid-append), the record starts on a new line
+    so only the torn line is lost, not the record glued onto it.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+    with open(path, 'a+b') as f:
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                line = b"\n" + line
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_jsonl(path):
+    """
+    Read all records from a JSON Lines file.
+    A torn last line (crash mid-append) is skipped instead of failing the whole read.
+    """
+    path = Path(path)
+    if not path.exists():
+        return []
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"Skipping corrupt line in {path.name}")
+    return records
+
+
+_json_cache = {}
+_json_cache_lock = threading.Lock()
+
+
+def load_json_cached(path, default=None):
+    """
+    Parse a JSON file, reusing the previous parse while its mtime and size are unchanged.
+    Callers must treat the result as read-only since it is shared.
+    """
+    path = Path(path)
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return default
+    key = (st.st_mtime_ns, st.st_size)
+    with _json_cache_lock:
+        cached = _json_cache.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    with _json_cache_lock:
+        _json_cache[path] = (key, data)
+    return data
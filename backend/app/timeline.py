@@ -0,0 +1,110 @@
+"""
+Policy timeline items (/api/timeline), built on the server and served a page at a time.
+
+The timeline page used to download /api/data, /api/events and /api/pending-requests
+in full and turn every record into an event in the browser. The same events are
+built here instead, once per change of their sources (AggregatesService.timeline),
+and the page asks for ten at a time with its search and status filter applied.
+
+    council meetings            'debate', completed
+    passed / failed requests    'decision' completed / 'rejection' failed
+    other pending requests      'proposal', in progress
+    archive records             'proposal', completed (the live categories are covered above)
+
+aggregates.timeline_counts() counts the same rules for /api/stats, so the summary
+cards agree with what the timeline lists.
+"""
+import json
+
+from app.aggregates import parse_date
+from chatbot_module.snapshot import LIVE_CATEGORIES
+
+STATUSES = ("in-progress", "completed", "failed")
+
+
+def _event(event_id, when, title, description, type_, status, details, category, **extra):
+    return {
+        'id': event_id,
+        'date': f"{when:%B} {when.day}, {when.year}" if when else "",
+        'title': title,
+        'description': description,
+        'type': type_,
+        'status': status,
+        'details': details,
+        'category': category,
+        **extra,
+        # Not sent: used for ordering and search
+        '_when': when,
+    }
+
+
+def timeline_items(archive, meetings, pending):
+    """
+    All timeline events, newest first (undated archive records last, in archive order).
+
+    Args:
+        archive: {category: items} of the snapshot (live categories are ignored)
+        meetings: Meeting records
+        pending: Pending requests
+    """
+    events = []
+    for idx, meeting in enumerate(meetings):
+        if not isinstance(meeting, dict):
+            meeting = {'meeting': str(meeting)}
+        events.append(_event(
+            meeting.get('meeting_url') or meeting.get('id') or f"meeting_{idx}",
+            parse_date(meeting.get('date')), meeting.get('meeting') or "",
+            f"City Council Meeting - {meeting.get('meeting') or ''}", 'debate', 'completed',
+            [f"{name}: Available" for name in meeting.get('documents') or {}], 'Council Meeting'))
+
+    for idx, req in enumerate(pending):
+        if not isinstance(req, dict):
+            continue
+        status = req.get('status')
+        if status == 'passed':
+            title, type_, state = f"✓ Approved: {req.get('title', '')}", 'decision', 'completed'
+        elif status == 'failed':
+            title, type_, state = f"✗ Rejected: {req.get('title', '')}", 'rejection', 'failed'
+        else:
+            title, type_, state = req.get('title', ''), 'proposal', 'in-progress'
+        events.append(_event(
+            f"pending_{req.get('id') or idx}", parse_date(req.get('submittedDate')), title,
+            req.get('description') or "", type_, state, req.get('details') or [], req.get('type'),
+            reason=req.get('failureReason'), isPendingRequest=True))
+
+    for category, items in archive.items():
+        if category in LIVE_CATEGORIES or not isinstance(items, list):
+            continue
+        label = category.replace('_', ' ')
+        for idx, item in enumerate(items):
+            if not isinstance(item, dict):
+                item = {'text': str(item)}
+            description = item.get('text') or item.get('description') or json.dumps(item, ensure_ascii=False)[:200]
+            details = [f"Category: {label}"]
+            if item.get('pdfs'):
+                details.append(f"Documents: {len(item['pdfs'])} available")
+            events.append(_event(
+                f"data_{category}_{idx}",
+                parse_date(item.get('timestamp') or item.get('date') or item.get('submittedDate')),
+                item.get('heading') or item.get('title') or item.get('meeting') or f"{label} Entry",
+                description, 'proposal', 'completed', details, category))
+
+    # Stable sort: undated events keep their order after the dated ones
+    events.sort(key=lambda e: (e['_when'] is None, -(e['_when'].timestamp() if e['_when'] else 0)))
+    for event in events:
+        event['_search'] = " ".join([event['title'], event['description'], *event['details']]).lower()
+    return events
+
+
+def timeline_page(events, query="", status=None, offset=0, limit=10):
+    """
+    One page of the events matching query (substring of title, description or details) and status.
+
+    Returns:
+        (total matching, [events without the private keys])
+    """
+    query = query.strip().lower()
+    matching = [e for e in events
+                if (not status or e['status'] == status) and (not query or query in e['_search'])]
+    page = [{k: v for k, v in e.items() if not k.startswith('_')} for e in matching[offset:offset + limit]]
+    return len(matching), page
@@ -0,0 +1,250 @@
+"""
+Segment-level search over meeting transcripts (/api/transcripts/search).
+
+Chat search sees a meeting as one item, so it can only say that a meeting matches.
+TranscriptIndex indexes every transcript segment on its own: postings map each
+term (chatbot_module.analyzer terms, so "permits" finds "permit") to the segments
+containing it and the word positions inside them, and every segment keeps its
+meeting, speaker and start/end. A hit is therefore a segment with the second to
+seek to in the meeting's recording, and quoted phrases ("site plan") are matched
+on positions instead of scanning text.
+
+Postings are compact arrays (segment numbers, offsets, positions) rather than
+per-segment dicts, so hundreds of hours of transcripts stay a few bytes per word,
+and queries intersect and score them with numpy: a phrase is the intersection of
+its terms' (segment, position) keys, never a scan of the segments' text.
+Transcripts are write-once, so when meetings are added only the new ones are
+indexed; the index is rebuilt from scratch only if a meeting was removed or
+replaced.
+"""
+import math
+import re
+import threading
+from array import array
+from functools import lru_cache
+
+import numpy as np
+
+from chatbot_module.analyzer import STOPWORDS, stem, tokenize
+
+_PHRASE_RE = re.compile(r'"([^"]+)"')
+_EMPTY = np.zeros(0, dtype=np.int64)
+# Bound on the words of one segment, for (segment, position) keys
+_MAX_WORDS = 1 << 20
+
+
+@lru_cache(maxsize=200000)
+def _term(word):
+    """Index term of a word, or None for words that are not indexed (stopwords, single letters)."""
+    if len(word) > 1 and word not in STOPWORDS:
+        return stem(word)
+    return None
+
+
+def parse_query(query):
+    """
+    Query -> list of clauses, each [(term, offset)]: a quoted phrase is one clause whose
+    terms must occur at those relative word positions (a stopword in the phrase stands for
+    any one word), any other word is a clause of its own.
+    """
+    clauses = []
+    for n, part in enumerate(_PHRASE_RE.split(query)):
+        words = tokenize(part)
+        if n % 2:
+            phrase = [(_term(w), i) for i, w in enumerate(words)]
+            phrase = [(t, i) for t, i in phrase if t]
+            if phrase:
+                base = phrase[0][1]
+                clauses.append([(t, i - base) for t, i in phrase])
+        else:
+            clauses.extend([(t, 0)] for t in dict.fromkeys(filter(None, map(_term, words))))
+    return clauses
+
+
+class _Postings:
+    """Segments containing a term and the term's word positions in each (positions[offsets[i]:offsets[i + 1]])."""
+
+    __slots__ = ("segments", "offsets", "positions")
+
+    def __init__(self):
+        self.segments = array("I")
+        self.offsets = array("I")
+        self.positions = array("I")
+
+
+class TranscriptIndex:
+    """Positional inverted index over the transcript segments of every stored meeting."""
+
+    def __init__(self, meetings_store):
+        self.meetings_store = meetings_store
+        self._lock = threading.Lock()
+        self._version = None
+        self._reset()
+
+    def _reset(self):
+        self.postings = {}
+        # Per meeting: its record and the number of its first segment
+        self.meetings = []
+        self._indexed = {}
+        self._by_id = {}
+        # Per segment: meeting number, segment number within the meeting's transcript, start, end, speaker number
+        self.seg_meeting = array("I")
+        self.seg_number = array("I")
+        self.seg_start = array("d")
+        self.seg_end = array("d")
+        self.seg_speaker = array("I")
+        self.speakers = []
+        self._speaker_ids = {}
+        # numpy copies of seg_meeting and seg_speaker for the search filters, made once per index version
+        self._filter_columns = None
+
+    @staticmethod
+    def _meeting_key(meeting):
+        return (meeting.get('id'), meeting.get('transcript_file'))
+
+    def refresh(self):
+        """Index meetings added since the last call (rebuilding if any indexed meeting changed)."""
+        version = self.meetings_store.version()
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            meetings = [m for m in self.meetings_store.load()
+                        if isinstance(m, dict) and m.get('id') and (m.get('transcript_file') or m.get('transcript'))]
+            keys = {self._meeting_key(m) for m in meetings}
+            if any(key not in keys for key in self._indexed):
+                self._reset()
+            for meeting in reversed(meetings):
+                number = self._indexed.get(self._meeting_key(meeting))
+                if number is None:
+                    self._add_meeting(meeting)
+                else:
+                    # Same transcript, possibly updated fields (e.g. a rescraped title)
+                    self.meetings[number] = (meeting, self.meetings[number][1])
+            self._filter_columns = None
+            self._version = version
+
+    def _add_meeting(self, meeting):
+        number = len(self.meetings)
+        self.meetings.append((meeting, len(self.seg_start)))
+        self._indexed[self._meeting_key(meeting)] = number
+        self._by_id[meeting['id']] = number
+        # Read once for indexing; load_transcript would also keep every transcript in the store's cache
+        for n, seg in enumerate(self.meetings_store.read_transcript(meeting)):
+            segment = len(self.seg_start)
+            speaker = seg.get('speaker') or ""
+            if speaker not in self._speaker_ids:
+                self._speaker_ids[speaker] = len(self.speakers)
+                self.speakers.append(speaker)
+            self.seg_meeting.append(number)
+            self.seg_number.append(n)
+            self.seg_start.append(float(seg.get('start', 0)))
+            self.seg_end.append(float(seg.get('end', 0)))
+            self.seg_speaker.append(self._speaker_ids[speaker])
+            positions = {}
+            for pos, word in enumerate(tokenize(seg.get('text', ''))):
+                term = _term(word)
+                if term:
+                    found = positions.get(term)
+                    if found is None:
+                        positions[term] = [pos]
+                    else:
+                        found.append(pos)
+            for term, found in positions.items():
+                postings = self.postings.get(term)
+                if postings is None:
+                    postings = self.postings[term] = _Postings()
+                postings.segments.append(segment)
+                postings.offsets.append(len(postings.positions))
+                postings.positions.extend(found)
+
+    @property
+    def segment_count(self):
+        return len(self.seg_start)
+
+    def _columns(self):
+        """(seg_meeting, seg_speaker) as numpy arrays, copied on the first filtered search after a refresh."""
+        if self._filter_columns is None:
+            self._filter_columns = (np.array(self.seg_meeting, dtype=np.int64),
+                                    np.array(self.seg_speaker, dtype=np.int64))
+        return self._filter_columns
+
+    def _clause_matches(self, clause):
+        """(segments, occurrences) of a clause (a word, or a phrase matched on positions), as sorted numpy arrays."""
+        lists = [self.postings.get(term) for term, _ in clause]
+        if not all(lists):
+            return _EMPTY, _EMPTY
+        if len(clause) == 1:
+            postings = lists[0]
+            offsets = np.array(postings.offsets, dtype=np.int64)
+            return np.array(postings.segments, dtype=np.int64), np.diff(offsets, append=len(postings.positions))
+        # Phrase: key every occurrence as (segment, position - the term's offset in the phrase); the
+        # phrase occurs wherever all its terms share a key
+        keys = None
+        for postings, (_, offset) in zip(lists, clause):
+            offsets = np.array(postings.offsets, dtype=np.int64)
+            counts = np.diff(offsets, append=len(postings.positions))
+            term_keys = (np.repeat(np.array(postings.segments, dtype=np.int64), counts) * _MAX_WORDS
+                         + np.array(postings.positions, dtype=np.int64) - offset)
+            keys = term_keys if keys is None else np.intersect1d(keys, term_keys, assume_unique=True)
+        return np.unique(keys // _MAX_WORDS, return_counts=True)
+
+    def search(self, query, speaker=None, meeting_id=None, limit=20, offset=0):
+        """
+        Segments matching every word and quoted phrase of query, best first.
+
+        Args:
+            query: Words and "quoted phrases"
+            speaker: Only segments of this speaker label
+            meeting_id: Only segments of this meeting
+            limit, offset: Page of the ranked hits
+
+        Returns:
+            (total hits, [{'meeting', 'segment', 'speaker', 'start', 'end', 'score'}]) where meeting
+            is the meeting record and segment the segment's number in its transcript
+        """
+        self.refresh()
+        with self._lock:
+            clauses = parse_query(query)
+            if not clauses:
+                return 0, []
+            total = self.segment_count
+            # Rarest clause first, so each intersection only shrinks the candidates
+            matches = sorted((self._clause_matches(c) for c in clauses), key=lambda m: len(m[0]))
+            segments, counts = matches[0]
+            if not len(segments):
+                return 0, []
+            scores = math.log(1 + total / len(segments)) * (1 + np.log(counts))
+            for other, other_counts in matches[1:]:
+                segments, keep, found = np.intersect1d(segments, other, assume_unique=True, return_indices=True)
+                idf = math.log(1 + total / len(other))
+                scores = scores[keep] + idf * (1 + np.log(other_counts[found]))
+
+            if speaker is not None or meeting_id is not None:
+                # Gather the columns at the matched segments only
+                seg_meeting, seg_speaker = self._columns()
+                keep = np.ones(len(segments), dtype=bool)
+                if speaker is not None:
+                    keep &= seg_speaker[segments] == self._speaker_ids.get(speaker, -1)
+                if meeting_id is not None:
+                    keep &= seg_meeting[segments] == self._by_id.get(meeting_id, -1)
+                segments, scores = segments[keep], scores[keep]
+
+            # Best score first; ties in index order (oldest meeting first, then time)
+            ranked = np.lexsort((segments, -scores))[offset:offset + limit]
+            return len(segments), [{
+                'meeting': self.meetings[self.seg_meeting[s]][0],
+                'segment': self.seg_number[s],
+                'speaker': self.speakers[self.seg_speaker[s]] or None,
+                'start': self.seg_start[s],
+                'end': self.seg_end[s],
+                'score': round(float(score), 4),
+            } for s, score in ((int(segments[i]), scores[i]) for i in ranked)]
+
+
+def highlight_spans(text, clauses):
+    """[[start, end]] character ranges of the words of text that match a term of the clauses."""
+    terms = {term for clause in clauses for term, _ in clause}
+    return [[m.start(), m.end()] for m in re.finditer(r"[^\W_]+", text)
+            if _term(m.group().lower()) in terms]
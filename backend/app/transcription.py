@@ -0,0 +1,192 @@
+"""
+Speech-to-text engines for recorded meetings.
+
+Every engine has transcribe(audio) -> {'text', 'language', 'segments': [{'start', 'end', 'text'}]},
+the shape of openai-whisper's result that process_audio and align_segments use. audio
+is a file path or 16 kHz mono float32 samples (numpy), as both libraries accept.
+
+    whisper          openai-whisper (PyTorch, full precision) - the default
+    faster-whisper   CTranslate2 with int8 weights on the CPU: the same Whisper models,
+                     several times faster and smaller in memory on CPU-only servers;
+                     with TRANSCRIBE_BATCH_SIZE > 1 the voiced chunks of a recording are
+                     decoded in batches (faster-whisper's BatchedInferencePipeline)
+
+Models are loaded on first use and kept for the life of the process (one per
+configuration), instead of being reloaded for every upload. Uploads and live
+sessions share that model, so an engine whose model cannot decode from several
+threads at once (openai-whisper) runs one transcribe() at a time; CTranslate2
+models are thread safe and are not serialized.
+
+Configuration (environment):
+    TRANSCRIBE_ENGINE        whisper | faster-whisper (default whisper)
+    WHISPER_MODEL            model size, e.g. tiny, base, small, medium (default base)
+    WHISPER_BEAM_SIZE        beam size (default: the engine's own, 5 for faster-whisper, greedy for whisper)
+    WHISPER_COMPUTE_TYPE     faster-whisper weights: int8, int8_float32, float32 (default int8)
+    TRANSCRIBE_THREADS       CPU threads (default 0: the engine decides)
+    TRANSCRIBE_BATCH_SIZE    faster-whisper segments decoded together (default 8; 1 = sequential)
+"""
+import os
+import ssl
+import threading
+
+ENGINES = {}
+
+
+def engine(name):
+    """Register a TranscriptionEngine subclass under name."""
+    def register(cls):
+        cls.name = name
+        ENGINES[name] = cls
+        return cls
+    return register
+
+
+class TranscriptionEngine:
+    """Loads a model once (load) and transcribes audio with it (transcribe)."""
+
+    name = None
+    # False: the model keeps per-call state, so concurrent transcribe() calls wait for each other
+    thread_safe = False
+
+    def __init__(self, model_size="base", beam_size=None, threads=0, **options):
+        self.model_size = model_size
+        self.beam_size = beam_size
+        self.threads = threads
+        self.options = options
+        self.model = None
+        self._load_lock = threading.Lock()
+        self._transcribe_lock = threading.Lock()
+
+    @property
+    def label(self):
+        return f"{self.name}:{self.model_size}"
+
+    def load(self):
+        """Load the model (once; later calls return the loaded model)."""
+        if self.model is None:
+            with self._load_lock:
+                if self.model is None:
+                    self.model = self._load()
+        return self.model
+
+    def _load(self):
+        raise NotImplementedError
+
+    def transcribe(self, audio):
+        """Transcribe audio with the shared model (one call at a time unless thread_safe)."""
+        if self.thread_safe:
+            return self._transcribe(audio)
+        with self._transcribe_lock:
+            return self._transcribe(audio)
+
+    def _transcribe(self, audio):
+        raise NotImplementedError
+
+
+def _without_ssl_verification(load):
+    # Model downloads fail behind some proxies with certificate errors; load with verification
+    # off, as process_audio has always done, and restore the default context afterwards
+    original_ssl_context = ssl._create_default_https_context
+    ssl._create_default_https_context = ssl._create_unverified_context
+    try:
+        return load()
+    finally:
+        ssl._create_default_https_context = original_ssl_context
+
+
+@engine("whisper")
+class WhisperEngine(TranscriptionEngine):
+    """openai-whisper on PyTorch."""
+
+    def _load(self):
+        import whisper
+        import torch
+
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        return _without_ssl_verification(lambda: whisper.load_model(self.model_size))
+
+    def _transcribe(self, audio):
+        options = {"beam_size": self.beam_size} if self.beam_size else {}
+        return self.load().transcribe(audio, **options)
+
+
+@engine("faster-whisper")
+class FasterWhisperEngine(TranscriptionEngine):
+    """faster-whisper (CTranslate2), int8 on the CPU by default."""
+
+    thread_safe = True
+
+    def __init__(self, model_size="base", beam_size=None, threads=0, compute_type="int8", batch_size=8, **options):
+        super().__init__(model_size, beam_size or 5, threads, **options)
+        self.compute_type = compute_type
+        self.batch_size = batch_size
+        self.pipeline = None
+
+    @property
+    def label(self):
+        return f"{self.name}:{self.model_size}:{self.compute_type}:beam{self.beam_size}:batch{self.batch_size}"
+
+    def _load(self):
+        from faster_whisper import WhisperModel
+
+        model = _without_ssl_verification(lambda: WhisperModel(
+            self.model_size, device="cpu", compute_type=self.compute_type, cpu_threads=self.threads))
+        if self.batch_size > 1:
+            try:
+                from faster_whisper import BatchedInferencePipeline
+                self.pipeline = BatchedInferencePipeline(model=model)
+            except ImportError:
+                print("faster-whisper has no BatchedInferencePipeline (needs >= 1.1); decoding sequentially", flush=True)
+        return model
+
+    def _transcribe(self, audio):
+        model = self.load()
+        if self.pipeline is not None:
+            segments, info = self.pipeline.transcribe(audio, beam_size=self.beam_size, batch_size=self.batch_size)
+        else:
+            segments, info = model.transcribe(audio, beam_size=self.beam_size)
+        # segments is a generator: decoding happens while it is consumed
+        segments = [{"id": i, "start": s.start, "end": s.end, "text": s.text} for i, s in enumerate(segments)]
+        return {
+            "text": "".join(s["text"] for s in segments),
+            "language": info.language,
+            "segments": segments,
+        }
+
+
+def config_from_env():
+    """(engine name, options) from the environment."""
+    name = os.getenv("TRANSCRIBE_ENGINE", "whisper")
+    options = {
+        "model_size": os.getenv("WHISPER_MODEL", "base"),
+        "beam_size": int(os.getenv("WHISPER_BEAM_SIZE", "0")) or None,
+        "threads": int(os.getenv("TRANSCRIBE_THREADS", "0")),
+    }
+    if name == "faster-whisper":
+        options["compute_type"] = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+        options["batch_size"] = int(os.getenv("TRANSCRIBE_BATCH_SIZE", "8"))
+    return name, options
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(name=None, **options):
+    """
+    The shared engine for a configuration (default: from the environment), created on first use.
+
+    Raises:
+        ValueError: Unknown engine name
+    """
+    if name is None:
+        name, env_options = config_from_env()
+        options = {**env_options, **options}
+    if name not in ENGINES:
+        raise ValueError(f"Unknown transcription engine {name!r} (known: {', '.join(ENGINES)})")
+    key = (name, tuple(sorted(options.items())))
+    with _engines_lock:
+        if key not in _engines:
+            _engines[key] = ENGINES[name](**options)
+        return _engines[key]
@@ -0,0 +1,247 @@
+"""
+Voice activity detection before diarization and transcription.
+
+Council recordings have long silences, recesses and hold music. detect_speech finds
+the speech regions once and writes a speech-only copy of the WAV (the regions in
+order, separated by short silences so neither model hears two turns run into each
+other). pyannote and Whisper then process only that copy, and SpeechMap maps their
+timestamps back onto the original recording, which is the file that is saved and
+served.
+
+    energy   frame energy against the recording's own noise floor (numpy only; fast,
+             but music or loud noise counts as speech)
+    silero   Silero VAD, the ONNX model bundled with faster-whisper (tells speech from
+             music and noise; needs faster-whisper installed)
+    off      process the whole recording
+
+Configuration (environment, seconds unless noted):
+    VAD_ENGINE        energy | silero | off (default energy)
+    VAD_MIN_SILENCE   shorter pauses stay in the speech (default 1.0)
+    VAD_MIN_SPEECH    shorter bursts are dropped (default 0.25)
+    VAD_PAD           kept on each side of a region (default 0.2)
+    VAD_MIN_SKIP      below this fraction of skippable audio the original is used (default 0.05)
+"""
+import os
+import wave
+from bisect import bisect_right
+
+import numpy as np
+
+# Silence inserted between regions in the speech-only copy
+GAP_SECONDS = 0.5
+FRAME_SECONDS = 0.03
+# Audio decoded at a time when measuring frame energy
+CHUNK_SECONDS = 60
+
+
+def _to_float(raw, width, channels):
+    """float32 samples in [-1, 1] of little-endian PCM bytes, channels averaged."""
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 3:
+        bytes_ = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        ints = (bytes_[:, 0].astype(np.int32) | (bytes_[:, 1].astype(np.int32) << 8)
+                | (bytes_[:, 2].astype(np.int32) << 16))
+        samples = (np.where(ints >= 1 << 23, ints - (1 << 24), ints) / float(1 << 23)).astype(np.float32)
+    else:
+        dtype = {2: np.int16, 4: np.int32}[width]
+        samples = np.frombuffer(raw, dtype=dtype).astype(np.float32) / float(np.iinfo(dtype).max)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def _frame_db(samples, hop):
+    """Energy in dB of each whole hop-sample frame of samples."""
+    n = len(samples) // hop
+    frames = samples[:n * hop].reshape(n, hop)
+    return 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+
+
+def frame_energies(path, chunk_seconds=CHUNK_SECONDS):
+    """
+    (energy in dB of each FRAME_SECONDS frame, frame length in samples, sample rate, total samples)
+    of a PCM WAV file, read chunk_seconds at a time so a long recording is never held in memory.
+    """
+    with wave.open(str(path), "rb") as f:
+        rate, channels, width = f.getframerate(), f.getnchannels(), f.getsampwidth()
+        total = f.getnframes()
+        hop = max(1, int(rate * FRAME_SECONDS))
+        # Whole frames per chunk, so no frame straddles two chunks
+        chunk = max(1, int(chunk_seconds * rate) // hop) * hop
+        parts = []
+        while True:
+            raw = f.readframes(chunk)
+            if not raw:
+                break
+            parts.append(_frame_db(_to_float(raw, width, channels), hop))
+    db = np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+    return db, hop, rate, total
+
+
+def _smooth(flags, frame, min_silence, min_speech, pad, total):
+    """Per-frame speech flags -> [(start, end)] seconds: pauses bridged, blips dropped, edges padded."""
+    regions = []
+    start = None
+    for i, speech in enumerate(np.append(flags, False)):
+        if speech and start is None:
+            start = i
+        elif not speech and start is not None:
+            regions.append([start * frame, i * frame])
+            start = None
+    merged = []
+    for region in regions:
+        if merged and region[0] - merged[-1][1] < min_silence:
+            merged[-1][1] = region[1]
+        else:
+            merged.append(region)
+    padded = []
+    for start, end in merged:
+        if end - start < min_speech:
+            continue
+        start, end = max(0.0, start - pad), min(total, end + pad)
+        if padded and start <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], end)
+        else:
+            padded.append((start, end))
+    return padded
+
+
+def _energy_speech(db, hop, rate, total, min_silence, min_speech, pad):
+    if len(db) == 0:
+        return []
+    floor, peak = np.percentile(db, 10), np.percentile(db, 99)
+    threshold = max(floor + 12, peak - 40)
+    return _smooth(db > threshold, hop / rate, min_silence, min_speech, pad, total / rate)
+
+
+def energy_regions(samples, rate, min_silence=1.0, min_speech=0.25, pad=0.2):
+    """
+    Speech regions from frame energy: a frame is speech when it is 12 dB above the noise
+    floor (the 10th percentile frame) and within 40 dB of the loudest frames.
+    """
+    hop = max(1, int(rate * FRAME_SECONDS))
+    return _energy_speech(_frame_db(samples, hop), hop, rate, len(samples), min_silence, min_speech, pad)
+
+
+def energy_regions_file(path, min_silence=1.0, min_speech=0.25, pad=0.2):
+    """energy_regions of a WAV file, measured chunk by chunk (frame_energies)."""
+    return _energy_speech(*frame_energies(path), min_silence, min_speech, pad)
+
+
+def silero_regions(path, min_silence=1.0, min_speech=0.25, pad=0.2):
+    """Speech regions from Silero VAD (faster-whisper's bundled model, 16 kHz)."""
+    from faster_whisper.audio import decode_audio
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    audio = decode_audio(str(path), sampling_rate=16000)
+    options = VadOptions(min_silence_duration_ms=int(min_silence * 1000), min_speech_duration_ms=int(min_speech * 1000),
+                         speech_pad_ms=int(pad * 1000))
+    return [(t["start"] / 16000, t["end"] / 16000) for t in get_speech_timestamps(audio, options)]
+
+
+class SpeechMap:
+    """Where each speech region of the original recording sits in the speech-only copy."""
+
+    def __init__(self, regions, gap=GAP_SECONDS):
+        self.regions = list(regions)
+        # Start of each region in the speech-only copy
+        self.starts = []
+        position = 0.0
+        for start, end in self.regions:
+            self.starts.append(position)
+            position += (end - start) + gap
+        self.duration = max(0.0, position - gap)
+
+    def to_original(self, t):
+        """Time in the speech-only copy -> time in the original (a time in a gap maps to the end of the region before it)."""
+        i = max(0, bisect_right(self.starts, t) - 1)
+        start, end = self.regions[i]
+        return min(end, start + max(0.0, t - self.starts[i]))
+
+    def remap(self, segments):
+        """Copies of [{'start', 'end', ...}] with start/end on the original timeline."""
+        return [dict(s, start=self.to_original(s["start"]), end=self.to_original(s["end"])) for s in segments]
+
+
+def write_speech_wav(src, dst, regions, gap=GAP_SECONDS):
+    """Write the regions of src, in order and separated by gap seconds of silence, to dst."""
+    with wave.open(str(src), "rb") as f:
+        params = f.getparams()
+        rate, frame_size = f.getframerate(), f.getsampwidth() * f.getnchannels()
+        silence = (b"\x80" if f.getsampwidth() == 1 else b"\x00") * frame_size * int(gap * rate)
+        with wave.open(str(dst), "wb") as out:
+            out.setparams(params)
+            for i, (start, end) in enumerate(regions):
+                if i:
+                    out.writeframes(silence)
+                f.setpos(int(start * rate))
+                out.writeframes(f.readframes(int((end - start) * rate)))
+
+
+class SpeechAudio:
+    """
+    Result of detect_speech.
+
+    Attributes:
+        path: WAV file for the models (the speech-only copy, or the original if little could be skipped)
+        speech_map: SpeechMap to apply to model timestamps, or None when path is the original
+        report: {'engine', 'totalSeconds', 'speechSeconds', 'skippedFraction', 'regions', 'applied'}
+    """
+
+    def __init__(self, path, speech_map, report):
+        self.path = path
+        self.speech_map = speech_map
+        self.report = report
+
+    def remap(self, segments):
+        return self.speech_map.remap(segments) if self.speech_map else segments
+
+
+def whole_recording(wav_path, total, engine, **extra):
+    """SpeechAudio that has the models process all of wav_path (total seconds long)."""
+    return SpeechAudio(wav_path, None, {"engine": engine, "totalSeconds": round(total, 2), "speechSeconds": round(total, 2),
+                                        "skippedFraction": 0.0, "regions": 1, "applied": False, **extra})
+
+
+def detect_speech(wav_path, speech_path, engine=None):
+    """
+    Find the speech in wav_path and, if enough can be skipped, write the speech-only copy to speech_path.
+
+    Returns:
+        SpeechAudio
+    """
+    engine = engine or os.getenv("VAD_ENGINE", "energy")
+    options = {
+        "min_silence": float(os.getenv("VAD_MIN_SILENCE", "1.0")),
+        "min_speech": float(os.getenv("VAD_MIN_SPEECH", "0.25")),
+        "pad": float(os.getenv("VAD_PAD", "0.2")),
+    }
+    with wave.open(str(wav_path), "rb") as f:
+        total = f.getnframes() / f.getframerate()
+    if engine == "off":
+        return whole_recording(wav_path, total, engine)
+    if engine == "silero":
+        regions = silero_regions(wav_path, **options)
+    elif engine == "energy":
+        regions = energy_regions_file(wav_path, **options)
+    else:
+        raise ValueError(f"Unknown VAD engine {engine!r} (known: energy, silero, off)")
+
+    speech = sum(end - start for start, end in regions)
+    skipped = 1 - speech / total if total else 0.0
+    report = {
+        "engine": engine,
+        "totalSeconds": round(total, 2),
+        "speechSeconds": round(speech, 2),
+        "skippedFraction": round(skipped, 4),
+        "regions": len(regions),
+        "applied": False,
+    }
+    # Nothing found (let the models decide) or too little to skip to be worth a copy
+    if not regions or skipped < float(os.getenv("VAD_MIN_SKIP", "0.05")):
+        report["skippedFraction"] = 0.0
+        return SpeechAudio(wav_path, None, report)
+    write_speech_wav(wav_path, speech_path, regions)
+    report["applied"] = True
+    return SpeechAudio(speech_path, SpeechMap(regions), report)
@@ -1,9 +1,9 @@
-import requests
-from bs4 import BeautifulSoup
-import json
+import argparse
 import os
-from urllib.parse import urljoin, urlparse
-import time
+
+from crawler import Crawler
+from extract import extract_page
+from crawl_state import CrawlState, diff_records, has_changes, load_json, write_json_atomic
 
 BASE = "https://www.cityofkingston.ca"
 START_PAGES = [
@@ -34,70 +34,48 @@ START_PAGES = [
 DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 MAX_DEPTH = 2  # how deep to follow internal links
 
-session = requests.Session()
-session.verify = True
-os.makedirs(DATA_DIR, exist_ok=True)
-
-visited = set()  # track visited URLs globally for this category
-
-def get_soup(url):
-    try:
-        r = session.get(url, timeout=20)
-        r.raise_for_status()
-        return BeautifulSoup(r.text, "lxml")
-    except:
-        return None
-
-def parse_page(url, section_url, depth=0):
-    """Crawl a page, return its content, follow internal links only under section_url"""
-    if url in visited or depth > MAX_DEPTH:
-        return []
-
-    visited.add(url)
-    print(f"[Depth {depth}] Crawling: {url}")
-
-    soup = get_soup(url)
-    if not soup:
-        return []
+def parse_page(url, html):
+    """Extract content sections and PDFs from one page, plus the links it points to"""
+    return extract_page(url, html)
 
-    content = []
-    main = soup.find("main") or soup.body
+def section_key(record):
+    """Identity of a section record when diffing runs"""
+    return record.get("heading") or (record.get("text") or "")[:80]
 
-    if main:
-        # Grab text and PDFs
-        for tag in main.find_all(["h1","h2","h3","p","a"], recursive=True):
-            if tag.name in ["h1","h2","h3"]:
-                content.append({"heading": tag.get_text(strip=True), "text": "", "pdfs": []})
-            elif tag.name == "p":
-                if content:
-                    content[-1]["text"] += tag.get_text(" ", strip=True) + " "
-                else:
-                    content.append({"heading": None, "text": tag.get_text(" ", strip=True), "pdfs": []})
-            elif tag.name == "a":
-                href = tag.get("href")
-                if href and href.lower().endswith(".pdf"):
-                    pdf_url = urljoin(BASE, href)
-                    if content:
-                        content[-1]["pdfs"].append({"text": tag.get_text(strip=True), "url": pdf_url})
-                    else:
-                        content.append({"heading": None, "text": "", "pdfs":[{"text": tag.get_text(strip=True), "url": pdf_url}]})
+def main(start_pages=START_PAGES, data_dir=DATA_DIR, max_workers=8, rate_per_host=4.0, full=False):
+    os.makedirs(data_dir, exist_ok=True)
+    state = CrawlState("allpermits", state_dir=os.path.join(data_dir, "crawl_state"))
+    if full:
+        state.pages = {}
+    crawler = Crawler(max_workers=max_workers, rate_per_host=rate_per_host)
+    print(f"\n=== CRAWLING {len(start_pages)} SECTIONS ===")
+    archives = crawler.crawl_sections(start_pages, parse_page, max_depth=MAX_DEPTH, state=state)
 
-    # Follow internal links only under section_url
-    for a in main.find_all("a", href=True):
-        href = a["href"].strip()
-        full_url = urljoin(BASE, href)
-        if full_url.startswith(section_url) and full_url not in visited:
-            time.sleep(0.3)
-            content.extend(parse_page(full_url, section_url, depth + 1))
+    changes = {}
+    for start_url, archive in archives.items():
+        filename = start_url.rstrip("/").split("/")[-1] + ".json"
+        output_path = os.path.join(data_dir, filename)
+        previous = load_json(output_path, default=None)
+        changes[filename] = diff_records(previous, archive, section_key)
+        if previous is not None and not has_changes(changes[filename]):
+            print(f"Unchanged: {filename}")
+            continue
+        write_json_atomic(output_path, archive)
+        c = changes[filename]
+        print(f"Saved {len(archive)} sections to {filename} "
+              f"(+{len(c['added'])} ~{len(c['modified'])} -{len(c['removed'])})")
 
-    return content
+    state.save()
+    state.write_changeset(changes)
+    print(f"Crawl stats: {crawler.stats.summary()}")
+    return changes
 
-# --- MAIN LOOP ---
-for start_url in START_PAGES:
-    print(f"\n=== STARTING: {start_url} ===")
-    visited.clear()  # reset per section
-    archive = parse_page(start_url, start_url)
-    filename = start_url.rstrip("/").split("/")[-1] + ".json"
-    with open(os.path.join(DATA_DIR, filename), "w", encoding="utf-8") as f:
-        json.dump(archive, f, indent=2, ensure_ascii=False)
-    print(f"Saved {len(archive)} sections to {filename}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape City of Kingston permit pages")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent fetches")
+    parser.add_argument("--rate", type=float, default=4.0, help="max requests per second per host")
+    parser.add_argument("--start", nargs="*", help="start URLs (defaults to the built-in list)")
+    parser.add_argument("--out", default=DATA_DIR, help="output folder")
+    parser.add_argument("--full", action="store_true", help="ignore crawl state and re-parse every page")
+    args = parser.parse_args()
+    main(args.start or START_PAGES, args.out, args.workers, args.rate, args.full)
@@ -1,65 +1,106 @@
+import argparse
 import requests
 from bs4 import BeautifulSoup
-import json
 import urllib3
 import html
 import os
 
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from crawl_state import CrawlState, content_hash, diff_records, has_changes, load_json, write_json_atomic
 
-session = requests.Session()
-session.verify = False
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 url = "https://www.cityofkingston.ca/bylaws-and-animal-services/"
-r = session.get(url, verify=False)
-soup = BeautifulSoup(r.text, "lxml")
-
-bylaws_data = []
 base_url = "https://www.cityofkingston.ca"
-seen_bylaws = set()
-
-# Find all bylaw links/containers
-bylaw_items = soup.find_all("a", {"class": ["bylaw", "bylaw-link", "btn-primary"]})
-
-# If the above doesn't work, try finding all links in the main content
-if not bylaw_items:
-    content = soup.find("main") or soup.find("article") or soup.find("div", {"class": "content"})
-    if content:
-        bylaw_items = content.find_all("a")
-
-print(f"Found {len(bylaw_items)} bylaw items")
-
-for item in bylaw_items:
-    bylaw_name = item.get_text(strip=True)
-    bylaw_url = item.get("href", "")
-    
-    # Skip empty links
-    if not bylaw_name or not bylaw_url:
-        continue
-    
-    # Create unique ID
-    bylaw_id = bylaw_name
-    
-    if bylaw_id not in seen_bylaws:
-        seen_bylaws.add(bylaw_id)
-        
-        # Make absolute URLs
-        if bylaw_url.startswith("/"):
-            bylaw_url = base_url + bylaw_url
-        elif not bylaw_url.startswith("http"):
-            bylaw_url = base_url + "/" + bylaw_url
-        
-        bylaws_data.append({
-            "name": bylaw_name,
-            "url": html.unescape(bylaw_url)
-        })
-
-# Save to JSON
 output_dir = os.path.join(os.path.dirname(__file__), "..", "data")
-os.makedirs(output_dir, exist_ok=True)
-output_path = os.path.join(output_dir, "bylaws_data.json")
 
-with open(output_path, "w") as f:
-    json.dump(bylaws_data, f, indent=2)
 
-print(f"\nSaved {len(bylaws_data)} bylaws to bylaws_data.json")
\ No newline at end of file
+def parse_bylaws(page_html):
+    soup = BeautifulSoup(page_html, "lxml")
+
+    bylaws_data = []
+    seen_bylaws = set()
+
+    # Find all bylaw links/containers
+    bylaw_items = soup.find_all("a", {"class": ["bylaw", "bylaw-link", "btn-primary"]})
+
+    # If the above doesn't work, try finding all links in the main content
+    if not bylaw_items:
+        content = soup.find("main") or soup.find("article") or soup.find("div", {"class": "content"})
+        if content:
+            bylaw_items = content.find_all("a")
+
+    print(f"Found {len(bylaw_items)} bylaw items")
+
+    for item in bylaw_items:
+        bylaw_name = item.get_text(strip=True)
+        bylaw_url = item.get("href", "")
+
+        # Skip empty links
+        if not bylaw_name or not bylaw_url:
+            continue
+
+        # Create unique ID
+        bylaw_id = bylaw_name
+
+        if bylaw_id not in seen_bylaws:
+            seen_bylaws.add(bylaw_id)
+
+            # Make absolute URLs
+            if bylaw_url.startswith("/"):
+                bylaw_url = base_url + bylaw_url
+            elif not bylaw_url.startswith("http"):
+                bylaw_url = base_url + "/" + bylaw_url
+
+            bylaws_data.append({
+                "name": bylaw_name,
+                "url": html.unescape(bylaw_url)
+            })
+
+    return bylaws_data
+
+
+def main(output_dir=output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, "bylaws_data.json")
+    state = CrawlState("bylaws", state_dir=os.path.join(output_dir, "crawl_state"))
+
+    session = requests.Session()
+    session.verify = False
+    previous = load_json(output_path, default=None)
+    # Validators only help if we still have the file they describe; without it a 304
+    # would leave us nothing to keep, so fetch the page unconditionally
+    headers = state.conditional_headers(url) if previous is not None else {}
+    r = session.get(url, headers=headers, timeout=20)
+
+    if r.status_code == 304:
+        print("Bylaws page not modified, keeping bylaws_data.json")
+        state.update(url, response=r)
+        state.save()
+        state.write_changeset({})
+        return
+    body_hash = content_hash(r.text)
+    entry = state.get(url)
+    if previous is not None and entry and entry.get("hash") == body_hash:
+        print("Bylaws page unchanged, keeping bylaws_data.json")
+        state.update(url, response=r)
+        state.save()
+        state.write_changeset({})
+        return
+    r.raise_for_status()
+
+    bylaws_data = parse_bylaws(r.text)
+    changes = diff_records(previous, bylaws_data, lambda b: b["name"])
+    if previous is None or has_changes(changes):
+        write_json_atomic(output_path, bylaws_data)
+    state.update(url, response=r, body_hash=body_hash)
+    state.save()
+    state.write_changeset({"bylaws_data.json": changes})
+
+    print(f"\nSaved {len(bylaws_data)} bylaws to bylaws_data.json "
+          f"(+{len(changes['added'])} ~{len(changes['modified'])} -{len(changes['removed'])})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape the City of Kingston bylaw list")
+    parser.add_argument("--out", default=output_dir, help="output folder")
+    main(parser.parse_args().out)
@@ -0,0 +1,159 @@
+"""
+Crawl state for incremental re-scraping.
+
+Each scraper keeps data/crawl_state/<name>.json with, per URL, the ETag /
+Last-Modified validators, a hash of the last body and the records parsed from it.
+Re-runs send conditional requests and reuse the stored records when the server
+answers 304 or the body hash is unchanged. After a run the scraper diffs its new
+records against the previous output and writes data/crawl_state/<name>.changes.json
+with the added / modified / removed records, so downstream consumers can update
+incrementally instead of reloading everything.
+
+The state lives in a subfolder so the chatbot's data/*.json loader does not pick it up.
+"""
+import hashlib
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Atomic writes are shared with the backend app package
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.storage import atomic_write_json
+
+STATE_DIR = Path(__file__).parent.parent / "data" / "crawl_state"
+
+
+def content_hash(text):
+    """Stable hash of a page body or a record."""
+    if not isinstance(text, (str, bytes)):
+        text = json.dumps(text, sort_keys=True, ensure_ascii=False)
+    if isinstance(text, str):
+        text = text.encode("utf-8")
+    return hashlib.sha256(text).hexdigest()
+
+
+# Temp file + rename, so readers never see a partial file
+write_json_atomic = atomic_write_json
+
+
+def load_json(path, default=None):
+    path = Path(path)
+    if not path.exists():
+        return default
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading {path}: {e}")
+        return default
+
+
+class CrawlState:
+    """Per-URL validators, body hashes and cached parse results for one scraper."""
+
+    def __init__(self, name, state_dir=STATE_DIR):
+        self.name = name
+        self.state_dir = Path(state_dir)
+        self.path = self.state_dir / f"{name}.json"
+        self.pages = load_json(self.path, default={}) or {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        with self._lock:
+            return self.pages.get(url)
+
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since headers for url, empty if we have never seen it."""
+        entry = self.get(url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, url, response=None, body_hash=None, **cached):
+        """
+        Record the result of fetching url.
+
+        Args:
+            url: Page URL
+            response: requests.Response the validators are read from (None keeps the old ones;
+                      so does a header the response leaves out, as 304s often do)
+            body_hash: content_hash() of the body
+            **cached: Parse results to reuse when the page has not changed (e.g. records, links)
+        """
+        with self._lock:
+            entry = dict(self.pages.get(url) or {})
+            if response is not None:
+                for field, header in (("etag", "ETag"), ("last_modified", "Last-Modified")):
+                    if response.headers.get(header):
+                        entry[field] = response.headers[header]
+            if body_hash is not None:
+                entry["hash"] = body_hash
+            entry.update(cached)
+            entry["checked_at"] = time.time()
+            self.pages[url] = entry
+
+    def prune(self, seen_urls):
+        """Forget URLs that were not reached in this run."""
+        seen_urls = set(seen_urls)
+        with self._lock:
+            for url in list(self.pages):
+                if url not in seen_urls:
+                    del self.pages[url]
+
+    def save(self):
+        with self._lock:
+            pages = dict(self.pages)
+        write_json_atomic(self.path, pages, indent=None)
+
+    def write_changeset(self, files):
+        """
+        Write the changes of this run to <name>.changes.json.
+
+        Args:
+            files: dict of output file name -> diff_records() result
+        """
+        changeset = {
+            "scraper": self.name,
+            "generated_at": time.time(),
+            "files": {name: changes for name, changes in files.items() if has_changes(changes)},
+        }
+        write_json_atomic(self.state_dir / f"{self.name}.changes.json", changeset)
+        return changeset
+
+
+def _keyed(records, key):
+    """Map key -> record; repeated keys get a #n suffix so nothing is lost."""
+    out = {}
+    counts = {}
+    for record in records:
+        k = str(key(record))
+        counts[k] = counts.get(k, 0) + 1
+        if counts[k] > 1:
+            k = f"{k}#{counts[k]}"
+        out[k] = record
+    return out
+
+
+def diff_records(old_records, new_records, key):
+    """
+    Compare two record lists by key.
+
+    Returns:
+        dict with 'added', 'modified' (new versions) and 'removed' record lists
+    """
+    old = _keyed(old_records or [], key)
+    new = _keyed(new_records or [], key)
+    added = [new[k] for k in new if k not in old]
+    removed = [old[k] for k in old if k not in new]
+    modified = [new[k] for k in new if k in old and content_hash(new[k]) != content_hash(old[k])]
+    return {"added": added, "modified": modified, "removed": removed}
+
+
+def has_changes(changes):
+    return bool(changes["added"] or changes["modified"] or changes["removed"])
@@ -0,0 +1,264 @@
+"""
+Concurrent crawl engine shared by the archive scrapers.
+
+Pages are fetched by a bounded thread pool (one pooled requests.Session per worker
+thread) with a per-host rate limit and retries with exponential backoff (or the
+server's Retry-After). Several sections can be crawled at once: the frontier is
+shared, but each section keeps its own visited set and depth limit, and its pages
+are reassembled in the same depth-first order the old sequential crawler produced.
+
+With a CrawlState, pages are requested conditionally and not re-parsed when the
+server answers 304 or the body hash matches the previous run.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from crawl_state import content_hash
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# Longest Retry-After the crawler will honour; a server asking for more is waited on this long
+MAX_RETRY_AFTER = 60
+
+
+def retry_after_seconds(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None if absent or unreadable."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostRateLimiter:
+    """Spaces out requests to the same host by at least 1 / rate_per_host seconds."""
+
+    def __init__(self, rate_per_host):
+        self.interval = 1.0 / rate_per_host if rate_per_host else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class CrawlStats:
+    """Thread-safe counters for progress and throughput reporting."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.pages = 0
+        self.failures = 0
+        self.retries = 0
+        self.bytes = 0
+        self.not_modified = 0
+        self.unchanged = 0
+
+    def record(self, pages=0, failures=0, retries=0, nbytes=0, not_modified=0, unchanged=0):
+        with self._lock:
+            self.pages += pages
+            self.failures += failures
+            self.retries += retries
+            self.bytes += nbytes
+            self.not_modified += not_modified
+            self.unchanged += unchanged
+
+    def summary(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            "pages": self.pages,
+            "failures": self.failures,
+            "retries": self.retries,
+            "bytes": self.bytes,
+            "not_modified": self.not_modified,
+            "unchanged": self.unchanged,
+            "elapsed_s": round(elapsed, 2),
+            "pages_per_s": round(self.pages / elapsed, 2),
+        }
+
+
+class Crawler:
+    """Bounded, rate-limited concurrent fetcher with section-scoped link following."""
+
+    def __init__(self, max_workers=8, rate_per_host=4.0, max_retries=3, backoff=0.5,
+                 timeout=20, verify=True, progress_every=10):
+        """
+        Args:
+            max_workers: Number of concurrent fetches
+            rate_per_host: Max requests per second to any single host (0 = unlimited)
+            max_retries: Retries per URL on connection errors and 429/5xx responses
+            backoff: Base delay in seconds; attempt n waits backoff * 2**n plus jitter, or the
+                     response's Retry-After (up to MAX_RETRY_AFTER) if it sends one
+            timeout: Per-request timeout in seconds
+            verify: TLS certificate verification (passed to requests)
+            progress_every: Print a progress line every N pages (0 = quiet)
+        """
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.verify = verify
+        self.progress_every = progress_every
+        self.rate_limiter = HostRateLimiter(rate_per_host)
+        self.stats = CrawlStats()
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.verify = self.verify
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+        return session
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request with rate limiting and retries.
+
+        Returns:
+            requests.Response, or None if every attempt failed
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.wait(url)
+            retry_after = None
+            try:
+                r = self._session().request(method, url, **kwargs)
+                if r.status_code not in RETRY_STATUS:
+                    r.raise_for_status()
+                    self.stats.record(nbytes=len(r.content))
+                    return r
+                error = f"HTTP {r.status_code}"
+                retry_after = retry_after_seconds(r.headers.get("Retry-After"))
+            except requests.HTTPError as e:
+                # 4xx other than 429 will not get better on retry
+                print(f"Failed {url}: {e}")
+                self.stats.record(failures=1)
+                return None
+            except requests.RequestException as e:
+                error = str(e)
+            if attempt < self.max_retries:
+                self.stats.record(retries=1)
+                if retry_after is not None:
+                    time.sleep(min(retry_after, MAX_RETRY_AFTER))
+                else:
+                    time.sleep(self.backoff * (2 ** attempt) * (1 + random.random()))
+        print(f"Giving up on {url}: {error}")
+        self.stats.record(failures=1)
+        return None
+
+    def fetch(self, url):
+        """GET a page and return its text, or None on failure."""
+        r = self.request("GET", url)
+        return r.text if r is not None else None
+
+    def _page_done(self):
+        self.stats.record(pages=1)
+        if self.progress_every and self.stats.pages % self.progress_every == 0:
+            s = self.stats.summary()
+            print(f"[crawl] {s['pages']} pages, {s['failures']} failed, {s['pages_per_s']} pages/s")
+
+    def fetch_page(self, url, parse, state=None):
+        """
+        Fetch and parse one page, reusing the previous parse when it has not changed.
+
+        Returns:
+            (content_list, links)
+        """
+        entry = state.get(url) if state else None
+        headers = state.conditional_headers(url) if state else None
+        r = self.request("GET", url, headers=headers)
+        if r is None:
+            # Keep the last good copy rather than dropping the page on a transient failure
+            return (entry.get("records", []), entry.get("links", [])) if entry else ([], [])
+        if r.status_code == 304 and entry:
+            self.stats.record(not_modified=1)
+            state.update(url, response=r)
+            return entry.get("records", []), entry.get("links", [])
+
+        body_hash = content_hash(r.text)
+        if entry and entry.get("hash") == body_hash and "records" in entry:
+            self.stats.record(unchanged=1)
+            state.update(url, response=r, body_hash=body_hash)
+            return entry["records"], entry.get("links", [])
+
+        content, links = parse(url, r.text)
+        if state:
+            state.update(url, response=r, body_hash=body_hash, records=content, links=links)
+        return content, links
+
+    def crawl_sections(self, sections, parse, max_depth=2, state=None):
+        """
+        Crawl several sections concurrently.
+
+        Args:
+            sections: List of start URLs; links are only followed if they start with the section URL
+            parse: parse(url, html) -> (content_list, links) for a fetched page
+            max_depth: How many link hops to follow from each start URL
+            state: Optional CrawlState for conditional requests; URLs not reached are pruned from it
+
+        Returns:
+            dict of start_url -> list of content records in depth-first page order
+        """
+        # Per-section state: visited set, page results and the child links each page claimed
+        progress = {s: {"visited": {s}, "content": {}, "children": {}} for s in sections}
+
+        def work(section, url, depth):
+            content, links = self.fetch_page(url, parse, state)
+            print(f"[Depth {depth}] Crawled: {url}")
+            return section, url, depth, content, links
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = {pool.submit(work, s, s, 0) for s in sections}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    section, url, depth, content, links = future.result()
+                    self._page_done()
+                    st = progress[section]
+                    st["content"][url] = content
+                    children = []
+                    if depth < max_depth:
+                        for link in links:
+                            if link.startswith(section) and link not in st["visited"]:
+                                st["visited"].add(link)
+                                children.append(link)
+                                pending.add(pool.submit(work, section, link, depth + 1))
+                    st["children"][url] = children
+
+        if state:
+            state.prune(set().union(*(st["visited"] for st in progress.values())))
+        results = {}
+        for section in sections:
+            st = progress[section]
+            ordered = []
+            stack = [section]
+            while stack:
+                url = stack.pop()
+                ordered.extend(st["content"].get(url, []))
+                stack.extend(reversed(st["children"].get(url, [])))
+            results[section] = ordered
+        return results
@@ -1,98 +1,302 @@
-import requests
-from bs4 import BeautifulSoup
-import json
-import urllib3
+"""
+Scraper for the council meeting calendar at events.cityofkingston.ca.
+
+The date range is split into windows that are crawled in parallel; within a window
+the page count is read from the first results page and the remaining pages are
+fetched concurrently (or in speculative batches when the pager is not found).
+Finished windows are remembered in data/crawl_state/events.json so an interrupted
+backfill resumes where it stopped. Results are merged into meeting_data.json by
+"date|meeting" through the meetings store, so recorded meetings and their
+transcripts are kept.
+
+    python events.py --start 11/01/2016 --end 11/01/2026 --window-days 90 --workers 6
+"""
+import argparse
 import html
 import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import urllib3
+from bs4 import BeautifulSoup
+
+from crawler import Crawler
+from crawl_state import CrawlState, has_changes
+
+# The meetings store lives in the backend app package
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.meetings_store import MeetingsStore
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-session = requests.Session()
-session.verify = False
+base_url = "https://events.cityofkingston.ca"
+INDEX_URL = base_url + "/council/Index"
+SEARCH_URL = base_url + "/council/Index?action=search"
+DATE_FORMAT = "%m/%d/%Y"
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 
-url = "https://events.cityofkingston.ca/council/Index"
-r = session.get(url)
-soup = BeautifulSoup(r.text, "lxml")
 
-token = soup.find("input", {"name": "__RequestVerificationToken"})["value"]
-print(f"Token found: {token[:20]}...")
+def meeting_key(meeting):
+    """Unique identifier of a meeting: date + name"""
+    return f"{meeting['date']}|{meeting['meeting']}"
 
-payload = {
-    "__RequestVerificationToken": token,
-    "StartDate": "11/01/2024",
-    "EndDate": "11/01/2026"
-}
 
-meeting_data = []
-base_url = "https://events.cityofkingston.ca"
-page = 0
-seen_meetings = set()
-
-while True:
-    print(f"\nFetching page {page}...")
-    
-    payload["page"] = page
-    r = session.post("https://events.cityofkingston.ca/council/Index?action=search", data=payload, verify=False)
-    results = BeautifulSoup(r.text, "lxml")
-    
-    table_rows = results.select("table tbody tr")
-    print(f"Found {len(table_rows)} rows on page {page}")
-    
-    if len(table_rows) == 0:
-        print("No more rows, stopping pagination")
-        break
-    
-    page_had_new = False
-    
-    for row in table_rows:
+def meeting_date(meeting):
+    """
+    Day of a meeting record: scraped ("November 4, 2024 6:00 pm - 8:00 pm") or
+    recorded ("February 08, 2026 03:34 AM"). None if unreadable.
+    """
+    match = re.match(r"\s*([A-Za-z]+ \d{1,2}, \d{4})", meeting.get("date") or "")
+    try:
+        return datetime.strptime(match.group(1), "%B %d, %Y") if match else None
+    except ValueError:
+        return None
+
+
+def parse_results(page_html):
+    """Parse one search results page into meeting records"""
+    results = BeautifulSoup(page_html, "lxml")
+    meetings = []
+    for row in results.select("table tbody tr"):
         tds = row.find_all("td")
-        if len(tds) >= 3:
-            date_str = tds[0].get_text(strip=True)
-            
-            meeting_link = tds[1].find("a")
-            meeting_name = meeting_link.get_text(strip=True) if meeting_link else "N/A"
-            
-            # Use date + name as unique identifier
-            meeting_id = f"{date_str}|{meeting_name}"
-            
-            if meeting_id not in seen_meetings:
-                seen_meetings.add(meeting_id)
-                page_had_new = True
-                
-                meeting_url = meeting_link.get("href", "") if meeting_link else ""
-                if meeting_url.startswith("/"):
-                    meeting_url = base_url + meeting_url
-                
-                documents = {}
-                for td in tds[2:]:
-                    doc_links = td.find_all("a")
-                    for doc_link in doc_links:
-                        doc_text = doc_link.get_text(strip=True)
-                        doc_href = doc_link.get("href", "")
-                        if doc_text and doc_href:
-                            if doc_href.startswith("/"):
-                                doc_href = base_url + doc_href
-                            documents[doc_text] = html.unescape(doc_href)
-                
-                meeting_data.append({
-                    "date": date_str,
-                    "meeting": meeting_name,
-                    "meeting_url": meeting_url,
-                    "documents": documents
-                })
-    
-    if not page_had_new:
-        print("No new meetings found, stopping pagination")
-        break
-    
-    page += 1
-
-# Save to JSON
-output_dir = os.path.join(os.path.dirname(__file__), "..", "data")
-os.makedirs(output_dir, exist_ok=True)
-output_path = os.path.join(output_dir, "meeting_data.json")
-
-with open(output_path, "w") as f:
-    json.dump(meeting_data, f, indent=2)
-
-print(f"\nSaved {len(meeting_data)} total meetings to meeting_data.json")
\ No newline at end of file
+        if len(tds) < 3:
+            continue
+        date_str = tds[0].get_text(strip=True)
+
+        meeting_link = tds[1].find("a")
+        meeting_name = meeting_link.get_text(strip=True) if meeting_link else "N/A"
+
+        meeting_url = meeting_link.get("href", "") if meeting_link else ""
+        if meeting_url.startswith("/"):
+            meeting_url = base_url + meeting_url
+
+        documents = {}
+        for td in tds[2:]:
+            for doc_link in td.find_all("a"):
+                doc_text = doc_link.get_text(strip=True)
+                doc_href = doc_link.get("href", "")
+                if doc_text and doc_href:
+                    if doc_href.startswith("/"):
+                        doc_href = base_url + doc_href
+                    documents[doc_text] = html.unescape(doc_href)
+
+        meetings.append({
+            "date": date_str,
+            "meeting": meeting_name,
+            "meeting_url": meeting_url,
+            "documents": documents
+        })
+    return meetings
+
+
+def discover_page_count(page_html):
+    """
+    Read the number of result pages from the pager on the first page.
+
+    Returns:
+        Page count, or None if the page has no recognizable pager
+    """
+    soup = BeautifulSoup(page_html, "lxml")
+    pages = set()
+    for el in soup.select("[data-page], a[href*='page=']"):
+        value = el.get("data-page")
+        if value is None:
+            match = re.search(r"[?&]page=(\d+)", el.get("href", ""))
+            value = match.group(1) if match else None
+        if value is not None and str(value).isdigit():
+            pages.add(int(value))
+    if not pages:
+        return None
+    # Pages are numbered from 0
+    return max(pages) + 1
+
+
+def date_windows(start_date, end_date, window_days):
+    """Split [start_date, end_date] into consecutive windows of window_days"""
+    windows = []
+    current = start_date
+    while current <= end_date:
+        window_end = min(current + timedelta(days=window_days - 1), end_date)
+        windows.append((current, window_end))
+        current = window_end + timedelta(days=1)
+    return windows
+
+
+class CouncilSearch:
+    """Posts the council search form; each worker thread keeps its own session and form token."""
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self._local = threading.local()
+
+    def _token(self):
+        # The token is bound to the session cookie, and Crawler sessions are per thread
+        token = getattr(self._local, "token", None)
+        if token is None:
+            r = self.crawler.request("GET", INDEX_URL)
+            if r is None:
+                raise RuntimeError("Could not load the council search form")
+            field = BeautifulSoup(r.text, "lxml").find("input", {"name": "__RequestVerificationToken"})
+            token = field["value"]
+            self._local.token = token
+        return token
+
+    def fetch_page(self, start_date, end_date, page):
+        payload = {
+            "__RequestVerificationToken": self._token(),
+            "StartDate": start_date.strftime(DATE_FORMAT),
+            "EndDate": end_date.strftime(DATE_FORMAT),
+            "page": page,
+        }
+        r = self.crawler.request("POST", SEARCH_URL, data=payload)
+        if r is None:
+            # Fail the window so it is not recorded as complete
+            raise RuntimeError(f"Search page {page} failed")
+        self.crawler.stats.record(pages=1)
+        return r.text
+
+
+def scrape_window(search, pool, start_date, end_date, batch_size):
+    """
+    Fetch every results page of one date window.
+
+    Returns:
+        List of meeting records in page order, de-duplicated by meeting_key
+    """
+    label = f"{start_date.strftime(DATE_FORMAT)}-{end_date.strftime(DATE_FORMAT)}"
+    first = search.fetch_page(start_date, end_date, 0)
+    pages = [parse_results(first)]
+    page_count = discover_page_count(first)
+
+    if pages[0]:
+        if page_count is not None:
+            futures = [pool.submit(search.fetch_page, start_date, end_date, p) for p in range(1, page_count)]
+            pages.extend(parse_results(f.result()) for f in futures)
+        else:
+            # No pager: fetch batches in parallel until a page is empty or repeats earlier rows
+            seen = {meeting_key(m) for m in pages[0]}
+            next_page = 1
+            done = False
+            while not done:
+                futures = [pool.submit(search.fetch_page, start_date, end_date, p)
+                           for p in range(next_page, next_page + batch_size)]
+                next_page += batch_size
+                for future in futures:
+                    rows = parse_results(future.result())
+                    new_rows = [m for m in rows if meeting_key(m) not in seen]
+                    if not new_rows:
+                        done = True
+                        break
+                    seen.update(meeting_key(m) for m in new_rows)
+                    pages.append(new_rows)
+
+    meetings = []
+    seen = set()
+    for rows in pages:
+        for meeting in rows:
+            if meeting_key(meeting) not in seen:
+                seen.add(meeting_key(meeting))
+                meetings.append(meeting)
+    print(f"Window {label}: {len(meetings)} meetings from {len(pages)} page(s)")
+    return meetings
+
+
+def scrape_meetings(start_date, end_date, window_days=90, max_workers=6, rate_per_host=4.0,
+                    resume=True, state=None):
+    """
+    Scrape all council meetings between two dates.
+
+    Args:
+        start_date, end_date: datetime bounds (inclusive)
+        window_days: Size of each date shard
+        max_workers: Concurrent requests (shared by windows and pages)
+        rate_per_host: Max requests per second to the events site
+        resume: Skip windows that finished in an earlier run and lie entirely in the past
+        state: CrawlState used to remember finished windows
+
+    Returns:
+        List of meeting records ordered by window
+    """
+    crawler = Crawler(max_workers=max_workers, rate_per_host=rate_per_host, verify=False, progress_every=0)
+    search = CouncilSearch(crawler)
+    windows = date_windows(start_date, end_date, window_days)
+    today = datetime.now()
+
+    results = {}
+    todo = []
+    for window in windows:
+        key = f"window:{window[0].strftime(DATE_FORMAT)}-{window[1].strftime(DATE_FORMAT)}"
+        entry = state.get(key) if state else None
+        # Windows reaching today or later can still gain meetings and documents
+        if resume and entry and entry.get("complete") and window[1] < today:
+            results[window] = entry.get("records", [])
+        else:
+            todo.append((key, window))
+    print(f"{len(windows)} window(s), {len(windows) - len(todo)} already done, {len(todo)} to fetch")
+
+    # Window tasks block on their page tasks, so they get their own pool
+    with ThreadPoolExecutor(max_workers=max_workers) as page_pool, \
+            ThreadPoolExecutor(max_workers=max(1, max_workers // 2)) as window_pool:
+        futures = {
+            window_pool.submit(scrape_window, search, page_pool, w[0], w[1], max_workers): (key, w)
+            for key, w in todo
+        }
+        for future, (key, window) in futures.items():
+            try:
+                meetings = future.result()
+            except Exception as e:
+                print(f"Window {key} failed: {e}")
+                continue
+            results[window] = meetings
+            if state:
+                state.update(key, records=meetings, complete=True)
+                state.save()
+
+    print(f"Crawl stats: {crawler.stats.summary()}")
+    meetings = []
+    seen = set()
+    for window in windows:
+        for meeting in results.get(window, []):
+            if meeting_key(meeting) not in seen:
+                seen.add(meeting_key(meeting))
+                meetings.append(meeting)
+    return meetings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape Kingston council meetings")
+    parser.add_argument("--start", default="11/01/2024", help="start date (MM/DD/YYYY)")
+    parser.add_argument("--end", default="11/01/2026", help="end date (MM/DD/YYYY)")
+    parser.add_argument("--window-days", type=int, default=90, help="days per date shard")
+    parser.add_argument("--workers", type=int, default=6, help="concurrent requests")
+    parser.add_argument("--rate", type=float, default=4.0, help="max requests per second")
+    parser.add_argument("--no-resume", action="store_true", help="re-fetch windows finished in earlier runs")
+    parser.add_argument("--out", default=DATA_DIR, help="data folder containing meeting_data.json")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    state = CrawlState("events", state_dir=os.path.join(args.out, "crawl_state"))
+    meeting_data = scrape_meetings(
+        datetime.strptime(args.start, DATE_FORMAT),
+        datetime.strptime(args.end, DATE_FORMAT),
+        window_days=args.window_days,
+        max_workers=args.workers,
+        rate_per_host=args.rate,
+        resume=not args.no_resume,
+        state=state,
+    )
+
+    # Merge rather than overwrite so recorded meetings and transcripts survive
+    changes = MeetingsStore(args.out).merge(meeting_data, meeting_key, date=meeting_date)
+    changes["removed"] = []
+    state.write_changeset({"meeting_data.json": changes})
+    print(f"\nScraped {len(meeting_data)} meetings: +{len(changes['added'])} ~{len(changes['modified'])}"
+          f"{'' if has_changes(changes) else ' (no changes)'}")
+
+
+if __name__ == "__main__":
+    main()
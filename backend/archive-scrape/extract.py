@@ -0,0 +1,111 @@
+"""
+Single-pass HTML extraction for the permit pages.
+
+parse_page used to build a BeautifulSoup tree, walk it once for headings,
+paragraphs and PDF links and a second time for outbound links, growing each
+section's text with repeated string concatenation. extract_page parses with
+lxml directly and collects sections, PDFs and links in one document-order walk
+of <main>, accumulating text in lists that are joined once at the end.
+
+Section headings and text match the original scraper's BeautifulSoup
+extraction exactly. Links differ from it in three ways:
+
+- PDF and page links resolve against the page URL. The original resolved them
+  against BASE, which only agrees for absolute hrefs and hrefs starting with "/";
+  a relative href such as "forms/a.pdf" pointed at the wrong place.
+- PDF links are recorded with their section but not returned as links to crawl.
+- hrefs are stripped before the PDF check, so href=" a.pdf " is recorded as a
+  PDF. The original missed it because the unstripped href does not end in ".pdf".
+"""
+from urllib.parse import urljoin
+
+import lxml.html
+
+HEADINGS = {"h1", "h2", "h3"}
+WANTED = ("h1", "h2", "h3", "p", "a")
+# Text BeautifulSoup's get_text() leaves out
+SKIP_TEXT = {"script", "style", "template"}
+
+_parser = lxml.html.HTMLParser(encoding="utf-8")
+
+
+def _strings(el):
+    """Text nodes under el in document order, like BeautifulSoup's _all_strings."""
+    if el.text:
+        yield el.text
+    for child in el:
+        # Comments and processing instructions have a non-string tag; keep only their tail
+        if isinstance(child.tag, str) and child.tag not in SKIP_TEXT:
+            yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def get_text(el, separator=""):
+    """Equivalent of BeautifulSoup's tag.get_text(separator, strip=True)."""
+    return separator.join(s for s in (t.strip() for t in _strings(el)) if s)
+
+
+def _new_section(heading=None):
+    # "text" holds the pieces of the section text until the final join
+    return {"heading": heading, "text": [], "pdfs": []}
+
+
+def extract_page(url, html):
+    """
+    Extract content sections, PDF links and outbound links from a page in one pass.
+
+    Args:
+        url: Page URL, used to resolve relative links
+        html: Page HTML (str or bytes)
+
+    Returns:
+        (content, links) where content is a list of
+        {"heading", "text", "pdfs": [{"text", "url"}]} and links are absolute
+        non-PDF URLs found in <main>, in document order
+    """
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+    if not html.strip():
+        return [], []
+    try:
+        root = lxml.html.document_fromstring(html, parser=_parser)
+    except Exception:
+        return [], []
+
+    main = root.find(".//main")
+    if main is None:
+        main = root.find("body")
+    if main is None:
+        return [], []
+
+    content = []
+    links = []
+    for tag in main.iter(WANTED):
+        name = tag.tag
+        if name in HEADINGS:
+            content.append(_new_section(get_text(tag)))
+        elif name == "p":
+            text = get_text(tag, " ")
+            if content:
+                content[-1]["text"].append(text + " ")
+            else:
+                section = _new_section()
+                section["text"].append(text)
+                content.append(section)
+        else:
+            href = tag.get("href")
+            if href is None:
+                continue
+            href = href.strip()
+            if href.lower().endswith(".pdf"):
+                pdf = {"text": get_text(tag), "url": urljoin(url, href)}
+                if not content:
+                    content.append(_new_section())
+                content[-1]["pdfs"].append(pdf)
+            else:
+                links.append(urljoin(url, href))
+
+    for section in content:
+        section["text"] = "".join(section["text"])
+    return content, links
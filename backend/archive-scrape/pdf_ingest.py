@@ -0,0 +1,277 @@
+"""
+PDF ingestion: turns the PDFs the scrapers link to into searchable archive records.
+
+1. Collect PDF references from backend/data: "pdfs" entries of the permit pages,
+   PDF documents of council meetings and bylaw links ending in .pdf.
+2. Download them with the shared Crawler (bounded thread pool, rate limit, retries)
+   using conditional requests, so unchanged PDFs are not downloaded again.
+3. Extract text in a process pool. Results are cached in data/pdf_cache/<sha256>.json
+   by content hash, so a PDF is parsed at most once however many URLs point to it.
+4. Split the text into overlapping chunks and write them to data/pdf_documents.json,
+   which the chatbot loads and searches like any other category.
+
+    python pdf_ingest.py                      # ingest everything referenced in backend/data
+    python pdf_ingest.py --local-dir samples --data /tmp/pdf-staging
+                                              # offline: ingest every *.pdf in a folder
+
+A full run forgets the crawl state and cached text of PDFs that are no longer
+referenced. --local-dir needs an explicit --data, so sample PDFs never replace the
+live pdf_documents.json.
+"""
+import argparse
+import io
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from crawler import Crawler
+from crawl_state import CrawlState, content_hash, diff_records, has_changes, load_json, write_json_atomic
+
+# Chunking is shared with the chatbot's passages (backend/chatbot_module)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from chatbot_module.chunking import chunk_text
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+OUTPUT_FILE = "pdf_documents.json"
+CHUNK_CHARS = 1200
+CHUNK_OVERLAP = 200
+
+
+def collect_pdf_refs(data_dir):
+    """
+    Find every PDF linked from the scraped data.
+
+    Returns:
+        List of {"url", "title", "category"}, one per URL
+    """
+    refs = {}
+    for json_file in sorted(Path(data_dir).glob("*.json")):
+        if json_file.name == OUTPUT_FILE:
+            continue
+        items = load_json(json_file, default=[])
+        if not isinstance(items, list):
+            continue
+        category = json_file.stem
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            for pdf in item.get("pdfs") or []:
+                if pdf.get("url"):
+                    refs.setdefault(pdf["url"], {"url": pdf["url"], "title": pdf.get("text") or item.get("heading") or "", "category": category})
+            for doc_name, doc_url in (item.get("documents") or {}).items():
+                if doc_url and ("pdf" in doc_name.lower() or doc_url.lower().endswith(".pdf")):
+                    title = f"{item.get('meeting', '')} - {doc_name} ({item.get('date', '')})"
+                    refs.setdefault(doc_url, {"url": doc_url, "title": title, "category": category})
+            url = item.get("url")
+            if isinstance(url, str) and url.lower().endswith(".pdf"):
+                refs.setdefault(url, {"url": url, "title": item.get("name") or "", "category": category})
+    return list(refs.values())
+
+
+def extract_pdf_text(data):
+    """
+    Extract the text of each page of a PDF. Runs in a worker process.
+
+    Returns:
+        List of page texts
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    pages = []
+    for page in reader.pages:
+        try:
+            pages.append(page.extract_text() or "")
+        except Exception:
+            pages.append("")
+    return pages
+
+
+class PdfCache:
+    """Extracted page texts keyed by PDF content hash."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+
+    def path(self, pdf_hash):
+        return self.cache_dir / f"{pdf_hash}.json"
+
+    def get(self, pdf_hash):
+        return load_json(self.path(pdf_hash), default=None) if pdf_hash else None
+
+    def put(self, pdf_hash, pages):
+        write_json_atomic(self.path(pdf_hash), {"hash": pdf_hash, "pages": pages}, indent=None)
+
+
+def build_chunk_records(ref, pdf_hash, pages):
+    """Searchable records for one PDF (same heading/text shape as the scraped pages)."""
+    records = []
+    for page_number, page_text in enumerate(pages, 1):
+        for i, chunk in enumerate(chunk_text(page_text, CHUNK_CHARS, CHUNK_OVERLAP)):
+            records.append({
+                "heading": f"{ref['title']} (page {page_number})" if ref["title"] else f"PDF page {page_number}",
+                "text": chunk,
+                "url": ref["url"],
+                "category": ref["category"],
+                "page": page_number,
+                "chunk_id": f"{pdf_hash[:16]}-p{page_number}-{i}",
+            })
+    return records
+
+
+def ingest(refs, data_dir=DATA_DIR, max_downloads=6, max_parsers=None, rate_per_host=4.0, fetch=None,
+           prune=True):
+    """
+    Download, extract and chunk the given PDFs and write them to pdf_documents.json.
+
+    Args:
+        refs: Output of collect_pdf_refs (or local files as file paths in "url")
+        data_dir: backend/data
+        max_downloads: Concurrent downloads
+        max_parsers: Text extraction processes (default: CPU count)
+        rate_per_host: Max requests per second per host
+        fetch: Optional fetch(ref) -> bytes or None, replacing HTTP (used for local files)
+        prune: refs are every PDF still referenced: drop crawl state and cached text of the others
+
+    Returns:
+        Changeset (added / modified / removed chunk records)
+    """
+    state = CrawlState("pdfs", state_dir=os.path.join(data_dir, "crawl_state"))
+    cache = PdfCache(os.path.join(data_dir, "pdf_cache"))
+    crawler = Crawler(max_workers=max_downloads, rate_per_host=rate_per_host, verify=False, progress_every=0)
+    hashes = {}
+    stats = {"downloaded": 0, "not_modified": 0, "cached": 0, "parsed": 0, "failed": 0}
+    stats_lock = threading.Lock()
+
+    def count(name):
+        with stats_lock:
+            stats[name] += 1
+
+    def download(ref):
+        """Returns (ref, hash, bytes or None); bytes are only returned when parsing is needed."""
+        url = ref["url"]
+        entry = state.get(url)
+        if fetch is not None:
+            data = fetch(ref)
+            if data is None:
+                return ref, entry.get("hash") if entry else None, None
+        else:
+            r = crawler.request("GET", url, headers=state.conditional_headers(url))
+            if r is None:
+                # Keep the last good version if the download fails
+                return ref, entry.get("hash") if entry else None, None
+            if r.status_code == 304 and entry:
+                pdf_hash = entry.get("hash")
+                if pdf_hash and cache.path(pdf_hash).exists():
+                    count("not_modified")
+                    state.update(url, response=r)
+                    return ref, pdf_hash, None
+                # Unchanged, but its text is not cached (extraction failed, or the cache was
+                # deleted): download it again to parse it
+                r = crawler.request("GET", url)
+                if r is None:
+                    return ref, pdf_hash, None
+            data = r.content
+            state.update(url, response=r)
+        count("downloaded")
+        pdf_hash = content_hash(data)
+        state.update(url, body_hash=pdf_hash)
+        if cache.path(pdf_hash).exists():
+            return ref, pdf_hash, None
+        return ref, pdf_hash, data
+
+    with ThreadPoolExecutor(max_workers=max_downloads) as downloads, \
+            ProcessPoolExecutor(max_workers=max_parsers) as parsers:
+        parse_jobs = {}
+        for future in as_completed([downloads.submit(download, ref) for ref in refs]):
+            try:
+                ref, pdf_hash, data = future.result()
+            except Exception as e:
+                print(f"Download failed: {e}")
+                count("failed")
+                continue
+            hashes[ref["url"]] = pdf_hash
+            if data is not None and pdf_hash not in parse_jobs:
+                parse_jobs[pdf_hash] = parsers.submit(extract_pdf_text, data)
+            elif data is None and pdf_hash:
+                count("cached")
+
+        for pdf_hash, job in parse_jobs.items():
+            try:
+                cache.put(pdf_hash, job.result())
+                count("parsed")
+            except Exception as e:
+                print(f"Could not extract text from PDF {pdf_hash[:12]}: {e}")
+                count("failed")
+
+    records = []
+    for ref in refs:
+        pdf_hash = hashes.get(ref["url"])
+        cached = cache.get(pdf_hash)
+        if cached:
+            records.extend(build_chunk_records(ref, pdf_hash, cached["pages"]))
+
+    if prune:
+        prune_unreferenced(refs, hashes, state, cache)
+
+    output_path = os.path.join(data_dir, OUTPUT_FILE)
+    previous = load_json(output_path, default=None)
+    changes = diff_records(previous, records, lambda r: f"{r['url']}|{r['page']}|{r['chunk_id']}")
+    if previous is None or has_changes(changes):
+        write_json_atomic(output_path, records)
+    state.save()
+    state.write_changeset({OUTPUT_FILE: changes})
+    print(f"PDFs: {len(refs)} referenced, {stats}. Wrote {len(records)} chunks to {OUTPUT_FILE} "
+          f"(+{len(changes['added'])} ~{len(changes['modified'])} -{len(changes['removed'])})")
+    return changes
+
+
+def prune_unreferenced(refs, hashes, state, cache):
+    """
+    Forget PDFs not in refs: their crawl state entries and the cached text of every
+    hash that no referenced URL has now or had on its last good download.
+    """
+    urls = {ref["url"] for ref in refs}
+    state.prune(urls)
+    keep = {h for h in hashes.values() if h}
+    keep |= {(state.get(url) or {}).get("hash") for url in urls}
+    removed = 0
+    for path in cache.cache_dir.glob("*.json"):
+        if path.stem not in keep:
+            path.unlink(missing_ok=True)
+            removed += 1
+    if removed:
+        print(f"Removed {removed} cached PDF text(s) no longer referenced")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download and index PDFs linked from the archive")
+    parser.add_argument("--data", help=f"data folder (default {DATA_DIR}; required with --local-dir)")
+    parser.add_argument("--local-dir", help="ingest *.pdf files from this folder instead of downloading")
+    parser.add_argument("--limit", type=int, help="only ingest the first N PDFs")
+    parser.add_argument("--downloads", type=int, default=6, help="concurrent downloads")
+    parser.add_argument("--parsers", type=int, default=None, help="text extraction processes")
+    parser.add_argument("--rate", type=float, default=4.0, help="max requests per second per host")
+    args = parser.parse_args()
+    if args.data is None:
+        if args.local_dir:
+            parser.error("--local-dir needs --data (a staging folder), so the live archive is not overwritten")
+        args.data = DATA_DIR
+
+    fetch = None
+    if args.local_dir:
+        refs = [{"url": str(p.resolve()), "title": p.stem, "category": "local"}
+                for p in sorted(Path(args.local_dir).glob("*.pdf"))]
+        fetch = lambda ref: Path(ref["url"]).read_bytes()
+    else:
+        refs = collect_pdf_refs(args.data)
+    if args.limit:
+        refs = refs[:args.limit]
+    # A limited run does not see every reference, so it must not prune the others
+    ingest(refs, args.data, args.downloads, args.parsers, args.rate, fetch=fetch, prune=not args.limit)
+
+
+if __name__ == "__main__":
+    main()
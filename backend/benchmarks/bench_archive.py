@@ -0,0 +1,225 @@
+"""
+Benchmarks for the chat path over synthetic archives of growing size, and for the
+speaker alignment of recorded meetings.
+
+For every scale the archive in backend/data is copied with (scale - 1) synthetic
+items per real item (see synthetic.py), then the benchmark times:
+
+  build    loading the JSON files, chunking items into passages, indexing them
+           (and compiling them into archive.snapshot, then opening that and searching once)
+  search   EventsChatbot.search_events_local over the query set in fixtures/queries.json,
+           with recall (share of queries whose expected item is among the results)
+  context  build_archive_context on those results
+  chat     EventsChatbot.get_response end to end, against StubBackboardClient (no network)
+
+and align_segments over synthetic diarization/Whisper segments for a few meeting lengths.
+
+    python benchmarks/bench_archive.py                          # scales 1, 10, 100
+    python benchmarks/bench_archive.py --scales 1,10,1000       # 1000x writes ~3.5 GB of JSON
+    python benchmarks/bench_archive.py --json after.json --compare before.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent
+BACKEND_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+from synthetic import StubBackboardClient, diarization_segments, scale_corpus, whisper_segments
+
+try:
+    import backboard  # noqa: F401
+except ImportError:
+    # Only the import is needed: every chatbot below talks to StubBackboardClient
+    sys.modules["backboard"] = types.SimpleNamespace(BackboardClient=StubBackboardClient)
+os.environ.setdefault("BACKBOARD_API_KEY", "benchmark")
+
+from app.alignment import align_segments
+from chatbot_module.analyzer import index_for
+from chatbot_module.chatbot import EventsChatbot
+from chatbot_module.chunking import item_title, passages_for
+from chatbot_module.snapshot import ArchiveSnapshot, archive_fingerprint, build_snapshot, compile_archive, load_archive
+
+QUERIES_FILE = BENCH_DIR / "fixtures" / "queries.json"
+
+
+def summarize(samples):
+    """Milliseconds: mean, p50, p95, max of a list of seconds."""
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(ms[len(ms) // 2], 3),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def recall_hit(results, expected):
+    """True if any expected {category, title} item is among the search results."""
+    for want in expected:
+        items = (results or {}).get(want["category"], [])
+        if any(item_title(item) == want["title"] for item in items if isinstance(item, dict)):
+            return True
+    return False
+
+
+def bench_scale(scale, queries, repeat, latency, seed):
+    with tempfile.TemporaryDirectory(prefix=f"bench-archive-{scale}x-") as tmp:
+        counts, generate_s = timed(scale_corpus, tmp, scale, seed=seed)
+        size = sum(f.stat().st_size for f in Path(tmp).glob("*.json"))
+
+        # Build: the same steps build_snapshot takes, timed separately
+        all_data, load_s = timed(load_archive, tmp, strict=True, quiet=True)
+        lists = {name: items for name, items in all_data.items() if isinstance(items, list)}
+        passages, chunk_s = timed(lambda: {name: passages_for(name, items) for name, items in lists.items()})
+        _, index_s = timed(lambda: [index_for(name, p).neighbours for name, p in passages.items()])
+        snapshot = ArchiveSnapshot(all_data, fingerprint=archive_fingerprint(tmp))
+
+        bot = EventsChatbot(data_folder_path=tmp, snapshot=snapshot)
+        search, context, hits, misses = [], [], 0, []
+        for q in queries:
+            for _ in range(repeat):
+                results, seconds = timed(bot.search_events_local, q["query"])
+                search.append(seconds)
+            _, seconds = timed(bot.build_archive_context, results, query=q["query"])
+            context.append(seconds)
+            if recall_hit(results, q["expected"]):
+                hits += 1
+            else:
+                misses.append(q["query"])
+
+        # End to end, one chatbot per request like /api/chat; responses are saved into the temporary archive
+        chat, stages = [], {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            for q in queries:
+                bot = EventsChatbot(data_folder_path=tmp, snapshot=snapshot)
+                bot.client = StubBackboardClient(latency=latency)
+                _, seconds = timed(asyncio.run, bot.get_response(q["query"]))
+                chat.append(seconds)
+                for stage, s in bot.last_timings.items():
+                    stages.setdefault(stage, []).append(s)
+
+        # Cold start from a compiled snapshot: open it and answer a first query
+        # (measured last, since compiling replaces the shared index caches)
+        (_, compiled_size), compile_s = timed(compile_archive, tmp)
+        with contextlib.redirect_stdout(io.StringIO()):
+            compiled, open_s = timed(build_snapshot, tmp)
+        _, first_search_s = timed(EventsChatbot(data_folder_path=tmp, snapshot=compiled).search_events_local,
+                                  queries[0]["query"])
+
+    return {
+        "scale": scale,
+        "items": sum(counts.values()),
+        "passages": sum(len(p) for p in passages.values()),
+        "json_mb": round(size / 1e6, 1),
+        "generate_s": round(generate_s, 2),
+        "build": {"load_s": round(load_s, 3), "chunk_s": round(chunk_s, 3), "index_s": round(index_s, 3)},
+        "compiled": {"compile_s": round(compile_s, 3), "size_mb": round(compiled_size / 1e6, 1),
+                     "open_ms": round(open_s * 1000, 2), "first_search_ms": round(first_search_s * 1000, 2)},
+        "search": summarize(search),
+        "recall": round(hits / len(queries), 3),
+        "missed": misses,
+        "context": summarize(context),
+        "chat": summarize(chat),
+        "chat_stages": {stage: summarize(s) for stage, s in stages.items()},
+    }
+
+
+def bench_alignment(hours_list, seed):
+    results = {}
+    for hours in hours_list:
+        diarization = diarization_segments(hours, seed=seed)
+        segments = whisper_segments(hours, seed=seed)
+        aligned, seconds = timed(align_segments, segments, diarization)
+        results[f"{hours}h"] = {
+            "whisper_segments": len(segments),
+            "diarization_segments": len(diarization),
+            "aligned": len(aligned),
+            "ms": round(seconds * 1000, 2),
+        }
+    return results
+
+
+def compare(baseline, current, path=""):
+    """Print every *_ms / *_s value that is in both result files, with the relative change."""
+    if isinstance(baseline, dict) and isinstance(current, dict):
+        for key in current:
+            if key in baseline:
+                compare(baseline[key], current[key], f"{path}.{key}" if path else key)
+    elif isinstance(baseline, list) and isinstance(current, list):
+        by_scale = {b.get("scale"): b for b in baseline if isinstance(b, dict)}
+        for c in current:
+            if isinstance(c, dict) and c.get("scale") in by_scale:
+                compare(by_scale[c["scale"]], c, f"{path}[{c['scale']}x]")
+    elif (path.endswith("_ms") or path.endswith("_s") or path.endswith(".ms")) and isinstance(baseline, (int, float)) \
+            and isinstance(current, (int, float)) and baseline:
+        change = 100 * (current - baseline) / baseline
+        print(f"{path:55s} {baseline:>12.3f} -> {current:>12.3f}  {change:+7.1f}%")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="1,10,100", help="comma-separated corpus multipliers")
+    parser.add_argument("--repeat", type=int, default=5, help="timed searches per query")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the stub LLM takes per answer")
+    parser.add_argument("--audio-hours", default="0.5,1,2,4", help="comma-separated meeting lengths for alignment")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    with open(QUERIES_FILE, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+
+    results = {
+        "commit": git_commit(),
+        "created_at": time.time(),
+        "python": sys.version.split()[0],
+        "queries": len(queries),
+        "scales": [],
+        "alignment": bench_alignment([float(h) for h in args.audio_hours.split(",")], args.seed),
+    }
+    for scale in (int(s) for s in args.scales.split(",")):
+        print(f"Scale {scale}x...", file=sys.stderr, flush=True)
+        results["scales"].append(bench_scale(scale, queries, args.repeat, args.latency, args.seed))
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare} (commit {baseline.get('commit')}):")
+        compare(baseline, results)
+
+
+if __name__ == "__main__":
+    main()
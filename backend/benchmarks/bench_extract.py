@@ -0,0 +1,161 @@
+"""
+Parse-throughput benchmark for the permit page extraction.
+
+Runs the single-pass lxml extractor (archive-scrape/extract.py) and the original
+BeautifulSoup parser from allpermits.py over the saved HTML pages in fixtures/html,
+checks that both produce the same output where their link rules agree (see
+check_equivalent), and reports pages/s and ms/page for each.
+
+    python benchmarks/bench_extract.py                 # run
+    python benchmarks/bench_extract.py --json out.json # also save results
+    python benchmarks/bench_extract.py --make-fixtures # rebuild fixtures from backend/data
+"""
+import argparse
+import html as html_lib
+import json
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR / "archive-scrape"))
+from extract import extract_page
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "html"
+FIXTURE_URL = "https://www.cityofkingston.ca/building-and-renovating/building-permits/"
+# What the original allpermits.py resolved every href against
+BASE = "https://www.cityofkingston.ca"
+
+
+def legacy_parse_page(html):
+    """
+    The BeautifulSoup extraction from the original allpermits.py (baseline commit),
+    with the fetch and the recursion into links under the section URL taken out:
+    it returns the links it would have followed instead.
+    """
+    soup = BeautifulSoup(html, "lxml")
+    content = []
+    links = []
+    main = soup.find("main") or soup.body
+
+    if main:
+        # Grab text and PDFs
+        for tag in main.find_all(["h1","h2","h3","p","a"], recursive=True):
+            if tag.name in ["h1","h2","h3"]:
+                content.append({"heading": tag.get_text(strip=True), "text": "", "pdfs": []})
+            elif tag.name == "p":
+                if content:
+                    content[-1]["text"] += tag.get_text(" ", strip=True) + " "
+                else:
+                    content.append({"heading": None, "text": tag.get_text(" ", strip=True), "pdfs": []})
+            elif tag.name == "a":
+                href = tag.get("href")
+                if href and href.lower().endswith(".pdf"):
+                    pdf_url = urljoin(BASE, href)
+                    if content:
+                        content[-1]["pdfs"].append({"text": tag.get_text(strip=True), "url": pdf_url})
+                    else:
+                        content.append({"heading": None, "text": "", "pdfs":[{"text": tag.get_text(strip=True), "url": pdf_url}]})
+
+    # It followed those under section_url; return them all
+    for a in main.find_all("a", href=True):
+        href = a["href"].strip()
+        full_url = urljoin(BASE, href)
+        links.append(full_url)
+
+    return content, links
+
+
+def check_equivalent(html):
+    """
+    Compare extract_page with the baseline parser where their link rules agree.
+    At the site root, resolving against the page URL and against BASE give the
+    same URLs; extract_page does not return PDF links to crawl.
+
+    Returns:
+        None if equivalent, otherwise a short description of the first difference
+    """
+    content, links = extract_page(BASE + "/", html)
+    legacy_content, legacy_links = legacy_parse_page(html)
+    if content != legacy_content:
+        return "content differs"
+    if links != [link for link in legacy_links if not link.lower().endswith(".pdf")]:
+        return "links differ"
+    return None
+
+
+def make_fixtures():
+    """Render the scraped permit sections back into full pages, with site chrome around <main>"""
+    FIXTURES_DIR.mkdir(parents=True, exist_ok=True)
+    chrome_links = "".join(f'<li><a href="/section-{i}/">Section {i}</a></li>' for i in range(60))
+    for name in ("building-permits", "development-applications", "open-air-fire-permits", "cemeteries"):
+        with open(BACKEND_DIR / "data" / f"{name}.json", "r", encoding="utf-8") as f:
+            sections = json.load(f)
+        body = []
+        for i, section in enumerate(sections):
+            if section.get("heading"):
+                body.append(f"<h{2 + i % 2}>{html_lib.escape(section['heading'])}</h{2 + i % 2}>")
+            for sentence in (section.get("text") or "").split(". "):
+                if sentence.strip():
+                    body.append(f"<p>{html_lib.escape(sentence)}. <a href='sub-{i}/'>more</a></p>")
+            for pdf in section.get("pdfs", []):
+                body.append(f'<p><a href="{html_lib.escape(pdf["url"])}">{html_lib.escape(pdf["text"])}</a></p>')
+        page = (
+            "<!DOCTYPE html><html><head><title>City of Kingston</title>"
+            "<script>window.dataLayer = [];</script><style>body{margin:0}</style></head><body>"
+            f"<header><nav><ul>{chrome_links}</ul></nav></header>"
+            f"<main><!-- content -->{''.join(body)}</main>"
+            f"<footer><ul>{chrome_links}</ul></footer></body></html>"
+        )
+        (FIXTURES_DIR / f"{name}.html").write_text(page, encoding="utf-8")
+        print(f"Wrote {name}.html ({len(page) // 1024} KB)")
+
+
+def bench(fn, pages, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for _, html in pages:
+            fn(FIXTURE_URL, html)
+    elapsed = time.perf_counter() - start
+    count = iterations * len(pages)
+    return {"pages": count, "seconds": round(elapsed, 4),
+            "pages_per_s": round(count / elapsed, 1), "ms_per_page": round(1000 * elapsed / count, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--make-fixtures", action="store_true")
+    args = parser.parse_args()
+
+    if args.make_fixtures:
+        make_fixtures()
+        return
+
+    pages = [(p.name, p.read_text(encoding="utf-8")) for p in sorted(FIXTURES_DIR.glob("*.html"))]
+    if not pages:
+        sys.exit(f"No fixtures in {FIXTURES_DIR}, run with --make-fixtures first")
+
+    for name, html in pages:
+        mismatch = check_equivalent(html)
+        if mismatch:
+            sys.exit(f"Output mismatch on {name}: {mismatch}")
+
+    results = {
+        "fixtures": [name for name, _ in pages],
+        "extract_page": bench(extract_page, pages, args.iterations),
+        "legacy_bs4": bench(lambda url, html: legacy_parse_page(html), pages, args.iterations),
+    }
+    results["speedup"] = round(results["extract_page"]["pages_per_s"] / results["legacy_bs4"]["pages_per_s"], 2)
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark of the speech-to-text engines (app/transcription.py) on the recordings in
+backend/data/recordings.
+
+For every engine configuration it times loading the model and transcribing each
+recording, and reports:
+
+  rtf             real-time factor: transcription seconds / audio seconds (lower is faster)
+  words           words in the transcript
+  word_agreement  share of the reference transcript's words (the first engine's) found
+                  in the same order in this one (difflib matching blocks), as a
+                  rough check that the faster engine still says the same thing
+
+    python benchmarks/bench_transcription.py
+    python benchmarks/bench_transcription.py --engines whisper:base,faster-whisper:base,faster-whisper:small
+    python benchmarks/bench_transcription.py --threads 4 --beam-size 1 --batch-size 16 --json stt.json
+
+An engine is name:model_size[:compute_type], e.g. faster-whisper:base:int8_float32.
+"""
+import argparse
+import difflib
+import json
+import re
+import sys
+import time
+import wave
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent
+BACKEND_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.transcription import ENGINES
+
+RECORDINGS_DIR = BACKEND_DIR / "data" / "recordings"
+DEFAULT_ENGINES = "whisper:base,faster-whisper:base:int8"
+
+_WORD_RE = re.compile(r"[\w']+")
+
+
+def words(text):
+    return _WORD_RE.findall(text.lower())
+
+
+def audio_seconds(path):
+    with wave.open(str(path), "rb") as f:
+        return f.getnframes() / f.getframerate()
+
+
+def word_agreement(reference, words_out):
+    if not reference:
+        return None
+    matcher = difflib.SequenceMatcher(None, reference, words_out, autojunk=False)
+    return round(sum(block.size for block in matcher.get_matching_blocks()) / len(reference), 3)
+
+
+def make_engine(spec, args):
+    name, _, rest = spec.partition(":")
+    model_size, _, compute_type = rest.partition(":")
+    if name not in ENGINES:
+        raise SystemExit(f"Unknown engine {name!r} (known: {', '.join(ENGINES)})")
+    options = {"model_size": model_size or "base", "beam_size": args.beam_size, "threads": args.threads}
+    if name == "faster-whisper":
+        options["compute_type"] = compute_type or "int8"
+        options["batch_size"] = args.batch_size
+    return ENGINES[name](**options)
+
+
+def bench_engine(engine, recordings, repeat):
+    start = time.perf_counter()
+    engine.load()
+    load_s = time.perf_counter() - start
+
+    files = {}
+    for path in recordings:
+        seconds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = engine.transcribe(str(path))
+            seconds.append(time.perf_counter() - start)
+        best = min(seconds)
+        files[path.name] = {
+            "audio_s": round(audio_seconds(path), 2),
+            "transcribe_s": round(best, 3),
+            "rtf": round(best / audio_seconds(path), 4),
+            "segments": len(result.get("segments", [])),
+            "words": len(words(result.get("text", ""))),
+            "text": result.get("text", "").strip(),
+        }
+    audio = sum(f["audio_s"] for f in files.values())
+    transcribe = sum(f["transcribe_s"] for f in files.values())
+    return {
+        "engine": engine.label,
+        "load_s": round(load_s, 2),
+        "rtf": round(transcribe / audio, 4) if audio else None,
+        "words": sum(f["words"] for f in files.values()),
+        "files": files,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", default=DEFAULT_ENGINES, help="comma-separated engines; the first is the reference")
+    parser.add_argument("--recordings", default=str(RECORDINGS_DIR), help="folder of .wav files (or one file)")
+    parser.add_argument("--beam-size", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=0, help="CPU threads (0: the engine decides)")
+    parser.add_argument("--batch-size", type=int, default=8, help="faster-whisper batched decoding (1: sequential)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per file (the fastest counts)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    source = Path(args.recordings)
+    recordings = sorted(source.glob("*.wav")) if source.is_dir() else [source]
+    if not recordings:
+        raise SystemExit(f"No .wav recordings in {source}")
+
+    results = []
+    for spec in args.engines.split(","):
+        engine = make_engine(spec.strip(), args)
+        print(f"{engine.label}...", file=sys.stderr, flush=True)
+        results.append(bench_engine(engine, recordings, args.repeat))
+
+    reference = results[0]
+    for result in results:
+        for name, f in result["files"].items():
+            f["word_agreement"] = word_agreement(words(reference["files"][name]["text"]), words(f["text"]))
+        print(f"{result['engine']:45s} load {result['load_s']:7.2f}s  rtf {result['rtf']:.4f}  "
+              f"speedup {reference['rtf'] / result['rtf']:5.2f}x  words {result['words']}", file=sys.stderr)
+
+    output = {"recordings": [p.name for p in recordings], "engines": results}
+    print(json.dumps(output, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Load generator for the Flask app: drives /api/chat, /api/events, /api/data and the
+pending-requests endpoints at fixed concurrency levels and reports throughput and
+p50/p95/p99 latency per endpoint.
+
+Each worker sends its next request as soon as the previous one completes (closed
+loop), so raising the concurrency step by step shows where throughput stops growing
+and latency starts to: the saturation point. Run the app against the mock LLM and
+on a copy of backend/data, since /api/chat and pending_add write to it:
+
+    python benchmarks/mock_backboard.py --latency lognormal:0.8:0.4 &
+    BACKBOARD_MOCK_URL=http://localhost:8765 BACKBOARD_API_KEY=x python app.py &
+    python benchmarks/loadgen.py --concurrency 1,4,16,32 --duration 20 --json load.json
+
+--mix sets the relative weight of each request type:
+    chat, events, data, pending (GET /api/pending-requests), pending_add (POST), stats
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import requests
+
+QUERIES_FILE = Path(__file__).parent / "fixtures" / "queries.json"
+
+DEFAULT_MIX = "chat=4,events=2,data=2,pending=1,pending_add=0,stats=1"
+
+
+def _chat(session, base, queries):
+    return session.post(f"{base}/api/chat", json={"message": random.choice(queries)}, timeout=300)
+
+
+def _pending_add(session, base, queries):
+    return session.post(f"{base}/api/pending-requests", timeout=60, json={
+        "id": f"load-{uuid.uuid4().hex[:8]}",
+        "type": "loadtest",
+        "query": random.choice(queries),
+        "status": "pending",
+        "timestamp": time.time(),
+    })
+
+
+REQUESTS = {
+    "chat": _chat,
+    "events": lambda session, base, _: session.get(f"{base}/api/events", timeout=60),
+    "data": lambda session, base, _: session.get(f"{base}/api/data", timeout=60),
+    "pending": lambda session, base, _: session.get(f"{base}/api/pending-requests", timeout=60),
+    "pending_add": _pending_add,
+    "stats": lambda session, base, _: session.get(f"{base}/api/stats", timeout=60),
+}
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in REQUESTS:
+            raise SystemExit(f"Unknown request type in --mix: {name} (known: {', '.join(REQUESTS)})")
+        if float(weight or 1) > 0:
+            mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_ms, q):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_ms:
+        return None
+    return round(sorted_ms[min(len(sorted_ms) - 1, max(0, int(round(q * len(sorted_ms))) - 1))], 1)
+
+
+def summarize(samples, seconds):
+    ms = sorted(latency * 1000 for _, latency in samples)
+    errors = sum(1 for ok, _ in samples if not ok)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "errorRate": round(errors / len(samples), 4) if samples else 0,
+        "throughput": round(len(samples) / seconds, 2),
+        "p50Ms": percentile(ms, 0.50),
+        "p95Ms": percentile(ms, 0.95),
+        "p99Ms": percentile(ms, 0.99),
+        "maxMs": round(ms[-1], 1) if ms else None,
+    }
+
+
+def run_step(base, concurrency, duration, mix, queries, warmup):
+    """Run concurrency workers for warmup + duration seconds; only the last duration seconds are measured."""
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    samples = {name: [] for name in names}
+    lock = threading.Lock()
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    def worker():
+        session = requests.Session()
+        while True:
+            sent = time.perf_counter()
+            if sent >= stop_at:
+                break
+            name = random.choices(names, weights)[0]
+            try:
+                ok = REQUESTS[name](session, base, queries).status_code < 400
+            except requests.RequestException:
+                ok = False
+            done = time.perf_counter()
+            if sent >= measure_from and done <= stop_at:
+                with lock:
+                    samples[name].append((ok, done - sent))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    everything = [s for per_endpoint in samples.values() for s in per_endpoint]
+    return {
+        "concurrency": concurrency,
+        "total": summarize(everything, duration),
+        "endpoints": {name: summarize(s, duration) for name, s in samples.items() if s},
+    }
+
+
+def saturation(steps):
+    """First concurrency level whose throughput is under 10% above the previous level's (None if still scaling)."""
+    for prev, step in zip(steps, steps[1:]):
+        if step["total"]["throughput"] < prev["total"]["throughput"] * 1.1:
+            return step["concurrency"]
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:5001", help="base URL of the Flask app")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels, run in turn")
+    parser.add_argument("--duration", type=float, default=20, help="measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=2, help="unmeasured seconds before each level")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    with open(QUERIES_FILE, "r", encoding="utf-8") as f:
+        queries = [q["query"] for q in json.load(f)]
+    mix = parse_mix(args.mix)
+    base = args.url.rstrip("/")
+
+    steps = []
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        step = run_step(base, concurrency, args.duration, mix, queries, args.warmup)
+        steps.append(step)
+        total = step["total"]
+        print(f"concurrency {concurrency:4d}: {total['throughput']:8.2f} req/s  p50 {total['p50Ms']} ms  "
+              f"p95 {total['p95Ms']} ms  p99 {total['p99Ms']} ms  errors {total['errors']}", file=sys.stderr, flush=True)
+
+    results = {
+        "url": base,
+        "mix": mix,
+        "duration": args.duration,
+        "steps": steps,
+        "saturationConcurrency": saturation(steps),
+    }
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
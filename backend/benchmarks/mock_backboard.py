@@ -0,0 +1,184 @@
+"""
+Local stand-in for the Backboard API, for load testing the Flask app offline.
+
+Serves the calls EventsChatbot makes (through chatbot_module/local_backboard.py,
+selected by BACKBOARD_MOCK_URL) and answers each message after a wait drawn from a
+latency distribution plus the time to "generate" the answer at a given token rate.
+A share of calls can fail with a chosen status code.
+
+    python benchmarks/mock_backboard.py --port 8765 --latency lognormal:0.8:0.4 --tokens-per-second 60 --error-rate 0.02
+    BACKBOARD_MOCK_URL=http://localhost:8765 BACKBOARD_API_KEY=x python app.py
+
+Latency distributions (seconds, time to first token):
+    fixed:0.5   uniform:0.2:1.5   lognormal:<median>:<sigma>   exp:<mean>
+
+GET /stats returns call, error and in-flight counts.
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_WORDS = ("the city permit council application bylaw meeting committee kingston residents "
+          "approved requires process fee licence property planning review submit").split()
+
+
+def parse_latency(spec):
+    """'lognormal:0.8:0.4' -> a function returning one latency sample in seconds."""
+    kind, *params = spec.split(":")
+    values = [float(p) for p in params]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda: random.lognormvariate(math.log(median), sigma)
+    if kind == "exp":
+        return lambda: random.expovariate(1 / values[0])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class MockState:
+    """Settings and counters shared by the request handlers."""
+
+    def __init__(self, latency, tokens, tokens_per_second, error_rate, error_status):
+        self.latency = latency
+        self.tokens = tokens
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.counts = {}
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def enter(self, call):
+        with self.lock:
+            self.counts[call] = self.counts.get(call, 0) + 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def leave(self, failed=False):
+        with self.lock:
+            self.in_flight -= 1
+            self.errors += failed
+
+    def stats(self):
+        with self.lock:
+            return {"calls": dict(self.counts), "errors": self.errors,
+                    "inFlight": self.in_flight, "maxInFlight": self.max_in_flight}
+
+
+_ROUTES = [
+    ("create_assistant", re.compile(r"^/assistants$")),
+    ("create_thread", re.compile(r"^/assistants/(?P<assistant_id>[\w-]+)/threads$")),
+    ("add_message", re.compile(r"^/threads/(?P<thread_id>[\w-]+)/messages$")),
+]
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    state = None  # MockState, set by serve()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._json(200, self.state.stats())
+        else:
+            self._json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        for call, pattern in _ROUTES:
+            match = pattern.match(self.path)
+            if match:
+                break
+        else:
+            self._json(404, {"error": "Not found"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        state = self.state
+        state.enter(call)
+        failed = False
+        try:
+            if call == "create_assistant":
+                self._json(200, {"assistant_id": uuid.uuid4().hex, "name": payload.get("name")})
+            elif call == "create_thread":
+                self._json(200, {"thread_id": uuid.uuid4().hex, "assistant_id": match["assistant_id"]})
+            else:
+                failed = self._message(match["thread_id"], payload)
+        finally:
+            state.leave(failed)
+
+    def _message(self, thread_id, payload):
+        """Answer a message; True if this call was made to fail."""
+        state = self.state
+        time.sleep(state.latency())
+        if random.random() < state.error_rate:
+            self._json(state.error_status, {"error": "Injected failure"})
+            return True
+        tokens = [random.choice(_WORDS) for _ in range(state.tokens)]
+        delay = 1 / state.tokens_per_second if state.tokens_per_second else 0
+        if not payload.get("stream"):
+            time.sleep(delay * len(tokens))
+            self._json(200, {"content": " ".join(tokens), "thread_id": thread_id})
+            return False
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for i, token in enumerate(tokens):
+            time.sleep(delay)
+            self.wfile.write(f"data: {json.dumps({'delta': token if i == 0 else ' ' + token})}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        return False
+
+
+def serve(host, port, state):
+    handler = type("Handler", (MockHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="lognormal:0.8:0.4", help="time to first token distribution")
+    parser.add_argument("--tokens", type=int, default=150, help="tokens per answer")
+    parser.add_argument("--tokens-per-second", type=float, default=60, help="generation speed (0: instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of messages that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    args = parser.parse_args()
+
+    state = MockState(parse_latency(args.latency), args.tokens, args.tokens_per_second, args.error_rate, args.error_status)
+    server = serve(args.host, args.port, state)
+    print(f"Mock Backboard on http://{args.host}:{args.port} (latency {args.latency}, "
+          f"{args.tokens} tokens at {args.tokens_per_second}/s, error rate {args.error_rate})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
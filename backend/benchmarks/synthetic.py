@@ -0,0 +1,165 @@
+"""
+Synthetic inputs for the benchmarks: scaled copies of backend/data, diarization and
+Whisper segment lists, and a Backboard client that answers locally.
+
+Scaled corpora keep every real item and add (scale - 1) synthetic items per real
+one. A synthetic item has the shape of a real item of the same category (same
+keys, same nesting, same number of words per field) with its words drawn from the
+whole archive's vocabulary, so term frequencies, passage counts and JSON size grow
+like the real archive would. Synthetic items share words with the real ones and
+compete with them in ranking, which is what the recall check measures.
+"""
+import asyncio
+import copy
+import json
+import random
+import re
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+BACKEND_DIR = Path(__file__).parent.parent
+DATA_DIR = BACKEND_DIR / "data"
+
+# Values kept as they are in synthetic items (identifiers, dates, links, speaker labels)
+KEEP_FIELDS = {"id", "date", "speaker", "audio_file", "transcript_file", "meeting_url", "url", "timestamp", "status", "type"}
+
+_WORD_RE = re.compile(r"\S+")
+
+
+def _strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for k, v in value.items():
+            if k not in KEEP_FIELDS:
+                yield from _strings(v)
+    elif isinstance(value, list):
+        for v in value:
+            yield from _strings(v)
+
+
+def _vocabulary(items):
+    words = []
+    for item in items:
+        for s in _strings(item):
+            if not s.startswith(("http://", "https://")):
+                words.extend(_WORD_RE.findall(s))
+    return words or ["lorem"]
+
+
+def _synthesize(value, vocab, rng):
+    """value with every free-text string replaced by as many random words from vocab."""
+    if isinstance(value, str):
+        if value.startswith(("http://", "https://")):
+            return value
+        n = len(_WORD_RE.findall(value))
+        return " ".join(rng.choices(vocab, k=n)) if n else value
+    if isinstance(value, dict):
+        return {k: (copy.deepcopy(v) if k in KEEP_FIELDS else _synthesize(v, vocab, rng)) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_synthesize(v, vocab, rng) for v in value]
+    return value
+
+
+def scale_items(items, scale, rng, vocab=None):
+    """The real items followed by (scale - 1) synthetic items per real item (words from vocab, default: items')."""
+    if scale <= 1 or not items:
+        return list(items)
+    vocab = vocab or _vocabulary(items)
+    out = list(items)
+    for n in range(len(items) * (int(scale) - 1)):
+        template = items[n % len(items)]
+        item = _synthesize(template, vocab, rng)
+        if isinstance(item, dict) and "id" in item:
+            item["id"] = f"{item['id']}-synthetic-{n}"
+        out.append(item)
+    return out
+
+
+def scale_corpus(dest, scale, source=DATA_DIR, seed=0):
+    """
+    Write a copy of the archive scaled scale times into dest.
+
+    Args:
+        dest: Folder to write the *.json files to (created if missing)
+        scale: Multiplier for every list file (1 copies the archive unchanged)
+        source: Folder with the real archive (backend/data)
+        seed: Random seed; the same seed and scale give the same corpus
+
+    Returns:
+        {file stem: item count}
+    """
+    dest = Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    archive = {}
+    for json_file in sorted(Path(source).glob("*.json")):
+        with open(json_file, "r", encoding="utf-8") as f:
+            archive[json_file.name] = json.load(f)
+    vocab = _vocabulary([data for data in archive.values() if isinstance(data, list)])
+    counts = {}
+    for name, data in archive.items():
+        if isinstance(data, list):
+            data = scale_items(data, scale, rng, vocab)
+        with open(dest / name, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        counts[Path(name).stem] = len(data)
+    return counts
+
+
+def diarization_segments(hours, speakers=6, seed=0):
+    """pyannote-like speaker turns covering hours of audio: 2-40 s turns with short gaps and overlaps."""
+    rng = random.Random(seed)
+    segments = []
+    t = 0.0
+    total = hours * 3600
+    speaker = 0
+    while t < total:
+        length = rng.uniform(2, 40)
+        segments.append({"start": t, "end": min(t + length, total), "speaker": f"SPEAKER_{speaker:02d}"})
+        speaker = rng.choice([s for s in range(speakers) if s != speaker] or [0])
+        # Mostly a short pause, sometimes the next speaker starts before this one finishes
+        t += length + rng.uniform(-1.0, 1.5)
+    return segments
+
+
+def whisper_segments(hours, seed=0):
+    """Whisper-like transcription segments covering hours of audio: 2-8 s of text each."""
+    rng = random.Random(seed + 1)
+    words = _vocabulary(json.loads((DATA_DIR / "bylaws_data.json").read_text(encoding="utf-8")))
+    segments = []
+    t = 0.0
+    total = hours * 3600
+    while t < total:
+        length = rng.uniform(2, 8)
+        segments.append({"start": t, "end": min(t + length, total),
+                         "text": " " + " ".join(rng.choices(words, k=int(length * 2.5)))})
+        t += length
+    return segments
+
+
+class StubBackboardClient:
+    """
+    Offline stand-in for backboard.BackboardClient with the calls EventsChatbot makes.
+    add_message waits latency seconds and answers with a fixed text; prompts are kept
+    in .prompts for inspection.
+    """
+
+    def __init__(self, api_key=None, latency=0.0, answer="This is a benchmark answer from the archive."):
+        self.latency = latency
+        self.answer = answer
+        self.prompts = []
+
+    async def create_assistant(self, name=None, system_prompt=None, **kwargs):
+        return SimpleNamespace(assistant_id=uuid.uuid4().hex, name=name)
+
+    async def create_thread(self, assistant_id, **kwargs):
+        return SimpleNamespace(thread_id=uuid.uuid4().hex, assistant_id=assistant_id)
+
+    async def add_message(self, thread_id, content, **kwargs):
+        self.prompts.append(content)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return SimpleNamespace(content=self.answer, thread_id=thread_id, created_at=time.time())
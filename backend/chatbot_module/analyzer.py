@@ -0,0 +1,314 @@
+"""
+Query/document analysis for archive search.
+
+The same analyze() runs over passages when they are indexed and over the user's
+question at query time: lowercase, split into words, drop stopwords ("what",
+"the", "how", ...) and reduce each word with a light suffix stemmer, so
+"permits", "permitted" and "permit" all become "permit".
+
+Misspelled query words are resolved through a deletion-neighbourhood index
+(SymSpell): every vocabulary term is stored under all the strings obtained by
+deleting up to two of its characters, so candidate corrections for a query word
+are found with a handful of dict lookups instead of comparing it against the
+whole vocabulary. Indexes are built once per category when passages are built
+(the deletion table on the first misspelled query) and reused while the category
+is unchanged, which keeps query analysis well under a millisecond.
+"""
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being
+below between both but by can could did do does doing don down during each few for from
+further had has have having he her here hers herself him himself his how i if in into is it
+its itself just me more most my myself no nor not now of off on once only or other our ours
+ourselves out over own same she should so some such than that the their theirs them
+themselves then there these they this those through to too under until up very was we were
+what when where which while who whom why will with would you your yours yourself yourselves
+also get got know like need tell want please thanks thank hi hello let find show give much many
+""".split())
+
+_WORD_RE = re.compile(r"[^\W_]+")
+_VOWELS = set("aeiouy")
+
+
+def tokenize(text):
+    """Lowercase words of text (letters and digits; punctuation and underscores split words)."""
+    return _WORD_RE.findall(text.lower())
+
+
+@lru_cache(maxsize=100000)
+def stem(word):
+    """
+    Light suffix stemmer: plurals, -ing, -ed and a final -e.
+    Deliberately conservative; it only has to map the forms people type onto the
+    forms in the archive, and the same function is applied on both sides.
+    """
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    for suffix in ("ing", "ed"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and _VOWELS & set(word[:-len(suffix)]):
+            word = word[:-len(suffix)]
+            # permitted -> permitt -> permit, running -> runn -> run
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in "lsz":
+                word = word[:-1]
+            break
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+def analyze(text):
+    """Terms of text: tokenized, stopwords removed, stemmed. Used at index and query time."""
+    return [stem(w) for w in tokenize(text) if len(w) > 1 and w not in STOPWORDS]
+
+
+def max_edits(term):
+    """Edit distance tolerated for a term: none for short words, 1 up to 7 letters, then 2."""
+    if len(term) < 4 or not term.isalpha():
+        return 0
+    return 1 if len(term) < 8 else 2
+
+
+@lru_cache(maxsize=100000)
+def deletes(term, distance):
+    """All strings obtained by deleting up to distance characters from term (term included). Cached; do not modify."""
+    result = {term}
+    frontier = {term}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))}
+        result |= frontier
+    return result
+
+
+def edit_distance(a, b, limit):
+    """Damerau-Levenshtein (optimal string alignment) distance, or limit + 1 once it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if prev2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def closest(term, candidates, limit):
+    """Candidates at the smallest edit distance (<= limit) from term."""
+    scored = []
+    for candidate in candidates:
+        if max_edits(candidate) == 0:
+            continue
+        distance = edit_distance(term, candidate, limit)
+        if distance <= limit:
+            scored.append((distance, candidate))
+    if not scored:
+        return []
+    best = min(d for d, _ in scored)
+    return sorted(c for d, c in scored if d == best)
+
+
+class PassageIndex:
+    """Inverted index and typo index over the passages of one category."""
+
+    def __init__(self, passages):
+        self.passages = passages
+        # term -> [(passage position, term frequency)]
+        self.postings = defaultdict(list)
+        for pos, passage in enumerate(passages):
+            for term, tf in Counter(analyze(passage["search"])).items():
+                self.postings[term].append((pos, tf))
+        self.postings = dict(self.postings)
+        self._neighbours = None
+        self._neighbours_lock = threading.Lock()
+
+    @property
+    def neighbours(self):
+        """Deletion variant -> vocabulary terms it was derived from. Built on the first misspelled query."""
+        if self._neighbours is None:
+            with self._neighbours_lock:
+                if self._neighbours is None:
+                    neighbours = defaultdict(set)
+                    for term in self.postings:
+                        for variant in deletes(term, max_edits(term)):
+                            neighbours[variant].add(term)
+                    self._neighbours = dict(neighbours)
+        return self._neighbours
+
+    def __contains__(self, term):
+        return term in self.postings
+
+    def parent_of(self, pos):
+        """Parent item id of the passage at pos."""
+        return self.passages[pos]["parent_id"]
+
+    def candidates(self, variants):
+        """Vocabulary terms sharing a deletion variant with a query term (possible corrections)."""
+        found = set()
+        for variant in variants:
+            terms = self.neighbours.get(variant)
+            if terms:
+                found |= terms
+        return found
+
+    def search(self, term_groups, min_match, max_items=5, max_passages_per_item=2):
+        """
+        Rank the passages of this category.
+
+        Args:
+            term_groups: One list of (vocabulary term, weight) per query term; a query term
+                         matches if any term of its group occurs
+            min_match: Number of query terms an item (across its passages) must match
+            max_items: Best-scoring items kept
+            max_passages_per_item: Best passages kept per item
+
+        Returns:
+            List of passages, best item first and its best passages first
+        """
+        return self._rank(term_groups, min_match, max_items, max_passages_per_item, {})
+
+    def search_many(self, requests, max_items=5, max_passages_per_item=2):
+        """
+        Rank the passages of this category for several queries.
+
+        The queries are still ranked one after another, exactly as search() would rank
+        them; what they share is one memo of term -> (postings, idf), so a term that
+        several queries use is looked up and its idf computed only once.
+
+        Args:
+            requests: List of (term_groups, min_match) as for search
+            max_items: Best-scoring items kept per query
+            max_passages_per_item: Best passages kept per item
+
+        Returns:
+            One list of passages per request, in order
+        """
+        lookup = {}
+        return [self._rank(term_groups, min_match, max_items, max_passages_per_item, lookup)
+                for term_groups, min_match in requests]
+
+    def _term(self, term, lookup):
+        """(postings, idf) of a vocabulary term, or None; memoized in lookup."""
+        if term not in lookup:
+            postings = self.postings.get(term)
+            lookup[term] = (postings, math.log(1 + len(self.passages) / len(postings))) if postings else None
+        return lookup[term]
+
+    def _rank(self, term_groups, min_match, max_items, max_passages_per_item, lookup):
+        present = sum(1 for group in term_groups if any(self._term(term, lookup) for term, _ in group))
+        if present < min_match:
+            return []
+        # passage position -> {group index: contribution}
+        matched = defaultdict(dict)
+        for g, group in enumerate(term_groups):
+            for term, weight in group:
+                found = self._term(term, lookup)
+                if not found:
+                    continue
+                postings, idf = found
+                for pos, tf in postings:
+                    contribution = weight * idf * (1 + math.log(tf))
+                    if contribution > matched[pos].get(g, 0):
+                        matched[pos][g] = contribution
+
+        # Items: groups found across their passages (identical items share a parent id)
+        items = {}
+        for pos, groups in matched.items():
+            item = items.setdefault(self.parent_of(pos), {"best": {}, "passages": [], "first": pos})
+            for g, contribution in groups.items():
+                if contribution > item["best"].get(g, 0):
+                    item["best"][g] = contribution
+            item["passages"].append((len(groups), sum(groups.values()), pos))
+
+        ranked = []
+        for item in items.values():
+            if len(item["best"]) < min_match:
+                continue
+            coverage = len(item["best"]) / len(term_groups)
+            ranked.append((-coverage * sum(item["best"].values()), item["first"], item))
+        ranked.sort(key=lambda r: (r[0], r[1]))
+
+        results = []
+        for _, _, item in ranked[:max_items]:
+            best = sorted(item["passages"], key=lambda p: (-p[0], -p[1], p[2]))
+            results.extend(self.passages[pos] for _, _, pos in best[:max_passages_per_item])
+        return results
+
+
+class QueryAnalysis:
+    """A query analyzed once and resolved against each category's vocabulary."""
+
+    def __init__(self, query, indexes):
+        """
+        Args:
+            query: User's question
+            indexes: {category: PassageIndex} that will be searched
+        """
+        self.terms = list(dict.fromkeys(analyze(query)))
+        # A term that is a real word somewhere in the archive is never "corrected"
+        self.known = {t for t in self.terms if any(t in index for index in indexes.values())}
+        self.corrections = {}
+        for term in self.terms:
+            limit = max_edits(term)
+            if term in self.known or not limit:
+                continue
+            variants = deletes(term, limit)
+            candidates = set()
+            for index in indexes.values():
+                candidates |= index.candidates(variants)
+            self.corrections[term] = closest(term, candidates, limit)
+        # Ask for every term of a short query, most terms of a long one (natural questions carry filler words)
+        n = len(self.terms)
+        self.min_match = n if n <= 3 else math.ceil(0.6 * n)
+
+    def term_groups(self, index):
+        """One [(term, weight)] list per query term: the term itself, or its corrections present in this index."""
+        groups = []
+        for term in self.terms:
+            if term in self.corrections:
+                groups.append([(c, 0.8) for c in self.corrections[term] if c in index])
+            else:
+                groups.append([(term, 1.0)])
+        return groups
+
+
+class IndexCache:
+    """PassageIndex per category, rebuilt only when the category's passage list changes."""
+
+    def __init__(self):
+        self._by_category = {}
+        self._lock = threading.Lock()
+
+    def get(self, category, passages):
+        with self._lock:
+            cached = self._by_category.get(category)
+        if cached is not None and cached[0] is passages:
+            return cached[1]
+        index = PassageIndex(passages)
+        with self._lock:
+            self._by_category[category] = (passages, index)
+        return index
+
+
+_index_cache = IndexCache()
+
+
+def index_for(category, passages):
+    """PassageIndex of a category's passages from the shared cache."""
+    return _index_cache.get(category, passages)
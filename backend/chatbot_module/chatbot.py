@@ -2,37 +2,33 @@
 import asyncio
 import os
 import json
+import sys
 import time
+from collections import ChainMap
 from pathlib import Path
 from backboard import BackboardClient
 from dotenv import load_dotenv
 
+try:
+    from chatbot_module.snapshot import load_archive
+    from chatbot_module.context import ContextAssembler, count_tokens
+    from chatbot_module.chunking import passage_text, passages_for
+    from chatbot_module.analyzer import QueryAnalysis, index_for
+    from chatbot_module.local_backboard import LocalBackboardClient
+    from chatbot_module.resilient import ResilientClient, BackboardUnavailable
+except ImportError:  # running chatbot.py directly from this folder
+    from snapshot import load_archive
+    from context import ContextAssembler, count_tokens
+    from chunking import passage_text, passages_for
+    from analyzer import QueryAnalysis, index_for
+    from local_backboard import LocalBackboardClient
+    from resilient import ResilientClient, BackboardUnavailable
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.storage import extend_json_list
+
 # Load environment variables
 load_dotenv()
 
-
-def _extract_searchable_content(obj, max_chars=50000):
-    """
-    Recursively extract all string content from an item for search (titles, body text, nested content).
-    Ensures archive search goes through full content, not just top-level keys.
-    """
-    out = []
-
-    def _walk(val):
-        if isinstance(val, str):
-            out.append(val)
-        elif isinstance(val, dict):
-            for k, v in val.items():
-                _walk(v)
-        elif isinstance(val, list):
-            for v in val:
-                _walk(v)
-
-    _walk(obj)
-    text = " ".join(out)
-    return (text[:max_chars] + " ") if len(text) > max_chars else text
-
-
 def _item_to_readable_text(item, max_chars=700):
     """Turn a single archive item into readable text for AI context (actual content, not raw JSON)."""
     if isinstance(item, dict):
@@ -64,15 +60,32 @@ def _item_to_readable_text(item, max_chars=700):
     return str(item)[:max_chars]
 
 
+def _parent_items(passage_results):
+    """{category: [passages]} -> {category: [distinct parent items, in order]}, or None."""
+    if not passage_results:
+        return None
+    results = {}
+    for category, passages in passage_results.items():
+        seen = set()
+        items = []
+        for passage in passages:
+            if passage["parent_id"] not in seen:
+                seen.add(passage["parent_id"])
+                items.append(passage["item"])
+        results[category] = items
+    return results
+
+
 class EventsChatbot:
     """Chatbot that uses the archive as context and always returns AI-generated answers."""
     
-    def __init__(self, data_folder_path=None):
+    def __init__(self, data_folder_path=None, snapshot=None):
         """
         Initialize the chatbot with data from all JSON files
         
         Args:
             data_folder_path: Path to data folder. If None, will look in project root
+            snapshot: Optional ArchiveSnapshot to use instead of reading the data folder
         """
         # Load all JSON data from the data folder
         if data_folder_path is None:
@@ -80,37 +93,45 @@ class EventsChatbot:
             project_root = Path(__file__).parent.parent.parent
             data_folder_path = project_root / "backend" / "data"
         
-        self.all_data = {}
         self.data_path = Path(data_folder_path)
-        data_path = Path(data_folder_path)
-        
-        if data_path.exists():
-            for json_file in data_path.glob("*.json"):
-                try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        file_name = json_file.stem
-                        self.all_data[file_name] = json.load(f)
-                        print(f"Loaded {file_name}: {len(self.all_data[file_name])} items")
-                except Exception as e:
-                    print(f"Error loading {json_file}: {e}")
+        self.snapshot = snapshot
+        if snapshot is not None:
+            # Updates go to our own dict on top of the shared snapshot (which is never modified,
+            # and whose categories may be decoded lazily from a compiled snapshot)
+            self.all_data = ChainMap({}, snapshot.all_data)
         else:
-            raise ValueError(f"Data folder not found at {data_path}")
+            self.all_data = load_archive(self.data_path)
         
         # Initialize AI client
         api_key = os.getenv("BACKBOARD_API_KEY")
         if not api_key:
             raise ValueError("BACKBOARD_API_KEY not found in environment variables")
         
-        self.client = BackboardClient(api_key=api_key)
+        # BACKBOARD_MOCK_URL points the chatbot at a local stand-in server (load testing)
+        mock_url = os.getenv("BACKBOARD_MOCK_URL")
+        client = LocalBackboardClient(mock_url, api_key=api_key) if mock_url else BackboardClient(api_key=api_key)
+        # Deadlines, retries and the shared circuit breaker (see resilient.py)
+        self.client = ResilientClient(client)
         self.assistant = None
+        # Concurrent questions of a batch share one create_assistant call
+        self._assistant_lock = asyncio.Lock()
         self.thread = None
+
+        # Upper bound on archive context tokens per prompt, for predictable LLM latency
+        self.context_token_budget = int(os.getenv("CHAT_CONTEXT_TOKENS", "2000"))
+        self.last_context = None
+        self.last_prompt_tokens = 0
+        self.last_timings = {}
     
-    async def initialize_ai(self):
-        """Initialize the AI assistant and thread"""
-        if not self.assistant:
-            self.assistant = await self.client.create_assistant(
-                name="Kingston Events Assistant",
-                system_prompt="""You are a helpful assistant for Kingston city services, events, permits, bylaws, and council information.
+    async def ensure_assistant(self):
+        """Create the AI assistant if this chatbot does not have one yet"""
+        if self.assistant:
+            return self.assistant
+        async with self._assistant_lock:
+            if not self.assistant:
+                self.assistant = await self.client.create_assistant(
+                    name="Kingston Events Assistant",
+                    system_prompt="""You are a helpful assistant for Kingston city services, events, permits, bylaws, and council information.
 
 When the user asks a question, you will be given CONTEXT from the Kingston archive (search results or relevant data). Your job is to:
 1. Answer the user's question in a natural, conversational way using that context.
@@ -120,106 +141,138 @@ When the user asks a question, you will be given CONTEXT from the Kingston archi
 5. If the context is empty or not relevant, say you couldn't find that in the archive and offer to help with other Kingston city topics you do have information on.
 
 Be concise, friendly, and accurate. Do not just list search results; write as if you are answering the question."""
-            )
-        
+                )
+        return self.assistant
+
+    async def initialize_ai(self):
+        """Initialize the AI assistant and a new thread (returned, and kept as self.thread)"""
+        await self.ensure_assistant()
         # Create a new thread for this request (avoids 500 on second prompt when reusing thread across requests/event loops)
         self.thread = await self.client.create_thread(self.assistant.assistant_id)
+        return self.thread
 
-    def search_events_local(self, query):
+    def search_passages(self, query, max_items_per_category=5, max_passages_per_item=2):
         """
-        Search for data across all local JSON files
-        Uses AND logic - ALL keywords must match for a result to be included
-        For AI responses, only checks if keywords match the response content (not the original query)
+        Search for data across all local JSON files, at passage level
+        The query goes through the same analyzer as the passages (stopwords removed, stemmed);
+        words that appear nowhere in the archive are matched against close spellings.
+        Items must match every query term (for short queries) or most of them (longer
+        questions), possibly across passages; their best passages are returned
+        For AI responses, passages are the original query plus the response text
         
         Args:
             query: User's search query (string)
+            max_items_per_category: Best-scoring items kept per file
+            max_passages_per_item: Best passages kept per item
             
         Returns:
-            dict with matching data grouped by file or None if no matches found
+            dict {file name: [passages]} (best item first, its best passages first) or None if no matches found
         """
-        query_lower = query.lower()
-        keywords = [k for k in query_lower.split() if len(k) > 2]  # Filter out short words
+        indexes = self._category_indexes()
+        analysis = QueryAnalysis(query, indexes)
         
         # If no valid keywords, return None
-        if not keywords:
+        if not analysis.terms:
             return None
         
         matching_results = {}
+        for file_name, index in indexes.items():
+            passages = index.search(analysis.term_groups(index), analysis.min_match,
+                                    max_items=max_items_per_category, max_passages_per_item=max_passages_per_item)
+            if passages:
+                matching_results[file_name] = passages
         
-        # Fuzzy matching function
-        def fuzzy_match(text, keywords):
-            for keyword in keywords:
-                if keyword not in text:
-                    # Check if any word in text contains this keyword as substring
-                    words = text.split()
-                    if not any(keyword in word for word in words):
-                        return False
-            return True
+        return matching_results if matching_results else None
+
+    def search_passages_batch(self, queries, max_items_per_category=5, max_passages_per_item=2):
+        """
+        search_passages for several queries at once: the category indexes are resolved once,
+        and each index ranks the queries in turn with one shared term lookup memo
+        (see PassageIndex.search_many).
         
-        # Search across all loaded data files
-        for file_name, data_list in self.all_data.items():
-            if not isinstance(data_list, list):
-                continue
-                
-            matching_items = []
-            seen_in_category = set()  # Track duplicates within this category only
-            
-            for item in data_list:
-                item_hash = json.dumps(item, sort_keys=True)  # Create unique hash
-                
-                # Skip if we've already seen this exact item in this category
-                if item_hash in seen_in_category:
+        Returns:
+            One search_passages result per query, in order
+        """
+        indexes = self._category_indexes()
+        analyses = [QueryAnalysis(query, indexes) for query in queries]
+        searched = [i for i, analysis in enumerate(analyses) if analysis.terms]
+        results = [{} for _ in queries]
+        for file_name, index in indexes.items():
+            requests = [(analyses[i].term_groups(index), analyses[i].min_match) for i in searched]
+            ranked = index.search_many(requests, max_items=max_items_per_category,
+                                       max_passages_per_item=max_passages_per_item)
+            for i, passages in zip(searched, ranked):
+                if passages:
+                    results[i][file_name] = passages
+        return [r or None for r in results]
+
+    def _category_indexes(self):
+        """{category: PassageIndex} of every list category (prebuilt by a compiled snapshot unless updated since)."""
+        indexes = {}
+        for file_name in self.all_data:
+            index = None
+            if self.snapshot is not None and file_name not in self.all_data.maps[0]:
+                index = self.snapshot.index(file_name)
+            if index is None:
+                data_list = self.all_data[file_name]
+                if not isinstance(data_list, list):
                     continue
-                
-                # Build searchable text from full content (titles, body, nested strings), not just keys
-                if file_name == "ai_responses" and isinstance(item, dict) and "response" in item:
-                    item_text = (item.get("query", "") + " " + item.get("response", "")).lower()
-                else:
-                    item_text = _extract_searchable_content(item).lower()
+                index = index_for(file_name, passages_for(file_name, data_list))
+            indexes[file_name] = index
+        return indexes
 
-                # Check if ALL keywords match using fuzzy substring matching
-                if fuzzy_match(item_text, keywords):
-                    # Calculate match score based on how many times keywords appear
-                    match_score = sum(item_text.count(keyword) for keyword in keywords)
-                    seen_in_category.add(item_hash)
-                    matching_items.append({
-                        'item': item,
-                        'score': match_score
-                    })
-            
-            # Sort by match score (highest first) and keep top results
-            if matching_items:
-                matching_items.sort(key=lambda x: x['score'], reverse=True)
-                matching_results[file_name] = [item['item'] for item in matching_items[:5]]
+    def search_events_local(self, query):
+        """
+        Search for data across all local JSON files
+        Uses AND logic - ALL keywords must match for a result to be included
         
-        return matching_results if matching_results else None
+        Args:
+            query: User's search query (string)
+            
+        Returns:
+            dict with matching data grouped by file or None if no matches found
+        """
+        return _parent_items(self.search_passages(query))
     
-    def build_archive_context(self, results, max_items_per_category=6, max_chars_per_item=700):
+    def _context_candidates(self, results, max_items_per_category=6, max_chars_per_item=700, weight=1.0):
+        """Turn {category: [items or passages]} into context candidates for the ContextAssembler."""
+        candidates = []
+        for file_name, items in (results or {}).items():
+            for rank, item in enumerate(items[:max_items_per_category]):
+                if isinstance(item, dict) and "parent_id" in item:
+                    # A passage from search_passages: send the passage that matched, not the item's prefix
+                    candidates.append({
+                        "category": file_name,
+                        "id": item["id"],
+                        "text": passage_text(item),
+                        "rank": rank,
+                        "weight": weight,
+                    })
+                    continue
+                candidates.append({
+                    "category": file_name,
+                    "text": _item_to_readable_text(item, max_chars=max_chars_per_item),
+                    "rank": rank,
+                    "weight": weight,
+                })
+        return candidates
+
+    def build_archive_context(self, results, max_items_per_category=6, max_chars_per_item=700, query=None, token_budget=None):
         """
         Build a single string of actual archive content for the AI to read and use in its answer.
         Each block is labeled with [Source: category] so the AI can cite and link answers to the data.
+        The total size is capped at token_budget tokens (default: self.context_token_budget);
+        passages most relevant to query are kept first and near-duplicates are dropped.
         """
         if not results:
             return ""
-        lines = [
-            "The following is relevant content from the Kingston city archive. Each block is labeled with [Source: category] so you can cite it (e.g. 'According to the Building Permits data...'). Use this content to answer the user's question. If the user's question is not answered by this content, say so and offer related information from the archive where possible.\n"
-        ]
-        for file_name, items in results.items():
-            category_label = file_name.replace("_", " ").title()
-            # Use file_name as stable reference (no spaces) for linking
-            source_tag = f"[Source: {file_name}]"
-            lines.append(f"\n--- {category_label} {source_tag} ---")
-            for i, item in enumerate(items[:max_items_per_category]):
-                text = _item_to_readable_text(item, max_chars=max_chars_per_item)
-                if text.strip():
-                    lines.append(f"\n{source_tag}\n{text.strip()}")
-        return "\n".join(lines)
+        assembler = ContextAssembler(token_budget or self.context_token_budget)
+        context = assembler.assemble(query or "", self._context_candidates(results, max_items_per_category, max_chars_per_item))
+        self.last_context = context
+        return context["text"]
     
-    def get_broader_context(self, query, max_items_total=12):
-        """
-        When keyword search returns little or nothing, pull in some content from archive
-        so the AI still has something to work with (e.g. by category name or first items).
-        """
+    def _broader_results(self, query, max_items_total=12):
+        """Some items per category (more for categories named in the query), as {category: [items]}."""
         query_lower = query.lower()
         words = [w for w in query_lower.split() if len(w) > 2]
         collected = []
@@ -234,13 +287,20 @@ Be concise, friendly, and accurate. Do not just list search results; write as if
                     collected.append((file_name, item))
             if len(collected) >= max_items_total:
                 break
-        if not collected:
-            return ""
-        # Build same format as build_archive_context
         by_file = {}
         for fn, item in collected[:max_items_total]:
             by_file.setdefault(fn, []).append(item)
-        return self.build_archive_context(by_file, max_items_per_category=4, max_chars_per_item=500)
+        return by_file
+
+    def get_broader_context(self, query, max_items_total=12):
+        """
+        When keyword search returns little or nothing, pull in some content from archive
+        so the AI still has something to work with (e.g. by category name or first items).
+        """
+        by_file = self._broader_results(query, max_items_total)
+        if not by_file:
+            return ""
+        return self.build_archive_context(by_file, max_items_per_category=4, max_chars_per_item=500, query=query)
     
     def format_event_response(self, results):
         """
@@ -273,6 +333,18 @@ Be concise, friendly, and accurate. Do not just list search results; write as if
         
         return response
     
+    def fallback_response(self, matching_passages, error):
+        """
+        Answer without the AI while Backboard is unavailable: the ranked archive matches
+        formatted by format_event_response (or a note that nothing matched).
+        """
+        print(f"[fallback] AI unavailable, answering from the archive: {error}", flush=True)
+        results = _parent_items(matching_passages)
+        text = self.format_event_response(results)
+        if not text:
+            text = "The AI assistant is temporarily unavailable and no archive records matched your question. Please try again shortly."
+        return "The AI assistant is temporarily unavailable, so here are the closest archive records.\n\n" + text if results else text
+
     def save_ai_response(self, query, response_text, sources=None):
         """
         Save AI response to persistent data file and link it to the archive records used.
@@ -282,46 +354,50 @@ Be concise, friendly, and accurate. Do not just list search results; write as if
             response_text: AI's response text
             sources: Optional list of { 'category': str, 'data': dict } from the archive (links this prompt to JSON data)
         """
+        self.save_ai_responses([(query, response_text, sources)])
+
+    def save_ai_responses(self, entries):
+        """
+        Save several AI responses with one read and one write of the data file.
+        
+        Args:
+            entries: List of (query, response_text, sources) as for save_ai_response
+        """
         try:
-            ai_responses_file = self.data_path / "ai_responses.json"
-            
-            # Load existing responses or create new list
-            if ai_responses_file.exists():
-                with open(ai_responses_file, 'r', encoding='utf-8') as f:
-                    ai_responses = json.load(f)
-            else:
-                ai_responses = []
-            
-            # Build minimal source refs for storage (category + title/heading so we can link to the data)
-            source_refs = []
-            if sources:
-                for s in sources[:20]:  # cap for storage size
-                    cat = s.get("category") or "data"
-                    data = s.get("data")
-                    if not isinstance(data, dict):
-                        continue
-                    title = (
-                        data.get("heading")
-                        or data.get("title")
-                        or data.get("name")
-                        or (data.get("text", "")[:80] + "..." if data.get("text") else None)
-                    )
-                    source_refs.append({
-                        "category": cat,
-                        "title": title or "(record)",
-                    })
-            
-            # Add new response linked to archive sources
-            ai_responses.append({
-                "query": query,
-                "response": response_text,
-                "timestamp": str(time.time()),
-                "sources": source_refs,
-            })
+            records = []
+            for query, response_text, sources in entries:
+                # Build minimal source refs for storage (category + title/heading so we can link to the data)
+                source_refs = []
+                if sources:
+                    for s in sources[:20]:  # cap for storage size
+                        cat = s.get("category") or "data"
+                        data = s.get("data")
+                        if not isinstance(data, dict):
+                            continue
+                        title = (
+                            data.get("heading")
+                            or data.get("title")
+                            or data.get("name")
+                            or (data.get("text", "")[:80] + "..." if data.get("text") else None)
+                        )
+                        source_refs.append({
+                            "category": cat,
+                            "title": title or "(record)",
+                        })
+                
+                # Add new response linked to archive sources
+                records.append({
+                    "query": query,
+                    "response": response_text,
+                    "timestamp": str(time.time()),
+                    "sources": source_refs,
+                })
             
-            # Save back to file
-            with open(ai_responses_file, 'w', encoding='utf-8') as f:
-                json.dump(ai_responses, f, indent=2, ensure_ascii=False)
+            # Requests in every worker process read, extend and rewrite the file: one at a time
+            ai_responses = extend_json_list(
+                self.data_path / "ai_responses.json", records,
+                self.data_path / ".ai_responses.lock",
+            )
             
             # Update in-memory data
             self.all_data['ai_responses'] = ai_responses
@@ -333,8 +409,16 @@ Be concise, friendly, and accurate. Do not just list search results; write as if
         Ask the AI assistant with optional archive context so it can give answers grounded in real data.
         Uses a new thread per request so multiple prompts in a row don't cause 500 errors.
         """
+        content, self.last_prompt_tokens = await self._ask(query, archive_context)
+        return content
+
+    async def _ask(self, query, archive_context=None):
+        """ask_ai without shared state, so several questions can be asked concurrently: returns (content, prompt tokens)"""
         try:
-            await self.initialize_ai()
+            await self.ensure_assistant()
+            thread = await self.client.create_thread(self.assistant.assistant_id)
+        except BackboardUnavailable:
+            raise
         except Exception as e:
             print(f"[ask_ai] initialize_ai failed: {e}", flush=True)
             raise RuntimeError(f"Failed to initialize AI: {e}") from e
@@ -343,18 +427,22 @@ Be concise, friendly, and accurate. Do not just list search results; write as if
             full_query = f"""ARCHIVE CONTEXT (use this to answer the user's question):\n\n{archive_context.strip()}\n\n---\nUser question: {query}"""
         else:
             full_query = f"""No specific archive results were found for this question. Please respond helpfully: suggest related Kingston city topics you can help with, or ask the user to rephrase.\n\nUser question: {query}"""
+        prompt_tokens = count_tokens(full_query)
+        print(f"[ask_ai] prompt size: {prompt_tokens} tokens (context budget {self.context_token_budget})", flush=True)
 
-        if not self.thread or not getattr(self.thread, "thread_id", None):
+        if not thread or not getattr(thread, "thread_id", None):
             raise RuntimeError("No thread available after initialize_ai")
 
         try:
             response = await self.client.add_message(
-                thread_id=self.thread.thread_id,
+                thread_id=thread.thread_id,
                 content=full_query,
                 llm_provider="openai",
                 model_name="gpt-4o",
                 stream=False,
             )
+        except BackboardUnavailable:
+            raise
         except Exception as e:
             print(f"[ask_ai] add_message failed: {e}", flush=True)
             raise RuntimeError(f"AI request failed: {e}") from e
@@ -368,7 +456,7 @@ Be concise, friendly, and accurate. Do not just list search results; write as if
             content = str(response) if response is not None else "I couldn't generate a response."
         if not isinstance(content, str):
             content = str(content)
-        return content
+        return content, prompt_tokens
     
     async def get_response(self, user_query):
         """
@@ -380,36 +468,148 @@ Be concise, friendly, and accurate. Do not just list search results; write as if
             user_query: User's question
             
         Returns:
-            Dictionary with AI response, source, and events (for UI when we had matches)
+            Dictionary with AI response, source, and events (for UI when we had matches).
+            While Backboard is unavailable the response is the formatted archive matches
+            and source is "fallback".
         """
-        # 1. Get relevant archive content via keyword search
-        matching_results = self.search_events_local(user_query)
-        archive_context = self.build_archive_context(matching_results) if matching_results else ""
+        # Seconds spent per stage, read by the /api/chat route for its metrics
+        timings = self.last_timings = {}
+        started = time.perf_counter()
         
-        # 2. If search returned little or nothing, add broader context so the AI has something to use
-        if len(archive_context.strip()) < 400:
-            broader = self.get_broader_context(user_query)
-            if broader:
-                archive_context = (archive_context + "\n\nAdditional relevant archive content:\n" + broader).strip() if archive_context else broader
+        # 1. Get relevant archive passages via keyword search
+        matching_passages = self.search_passages(user_query)
+        timings["search"] = time.perf_counter() - started
         
-        # 3. Build events list for UI and for linking (so each prompt is linked to JSON data)
-        all_events = []
-        if matching_results:
-            for category, items in matching_results.items():
-                for item in items:
-                    all_events.append({"category": category, "data": item})
+        started = time.perf_counter()
+        # 2-3. Archive context for the AI and events list for the UI
+        context, all_events = self._prepare_context(user_query, matching_passages)
+        self.last_context = context
+        archive_context = context["text"]
+        timings["context"] = time.perf_counter() - started
         
         # 4. Always get an AI response using the archive context
-        ai_response = await self.ask_ai(user_query, archive_context=archive_context)
+        started = time.perf_counter()
+        try:
+            ai_response = await self.ask_ai(user_query, archive_context=archive_context)
+        except BackboardUnavailable as e:
+            # Fail fast with the ranked matches instead of an error; nothing to save
+            timings["backboard"] = time.perf_counter() - started
+            return {
+                "response": self.fallback_response(matching_passages, e),
+                "source": "fallback",
+                "events": all_events,
+                "prompt_tokens": 0,
+            }
+        timings["backboard"] = time.perf_counter() - started
         # Save response and link it to the archive sources used
+        started = time.perf_counter()
         self.save_ai_response(user_query, ai_response, sources=all_events)
+        timings["save"] = time.perf_counter() - started
         
         return {
             "response": ai_response,
             "source": "local" if all_events else "ai",
             "events": all_events,
+            "prompt_tokens": self.last_prompt_tokens,
         }
 
+    def _prepare_context(self, user_query, matching_passages):
+        """
+        Context and events for one question: returns (ContextAssembler result, events list).
+        """
+        candidates = self._context_candidates(matching_passages, max_items_per_category=10)
+        
+        # If search returned little or nothing, add broader context (at lower weight) so the AI has something to use
+        if sum(len(c["text"]) for c in candidates) < 400:
+            candidates += self._context_candidates(self._broader_results(user_query), 4, 500, weight=0.5)
+        
+        # Fit everything into the token budget, most relevant first, without near-duplicates
+        context = ContextAssembler(self.context_token_budget).assemble(user_query, candidates)
+        
+        # Build events list for UI and for linking (so each prompt is linked to JSON data)
+        all_events = []
+        matching_results = _parent_items(matching_passages)
+        if matching_results:
+            for category, items in matching_results.items():
+                for item in items:
+                    all_events.append({"category": category, "data": item})
+        return context, all_events
+
+    async def get_responses(self, user_queries, concurrency=8, on_result=None):
+        """
+        Answer several questions: one search pass over the archive for all of them, then
+        the AI calls concurrently (at most concurrency at a time), then one save of all the answers.
+        
+        Args:
+            user_queries: List of questions
+            concurrency: Most AI requests in flight at once
+            on_result: Optional callback(index, result) called as each answer completes
+            
+        Returns:
+            List of results in the order of user_queries: the dict get_response returns,
+            or {"query", "error"} for a question that failed
+        """
+        timings = self.last_timings = {}
+        started = time.perf_counter()
+        searched = self.search_passages_batch(user_queries)
+        timings["search"] = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        prepared = [self._prepare_context(q, passages) for q, passages in zip(user_queries, searched)]
+        timings["context"] = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        results = [None] * len(user_queries)
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        # Create the assistant once for the whole batch. Any other failure fails the batch;
+        # an unavailable Backboard answers every question from the archive without
+        # each one trying again.
+        try:
+            await self.ensure_assistant()
+            unavailable = None
+        except BackboardUnavailable as e:
+            unavailable = e
+        
+        async def answer(i):
+            query = user_queries[i]
+            context, all_events = prepared[i]
+            try:
+                if unavailable is not None:
+                    raise unavailable
+                async with semaphore:
+                    ai_response, prompt_tokens = await self._ask(query, archive_context=context["text"])
+                result = {
+                    "query": query,
+                    "response": ai_response,
+                    "source": "local" if all_events else "ai",
+                    "events": all_events,
+                    "prompt_tokens": prompt_tokens,
+                }
+            except BackboardUnavailable as e:
+                result = {
+                    "query": query,
+                    "response": self.fallback_response(searched[i], e),
+                    "source": "fallback",
+                    "events": all_events,
+                    "prompt_tokens": 0,
+                }
+            except Exception as e:
+                print(f"[get_responses] question {i} failed: {e}", flush=True)
+                result = {"query": query, "error": str(e)}
+            results[i] = result
+            if on_result:
+                on_result(i, result)
+        
+        await asyncio.gather(*(answer(i) for i in range(len(user_queries))))
+        timings["backboard"] = time.perf_counter() - started
+        
+        # Save every answer and link it to the archive sources used, in one write
+        started = time.perf_counter()
+        self.save_ai_responses([(r["query"], r["response"], prepared[i][1])
+                                for i, r in enumerate(results) if "error" not in r and r["source"] != "fallback"])
+        timings["save"] = time.perf_counter() - started
+        return results
+
 
 # Example usage
 async def main():
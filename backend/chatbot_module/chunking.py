@@ -0,0 +1,175 @@
+"""
+Passage-level chunking of archive items.
+
+Scraped items are whole page sections, some several thousand characters long, so
+sending "the first 700 characters" of a matching item often leaves out the part
+that actually matched. Items are instead split into overlapping passages, each
+carrying its item's title, a stable id and a pointer back to the item, and
+retrieval ranks passages rather than items.
+
+Passages are built when an archive snapshot is loaded and cached per category;
+items that are the same objects as last time (the snapshot, or live categories
+read through the mtime caches) are not chunked again.
+"""
+import hashlib
+import json
+import threading
+
+PASSAGE_CHARS = 700
+PASSAGE_OVERLAP = 150
+
+# Fields used as an item's title, in order of preference
+TITLE_FIELDS = ("heading", "page_title", "title", "name", "meeting", "query")
+# Fields left out of passage text (links, file names, ids)
+SKIP_FIELDS = {"url", "page_url", "meeting_url", "audio_file", "transcript_file", "id", "timestamp"}
+
+
+def chunk_text(text, size=PASSAGE_CHARS, overlap=PASSAGE_OVERLAP):
+    """Split text into overlapping chunks, breaking at whitespace where possible."""
+    text = " ".join(text.split())
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            space = text.rfind(" ", start + size // 2, end)
+            if space > start:
+                end = space
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+        # Do not start a chunk in the middle of a word
+        space = text.find(" ", start, end)
+        if space != -1:
+            start = space + 1
+    return [c for c in chunks if c]
+
+
+def item_key(item):
+    """Short content hash of an item; stays the same across reloads while the item is unchanged."""
+    raw = json.dumps(item, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def _title_field(item):
+    if isinstance(item, dict):
+        for field in TITLE_FIELDS:
+            value = item.get(field)
+            if isinstance(value, str) and value.strip():
+                return field
+    return None
+
+
+def item_title(item):
+    """Human-readable title of an item, or "" if it has none."""
+    field = _title_field(item)
+    if field is None:
+        return ""
+    title = item[field].strip()
+    if field == "meeting" and item.get("date"):
+        title = f"{title} ({item['date']})"
+    return title
+
+
+def item_body(item, title_field=None):
+    """All text of an item except its title and link fields, main "text" first."""
+    out = []
+
+    def _walk(val):
+        if isinstance(val, str):
+            if not val.startswith(("http://", "https://")):
+                out.append(val)
+        elif isinstance(val, dict):
+            for k, v in val.items():
+                if k in SKIP_FIELDS:
+                    continue
+                if isinstance(v, str) and v.startswith(("http://", "https://")):
+                    out.append(k)  # e.g. documents: {"Agenda (PDF)": url} -> "Agenda (PDF)"
+                else:
+                    _walk(v)
+        elif isinstance(val, list):
+            for v in val:
+                _walk(v)
+
+    if isinstance(item, dict):
+        if isinstance(item.get("text"), str):
+            out.append(item["text"])
+        for k, v in item.items():
+            if k not in SKIP_FIELDS and k != "text" and k != title_field:
+                _walk(v)
+    else:
+        _walk(item)
+    return " ".join(s for s in out if s.strip())
+
+
+def chunk_item(category, item, size=PASSAGE_CHARS, overlap=PASSAGE_OVERLAP):
+    """
+    Split one archive item into passages.
+
+    Returns:
+        List of {"id", "parent_id", "category", "title", "text", "search", "item"}:
+        id is "<category>:<item key>:<n>", parent_id "<category>:<item key>", item
+        the original record and search the lowercased title + text used for matching
+    """
+    title = item_title(item)
+    chunks = chunk_text(item_body(item, _title_field(item)), size, overlap) or [""]
+    parent_id = f"{category}:{item_key(item)}"
+    return [{
+        "id": f"{parent_id}:{n}",
+        "parent_id": parent_id,
+        "category": category,
+        "title": title,
+        "text": chunk,
+        "search": f"{title} {chunk}".lower(),
+        "item": item,
+    } for n, chunk in enumerate(chunks) if chunk or title]
+
+
+def passage_text(passage):
+    """Readable text of a passage for AI context."""
+    if passage["title"]:
+        return f"Title: {passage['title']}\n{passage['text']}".strip()
+    return passage["text"]
+
+
+class PassageCache:
+    """Passages of each category, reusing the chunks of items that were seen before."""
+
+    def __init__(self):
+        self._by_category = {}
+        self._lock = threading.Lock()
+
+    def get(self, category, items):
+        """All passages of items (a category's list), in item order."""
+        with self._lock:
+            cached = self._by_category.get(category)
+        if cached is not None and cached[0] is items:
+            return cached[1]
+        # Items are matched by identity (the snapshot and the mtime caches hand out the same objects)
+        previous = cached[2] if cached is not None else {}
+        by_item = {}
+        passages = []
+        unchanged = cached is not None and len(items) == len(cached[0])
+        for item, old_item in zip(items, cached[0] if unchanged else items):
+            entry = previous.get(id(item))
+            if entry is None or entry[0] is not item:
+                entry = (item, chunk_item(category, item))
+            unchanged = unchanged and item is old_item
+            by_item[id(item)] = entry
+            passages.extend(entry[1])
+        if unchanged:
+            # A new list holding the same items (e.g. a fresh copy from MeetingsStore.load):
+            # keep the old passage list so indexes built on it stay valid
+            passages = cached[1]
+        with self._lock:
+            self._by_category[category] = (items, passages, by_item)
+        return passages
+
+
+_passage_cache = PassageCache()
+
+
+def passages_for(category, items):
+    """Passages of a category's items from the shared cache."""
+    return _passage_cache.get(category, items)
@@ -0,0 +1,462 @@
+"""
+Compiled archive snapshots: the archive and its search structures in one binary file
+that is opened with mmap instead of being rebuilt.
+
+Building a snapshot from the JSON files means parsing every file, chunking every
+item into passages and building the inverted and typo indexes, which at a few
+hundred thousand passages takes seconds. The compile step does that once and writes
+the result to data/archive.snapshot:
+
+    magic, format version, header length, header (JSON: fingerprint, section offsets)
+    per list category, 8-byte aligned sections:
+        items       the category's items as one compact JSON array (decoded on first use)
+        parents     string table of passage parent ids, and one parent number per passage
+        passages    one small JSON record per passage [n, item position, title, text]
+        terms       sorted string table of the vocabulary, with offsets into
+        postings    (passage position, term frequency) pairs as uint32
+        variants    sorted string table of deletion variants, with offsets into
+        neighbours  vocabulary term numbers as uint32
+
+A string table is an array of uint64 offsets plus the UTF-8 bytes; sorted tables are
+searched by bisection. Opening the file reads only the header. A query only touches
+the pages holding its terms' postings and the passages it returns, and every worker
+process shares the same page cache. The file records the fingerprint of the
+JSON files it was compiled from; a stale file is ignored.
+
+    python -m chatbot_module.compiled            # compile backend/data
+    python -m chatbot_module.compiled --data DIR
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+
+try:
+    from chatbot_module.analyzer import PassageIndex, index_for
+    from chatbot_module.chunking import passages_for
+except ImportError:  # running from inside chatbot_module
+    from analyzer import PassageIndex, index_for
+    from chunking import passages_for
+
+MAGIC = b"KARCHIVE"
+FORMAT_VERSION = 1
+SNAPSHOT_FILE = "archive.snapshot"
+# Decoded passages kept per category; the rest are decoded again from the mapped file
+PASSAGE_CACHE_SIZE = 4096
+
+_PREFIX = struct.Struct("<8sII")  # magic, format version, header length
+_U32 = "I" if array("I").itemsize == 4 else "L"
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def _string_table(strings):
+    """(offsets uint64[n + 1], UTF-8 blob) of strings, in the given order."""
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for s in strings:
+        blob += s.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets.tobytes(), bytes(blob)
+
+
+def _compact(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class _SectionWriter:
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def add(self, data):
+        """Append a section; returns [offset, length] relative to the start of the data area."""
+        pad = _align(self.size) - self.size
+        if pad:
+            self.chunks.append(b"\0" * pad)
+            self.size += pad
+        offset = self.size
+        self.chunks.append(data)
+        self.size += len(data)
+        return [offset, len(data)]
+
+
+def _compile_category(writer, category, items):
+    """Sections of one list category: items, passages and index. Returns its header entry."""
+    passages = passages_for(category, items)
+    index = index_for(category, passages)
+    position = {id(item): n for n, item in enumerate(items)}
+
+    parent_numbers = {}
+    parent_ids = array(_U32)
+    records = []
+    for passage in passages:
+        key = passage["parent_id"][len(category) + 1:]
+        parent_ids.append(parent_numbers.setdefault(key, len(parent_numbers)))
+        n = int(passage["id"].rsplit(":", 1)[1])
+        records.append(json.dumps([n, position[id(passage["item"])], passage["title"], passage["text"]],
+                                  ensure_ascii=False, separators=(",", ":")))
+
+    terms = sorted(index.postings, key=lambda t: t.encode("utf-8"))
+    term_numbers = {t: n for n, t in enumerate(terms)}
+    posting_offsets = array("Q", [0])
+    pairs = array(_U32)
+    for term in terms:
+        for pos, tf in index.postings[term]:
+            pairs.append(pos)
+            pairs.append(tf)
+        posting_offsets.append(len(pairs) // 2)
+
+    neighbours = index.neighbours
+    variants = sorted(neighbours, key=lambda v: v.encode("utf-8"))
+    neighbour_offsets = array("Q", [0])
+    neighbour_terms = array(_U32)
+    for variant in variants:
+        neighbour_terms.extend(sorted(term_numbers[t] for t in neighbours[variant]))
+        neighbour_offsets.append(len(neighbour_terms))
+
+    parent_offsets, parent_blob = _string_table(parent_numbers)
+    record_offsets, record_blob = _string_table(records)
+    term_offsets, term_blob = _string_table(terms)
+    variant_offsets, variant_blob = _string_table(variants)
+    return {
+        "kind": "list",
+        "count": len(items),
+        "passages": len(passages),
+        "items": writer.add(_compact(items)),
+        "parent_offsets": writer.add(parent_offsets),
+        "parent_blob": writer.add(parent_blob),
+        "parent_ids": writer.add(parent_ids.tobytes()),
+        "record_offsets": writer.add(record_offsets),
+        "record_blob": writer.add(record_blob),
+        "term_offsets": writer.add(term_offsets),
+        "term_blob": writer.add(term_blob),
+        "posting_offsets": writer.add(posting_offsets.tobytes()),
+        "postings": writer.add(pairs.tobytes()),
+        "variant_offsets": writer.add(variant_offsets),
+        "variant_blob": writer.add(variant_blob),
+        "neighbour_offsets": writer.add(neighbour_offsets.tobytes()),
+        "neighbours": writer.add(neighbour_terms.tobytes()),
+    }
+
+
+def write_compiled(path, all_data, fingerprint, exclude=()):
+    """
+    Compile all_data ({category: items}) into a snapshot file at path.
+
+    Args:
+        path: Output file; written to a temporary file and moved into place, so processes
+              that have the old file open keep reading it
+        all_data: Archive as returned by load_archive
+        fingerprint: archive_fingerprint() of the files all_data was loaded from
+        exclude: Categories left out (the live ones, which the fingerprint does not cover
+                 and which would be stale copies in the file)
+
+    Returns:
+        Size of the file in bytes
+    """
+    path = Path(path)
+    writer = _SectionWriter()
+    categories = {}
+    for name, data in all_data.items():
+        if name in exclude:
+            continue
+        if isinstance(data, list):
+            categories[name] = _compile_category(writer, name, data)
+        else:
+            categories[name] = {"kind": "value", "items": writer.add(_compact(data))}
+    header = json.dumps({
+        "fingerprint": [list(entry) for entry in fingerprint],
+        "byteorder": sys.byteorder,
+        "categories": categories,
+    }).encode("utf-8")
+    data_start = _align(_PREFIX.size + len(header))
+
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+            f.write(header)
+            f.write(b"\0" * (data_start - _PREFIX.size - len(header)))
+            for chunk in writer.chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return data_start + writer.size
+
+
+class _StringTable:
+    """Read-only view of a string table in the mapped file."""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def raw(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1]]
+
+    def __getitem__(self, i):
+        return str(self.raw(i), "utf-8")
+
+    def find(self, s):
+        """Position of s in a sorted table, or -1."""
+        key = s.encode("utf-8")
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.raw(mid).tobytes() < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self) and self.raw(lo).tobytes() == key else -1
+
+
+class MappedPostings(Mapping):
+    """term -> [(passage position, term frequency)], read from the mapped file."""
+
+    def __init__(self, terms, offsets, pairs):
+        self.terms = terms
+        self.offsets = offsets
+        self.pairs = pairs
+
+    def _postings(self, i):
+        a, b = self.offsets[i] * 2, self.offsets[i + 1] * 2
+        return list(zip(self.pairs[a:b:2], self.pairs[a + 1:b:2]))
+
+    def __getitem__(self, term):
+        i = self.terms.find(term)
+        if i < 0:
+            raise KeyError(term)
+        return self._postings(i)
+
+    def get(self, term, default=None):
+        i = self.terms.find(term)
+        return self._postings(i) if i >= 0 else default
+
+    def __contains__(self, term):
+        return self.terms.find(term) >= 0
+
+    def __iter__(self):
+        return (self.terms[i] for i in range(len(self.terms)))
+
+    def __len__(self):
+        return len(self.terms)
+
+
+class MappedNeighbours:
+    """Deletion variant -> vocabulary terms, read from the mapped file."""
+
+    def __init__(self, variants, offsets, term_numbers, terms):
+        self.variants = variants
+        self.offsets = offsets
+        self.term_numbers = term_numbers
+        self.terms = terms
+
+    def get(self, variant, default=None):
+        i = self.variants.find(variant)
+        if i < 0:
+            return default
+        return {self.terms[n] for n in self.term_numbers[self.offsets[i]:self.offsets[i + 1]]}
+
+
+class MappedPassages(Sequence):
+    """A category's passages, decoded one at a time when a search returns them."""
+
+    def __init__(self, category, records, parents, parent_ids, items, cache_size=PASSAGE_CACHE_SIZE):
+        """
+        Args:
+            category: Category name
+            records: _StringTable of passage records
+            parents: _StringTable of parent ids (without the category prefix)
+            parent_ids: Parent number of each passage
+            items: Callable returning the category's items
+            cache_size: Most recently used passages kept decoded
+        """
+        self.category = category
+        self.records = records
+        self.parents = parents
+        self.parent_ids = parent_ids
+        self.items = items
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.records)
+
+    def parent_id(self, pos):
+        return f"{self.category}:{self.parents[self.parent_ids[pos]]}"
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self[i] for i in range(*pos.indices(len(self)))]
+        with self._cache_lock:
+            passage = self._cache.get(pos)
+            if passage is not None:
+                self._cache.move_to_end(pos)
+                return passage
+        n, item_pos, title, text = json.loads(self.records[pos])
+        parent_id = self.parent_id(pos)
+        passage = {
+            "id": f"{parent_id}:{n}",
+            "parent_id": parent_id,
+            "category": self.category,
+            "title": title,
+            "text": text,
+            "search": f"{title} {text}".lower(),
+            "item": self.items()[item_pos],
+        }
+        with self._cache_lock:
+            self._cache[pos] = passage
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return passage
+
+
+class MappedPassageIndex(PassageIndex):
+    """PassageIndex over the sections of a compiled snapshot; nothing is built at load time."""
+
+    def __init__(self, passages, postings, neighbours):
+        self.passages = passages
+        self.postings = postings
+        self._neighbours = neighbours
+
+    @property
+    def neighbours(self):
+        return self._neighbours
+
+    def parent_of(self, pos):
+        return self.passages.parent_id(pos)
+
+
+class CompiledArchive:
+    """An open snapshot file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, version, header_len = _PREFIX.unpack_from(view, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{self.path} is not a version {FORMAT_VERSION} archive snapshot")
+        header = json.loads(bytes(view[_PREFIX.size:_PREFIX.size + header_len]))
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{self.path} was compiled on a {header['byteorder']}-endian machine")
+        self.fingerprint = tuple(tuple(entry) for entry in header["fingerprint"])
+        self.categories = header["categories"]
+        self._data = view[_align(_PREFIX.size + header_len):]
+        self._items = {}
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def _section(self, entry, fmt=None):
+        offset, length = entry
+        section = self._data[offset:offset + length]
+        return section.cast(fmt) if fmt else section
+
+    def _table(self, meta, name):
+        return _StringTable(self._section(meta[f"{name}_offsets"], "Q"), self._section(meta[f"{name}_blob"]))
+
+    def items(self, name):
+        """The items of a category (decoded once, then shared)."""
+        items = self._items.get(name)
+        if items is None:
+            with self._lock:
+                items = self._items.get(name)
+                if items is None:
+                    items = self._items[name] = json.loads(bytes(self._section(self.categories[name]["items"])))
+        return items
+
+    def index(self, name):
+        """MappedPassageIndex of a list category, or None for other categories."""
+        meta = self.categories.get(name)
+        if meta is None or meta["kind"] != "list":
+            return None
+        index = self._indexes.get(name)
+        if index is None:
+            terms = self._table(meta, "term")
+            passages = MappedPassages(name, self._table(meta, "record"), self._table(meta, "parent"),
+                                      self._section(meta["parent_ids"], _U32), lambda: self.items(name))
+            postings = MappedPostings(terms, self._section(meta["posting_offsets"], "Q"),
+                                      self._section(meta["postings"], _U32))
+            neighbours = MappedNeighbours(self._table(meta, "variant"), self._section(meta["neighbour_offsets"], "Q"),
+                                          self._section(meta["neighbours"], _U32), terms)
+            index = self._indexes[name] = MappedPassageIndex(passages, postings, neighbours)
+        return index
+
+    def passage_count(self):
+        return sum(meta.get("passages", 0) for meta in self.categories.values())
+
+
+class LazyArchive(Mapping):
+    """{category: items} of a compiled snapshot; a category is decoded the first time it is read."""
+
+    def __init__(self, compiled):
+        self.compiled = compiled
+
+    def __getitem__(self, name):
+        if name not in self.compiled.categories:
+            raise KeyError(name)
+        return self.compiled.items(name)
+
+    def __iter__(self):
+        return iter(self.compiled.categories)
+
+    def __len__(self):
+        return len(self.compiled.categories)
+
+
+def open_compiled(path, fingerprint):
+    """The CompiledArchive at path if it exists and was compiled from files with this fingerprint, else None."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        compiled = CompiledArchive(path)
+    except Exception as e:
+        print(f"Ignoring unreadable archive snapshot {path}: {e}", flush=True)
+        return None
+    return compiled if compiled.fingerprint == tuple(fingerprint) else None
+
+
+def main():
+    import argparse
+    import time
+
+    try:
+        from chatbot_module.snapshot import compile_archive
+    except ImportError:
+        from snapshot import compile_archive
+
+    parser = argparse.ArgumentParser(description="Compile the archive JSON files into a memory-mapped snapshot")
+    parser.add_argument("--data", default=str(Path(__file__).parent.parent / "data"), help="archive folder")
+    parser.add_argument("--out", help=f"output file (default: <data>/{SNAPSHOT_FILE})")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    out, size = compile_archive(args.data, args.out)
+    print(f"Wrote {out} ({size / 1e6:.1f} MB) in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
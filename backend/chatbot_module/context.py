@@ -0,0 +1,191 @@
+"""
+Token-budgeted assembly of the archive context sent to the LLM.
+
+build_archive_context used to concatenate up to 6 items per matched category with
+no overall bound, so prompt size (and gpt-4o latency and cost) depended on how many
+categories a query hit. ContextAssembler instead takes a token budget, scores every
+candidate passage against the query, drops near-duplicates (the same paragraph is
+often scraped into several categories) and fills the budget greedily, best first.
+"""
+import re
+import threading
+
+try:
+    from chatbot_module.analyzer import analyze
+except ImportError:  # running from inside chatbot_module
+    from analyzer import analyze
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_WORD_RE = re.compile(r"\w+")
+
+CONTEXT_HEADER = (
+    "The following is relevant content from the Kingston city archive. Each block is labeled with "
+    "[Source: category] so you can cite it (e.g. 'According to the Building Permits data...'). "
+    "Use this content to answer the user's question. If the user's question is not answered by this "
+    "content, say so and offer related information from the archive where possible.\n"
+)
+
+
+def _get_encoding():
+    """tiktoken's gpt-4o encoding, loaded on first use (it may download its data file); None if unavailable."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding("o200k_base")  # gpt-4o
+                except Exception as e:  # not installed, or the encoding file cannot be downloaded
+                    print(f"tiktoken unavailable ({e}); estimating token counts")
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text):
+    """
+    Number of tokens in text, computed locally.
+    Uses tiktoken's gpt-4o encoding when available, otherwise a close estimate
+    (one token per word or punctuation mark, plus one per 6 extra characters of long words).
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum(1 + (len(t) - 1) // 6 for t in _TOKEN_RE.findall(text))
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text to at most max_tokens tokens, at a word boundary, adding '...' when cut."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    # Binary search on the character length; count_tokens is monotonic enough for this
+    limit = max_tokens - count_tokens("...") - 1
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(text[:mid]) <= limit:
+            lo = mid
+        else:
+            hi = mid - 1
+    cut = text[:lo]
+    space = cut.rfind(" ")
+    if space > lo // 2:
+        cut = cut[:space]
+    return cut.rstrip() + "..."
+
+
+def _terms(text):
+    # Same analysis as the search index, so "permits" in a passage counts for "permit" in the query
+    return set(analyze(text))
+
+
+def _shingles(text, n=3):
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < n:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + n]) for i in range(len(words) - n + 1)}
+
+
+def _similarity(a, b):
+    """Overlap of word 3-gram sets relative to the smaller one (1.0 = one contains the other)."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+class ContextAssembler:
+    """Selects, de-duplicates and orders archive passages to fit a token budget."""
+
+    def __init__(self, token_budget=2000, max_passage_tokens=400, duplicate_threshold=0.8):
+        """
+        Args:
+            token_budget: Max tokens for the whole context block (header included)
+            max_passage_tokens: Longer passages are truncated to this many tokens
+            duplicate_threshold: Passages whose 3-gram overlap with an already selected
+                                 passage is at least this are dropped as near-duplicates
+        """
+        self.token_budget = token_budget
+        self.max_passage_tokens = max_passage_tokens
+        self.duplicate_threshold = duplicate_threshold
+
+    def relevance(self, query_terms, candidate):
+        """
+        Score of a candidate: share of query terms it contains, plus a bonus for
+        how early the retrieval step ranked it, scaled by its retrieval weight.
+        """
+        terms = _terms(candidate["text"])
+        overlap = len(query_terms & terms) / len(query_terms) if query_terms else 0.0
+        rank_bonus = 1.0 / (1 + candidate.get("rank", 0))
+        return (overlap + 0.5 * rank_bonus) * candidate.get("weight", 1.0)
+
+    def assemble(self, query, candidates):
+        """
+        Build the context block.
+
+        Args:
+            query: User question
+            candidates: List of {"category", "text", "rank", "weight"} (rank = position in
+                        its retrieval list, weight = 1.0 for matches, lower for filler)
+
+        Returns:
+            dict with "text", "tokens", "passages" (selected candidates in output order)
+            and "dropped" counts for duplicates and budget
+        """
+        query_terms = _terms(query or "")
+        scored = []
+        for i, cand in enumerate(candidates):
+            text = (cand.get("text") or "").strip()
+            if not text:
+                continue
+            scored.append((self.relevance(query_terms, {**cand, "text": text}), i, {**cand, "text": text}))
+        scored.sort(key=lambda x: (-x[0], x[1]))
+
+        used = count_tokens(CONTEXT_HEADER)
+        selected = []
+        selected_shingles = []
+        dropped = {"duplicates": 0, "budget": 0}
+        for score, order, cand in scored:
+            shingles = _shingles(cand["text"])
+            if any(_similarity(shingles, s) >= self.duplicate_threshold for s in selected_shingles):
+                dropped["duplicates"] += 1
+                continue
+            label = f"\n[Source: {cand['category']}]\n"
+            if not any(c["category"] == cand["category"] for c in selected):
+                # First passage of a category also pays for the category heading
+                label += f"\n--- {cand['category'].replace('_', ' ').title()} [Source: {cand['category']}] ---"
+            remaining = self.token_budget - used - count_tokens(label)
+            if remaining < 40:
+                dropped["budget"] += 1
+                continue
+            text = truncate_to_tokens(cand["text"], min(self.max_passage_tokens, remaining))
+            cost = count_tokens(label) + count_tokens(text)
+            if used + cost > self.token_budget:
+                dropped["budget"] += 1
+                continue
+            used += cost
+            selected.append({**cand, "text": text, "score": round(score, 4), "order": order})
+            selected_shingles.append(shingles)
+
+        if not selected:
+            return {"text": "", "tokens": 0, "passages": [], "dropped": dropped}
+
+        # Group by category (categories in order of their best passage) so sources read as blocks
+        category_rank = {}
+        for cand in selected:
+            category_rank.setdefault(cand["category"], len(category_rank))
+        selected.sort(key=lambda c: (category_rank[c["category"]], -c["score"], c["order"]))
+
+        lines = [CONTEXT_HEADER]
+        current = None
+        for cand in selected:
+            if cand["category"] != current:
+                current = cand["category"]
+                lines.append(f"\n--- {current.replace('_', ' ').title()} [Source: {current}] ---")
+            lines.append(f"\n[Source: {current}]\n{cand['text']}")
+        text = "\n".join(lines)
+        return {"text": text, "tokens": count_tokens(text), "passages": selected, "dropped": dropped}
@@ -0,0 +1,71 @@
+"""
+Client for a local Backboard stand-in (benchmarks/mock_backboard.py).
+
+Has the three BackboardClient calls EventsChatbot uses. It is selected instead of
+the real SDK when BACKBOARD_MOCK_URL is set, so the Flask app can be load tested
+offline with realistic LLM waits and failures.
+"""
+import asyncio
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+import requests
+
+_local = threading.local()
+
+
+def _session():
+    # One keep-alive session per worker thread (asyncio.to_thread runs calls on a pool)
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+class LocalBackboardClient:
+    """BackboardClient look-alike that talks to the mock server over HTTP."""
+
+    def __init__(self, base_url, api_key=None, timeout=None):
+        """
+        Args:
+            base_url: URL of the mock server
+            api_key: Sent as a bearer token
+            timeout: HTTP timeout in seconds (connect, and each read). Defaults to
+                     BACKBOARD_MESSAGE_TIMEOUT: the deadlines in resilient.py give up on
+                     a call, but only this timeout ends the thread running it.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout if timeout is not None else float(os.getenv("BACKBOARD_MESSAGE_TIMEOUT", "60"))
+
+    def _post(self, path, payload, stream=False):
+        response = _session().post(f"{self.base_url}{path}", json=payload, timeout=self.timeout, stream=stream,
+                                   headers={"Authorization": f"Bearer {self.api_key}"} if self.api_key else None)
+        response.raise_for_status()
+        if not stream:
+            return response.json()
+        # Server-sent events: one {"delta": "..."} per token, then [DONE]
+        parts = []
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data: "):
+                continue
+            data = line[len("data: "):]
+            if data == "[DONE]":
+                break
+            parts.append(json.loads(data)["delta"])
+        return {"content": "".join(parts)}
+
+    async def create_assistant(self, name=None, system_prompt=None, **kwargs):
+        data = await asyncio.to_thread(self._post, "/assistants", {"name": name, "system_prompt": system_prompt})
+        return SimpleNamespace(**data)
+
+    async def create_thread(self, assistant_id, **kwargs):
+        data = await asyncio.to_thread(self._post, f"/assistants/{assistant_id}/threads", {})
+        return SimpleNamespace(**data)
+
+    async def add_message(self, thread_id, content, llm_provider=None, model_name=None, stream=False, **kwargs):
+        payload = {"content": content, "llm_provider": llm_provider, "model_name": model_name, "stream": stream}
+        data = await asyncio.to_thread(self._post, f"/threads/{thread_id}/messages", payload, stream)
+        return SimpleNamespace(**data)
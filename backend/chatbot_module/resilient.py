@@ -0,0 +1,195 @@
+"""
+Deadlines, retries and a circuit breaker around the Backboard client.
+
+Every call gets a deadline (asyncio.wait_for), so a slow provider cannot hold a
+Flask worker for longer than the deadline allows. create_assistant and create_thread
+are safe to repeat (an unused thread or assistant costs nothing), so they are retried
+after a timeout or error with jittered exponential backoff. add_message is not
+retried: a second attempt could post the question twice and pay for two answers.
+A deadline only stops the waiting: a client that runs blocking calls in threads
+(LocalBackboardClient) keeps the thread busy until its own HTTP timeout, so that
+timeout must be set too, and callers must not join those threads on the way out.
+
+All chatbots in a process share one CircuitBreaker (chatbots are created per
+request). Once BACKBOARD_BREAKER_FAILURES consecutive attempts of one kind of call
+have failed it opens, and calls fail at once with CircuitOpenError. Every attempt
+counts, retries included: with the default 2 retries each failing create_thread
+request adds 3, so the second one reaches the default threshold of 5. Failures
+are counted per call, so an outage of add_message alone is not hidden by the
+create_thread calls that keep succeeding in front of it. After
+BACKBOARD_BREAKER_RESET seconds one trial call is let through (half open); its
+outcome closes the circuit, clearing every failure count, or reopens it.
+EventsChatbot answers with the ranked archive matches while Backboard is unavailable.
+
+Configuration (environment, seconds unless noted):
+    BACKBOARD_TIMEOUT           deadline for create_assistant / create_thread (default 10)
+    BACKBOARD_MESSAGE_TIMEOUT   deadline for add_message (default 60)
+    BACKBOARD_RETRIES           extra attempts for retryable calls (default 2)
+    BACKBOARD_BREAKER_FAILURES  consecutive failures that open the circuit (default 5)
+    BACKBOARD_BREAKER_RESET     time the circuit stays open (default 30)
+
+Outcomes are reported to LISTENERS as event(name, **labels); the Flask app turns
+them into metrics (see app/__init__.py).
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# Callables event(name, **labels), e.g. ("transition", from_state=..., to_state=...)
+LISTENERS = []
+
+
+def _emit(name, **labels):
+    for listener in list(LISTENERS):
+        try:
+            listener(name, **labels)
+        except Exception as e:
+            print(f"[resilient] listener failed: {e}")
+
+
+class BackboardUnavailable(RuntimeError):
+    """Backboard timed out, kept failing, or the circuit is open."""
+
+
+class CircuitOpenError(BackboardUnavailable):
+    """Call rejected without trying because the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker over consecutive failed attempts of each call (each retry is an
+    attempt); thread safe, since each Flask thread runs its own event loop.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, name="backboard"):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.state = CLOSED
+        self.failures = {}
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state):
+        # Called with the lock held
+        if state != self.state:
+            previous, self.state = self.state, state
+            print(f"[resilient] {self.name} circuit {previous} -> {state}", flush=True)
+            _emit("transition", breaker=self.name, from_state=previous, to_state=state)
+
+    def allow(self):
+        """True if a call may go ahead now (in half open state, only one trial call at a time)."""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def release(self):
+        """Give back a trial call that ended without an outcome (cancelled)."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self, call):
+        with self._lock:
+            if self.state == CLOSED:
+                self.failures.pop(call, None)
+            else:
+                # Recovered: failures counted before the outage must not reopen it early
+                self.failures.clear()
+            self._probing = False
+            self._set_state(CLOSED)
+
+    def record_failure(self, call):
+        with self._lock:
+            self.failures[call] = self.failures.get(call, 0) + 1
+            self._probing = False
+            if self.state == HALF_OPEN or self.failures[call] >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    @property
+    def status(self):
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 1)
+            return {"state": self.state, "failures": dict(self.failures), "retryIn": retry_in}
+
+
+BREAKER = CircuitBreaker(
+    failure_threshold=int(os.getenv("BACKBOARD_BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.getenv("BACKBOARD_BREAKER_RESET", "30")),
+)
+
+
+class ResilientClient:
+    """
+    Wraps a BackboardClient (or LocalBackboardClient) with the deadlines, retries and
+    circuit breaker described above; has the same three calls.
+    """
+
+    def __init__(self, client, breaker=None, timeout=None, message_timeout=None, retries=None,
+                 backoff=0.25, max_backoff=2.0):
+        self.client = client
+        self.breaker = breaker or BREAKER
+        self.timeout = timeout if timeout is not None else float(os.getenv("BACKBOARD_TIMEOUT", "10"))
+        self.message_timeout = message_timeout if message_timeout is not None else float(os.getenv("BACKBOARD_MESSAGE_TIMEOUT", "60"))
+        self.retries = retries if retries is not None else int(os.getenv("BACKBOARD_RETRIES", "2"))
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    async def _call(self, name, make_call, timeout, retries):
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                _emit("call", call=name, outcome="rejected")
+                raise CircuitOpenError(f"Backboard circuit is open; {name} not attempted")
+            started = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(make_call(), timeout)
+            except asyncio.CancelledError:
+                # Our caller gave up, which says nothing about Backboard's health
+                self.breaker.release()
+                raise
+            except Exception as e:
+                self.breaker.record_failure(name)
+                timed_out = isinstance(e, asyncio.TimeoutError)
+                _emit("call", call=name, outcome="timeout" if timed_out else "error",
+                      seconds=time.perf_counter() - started)
+                if attempt >= retries:
+                    if timed_out:
+                        raise BackboardUnavailable(f"{name} timed out after {timeout}s") from e
+                    raise BackboardUnavailable(f"{name} failed: {e}") from e
+                attempt += 1
+                # Full jitter: a random wait up to the exponential backoff, so retries from many requests spread out
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                _emit("retry", call=name)
+                print(f"[resilient] {name} failed ({'timeout' if timed_out else e}); retry {attempt}/{retries} in {delay:.2f}s", flush=True)
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success(name)
+            _emit("call", call=name, outcome="ok", seconds=time.perf_counter() - started)
+            return result
+
+    async def create_assistant(self, **kwargs):
+        return await self._call("create_assistant", lambda: self.client.create_assistant(**kwargs),
+                                self.timeout, self.retries)
+
+    async def create_thread(self, assistant_id, **kwargs):
+        return await self._call("create_thread", lambda: self.client.create_thread(assistant_id, **kwargs),
+                                self.timeout, self.retries)
+
+    async def add_message(self, **kwargs):
+        return await self._call("add_message", lambda: self.client.add_message(**kwargs),
+                                self.message_timeout, 0)
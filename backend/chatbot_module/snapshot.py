@@ -0,0 +1,187 @@
+"""
+Immutable, hot-swappable snapshots of the archive in backend/data.
+
+A snapshot is built once from the JSON files (plus anything derived from them) and
+then only read. The serving process keeps the current one in a SnapshotHolder;
+a refresh builds a new snapshot off to the side and swaps the reference, so a
+request that already holds a snapshot keeps using it and no request ever waits
+for, or sees part of, a rebuild.
+
+Categories that change on every request (chat history, pending requests, recorded
+meetings) are not part of the fingerprint; the routes read those live.
+"""
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+
+try:
+    from chatbot_module.analyzer import index_for
+    from chatbot_module.chunking import passages_for
+    from chatbot_module.compiled import SNAPSHOT_FILE, LazyArchive, open_compiled, write_compiled
+except ImportError:  # running from inside chatbot_module
+    from analyzer import index_for
+    from chunking import passages_for
+    from compiled import SNAPSHOT_FILE, LazyArchive, open_compiled, write_compiled
+
+LIVE_CATEGORIES = ("ai_responses", "pending_requests", "meeting_data")
+
+
+def load_archive(data_path, strict=False, quiet=False):
+    """
+    Load every *.json file in data_path into {file stem: parsed content}.
+
+    Args:
+        data_path: Folder with the archive JSON files
+        strict: Raise on an unreadable file instead of skipping it (used for snapshots,
+                so a half-written file aborts the rebuild rather than dropping a category)
+        quiet: Do not print a line per file
+    """
+    data_path = Path(data_path)
+    if not data_path.exists():
+        raise ValueError(f"Data folder not found at {data_path}")
+    all_data = {}
+    for json_file in sorted(data_path.glob("*.json")):
+        try:
+            with open(json_file, 'r', encoding='utf-8') as f:
+                file_name = json_file.stem
+                all_data[file_name] = json.load(f)
+                if not quiet:
+                    print(f"Loaded {file_name}: {len(all_data[file_name])} items")
+        except Exception as e:
+            if strict:
+                raise
+            print(f"Error loading {json_file}: {e}")
+    return all_data
+
+
+def archive_fingerprint(data_path, exclude=LIVE_CATEGORIES):
+    """(name, mtime, size) of every archive file except the live ones; changes when a scraper publishes."""
+    entries = []
+    for json_file in sorted(Path(data_path).glob("*.json")):
+        if json_file.stem in exclude:
+            continue
+        st = json_file.stat()
+        entries.append((json_file.name, st.st_mtime_ns, st.st_size))
+    return tuple(entries)
+
+
+class ArchiveSnapshot:
+    """Read-only view of the archive at one point in time."""
+
+    def __init__(self, all_data, fingerprint=(), version=None, compiled=None):
+        """
+        Args:
+            all_data: {category: items} (ignored when compiled is given)
+            fingerprint: archive_fingerprint() of the files the data was loaded from
+            version: Snapshot id (default: derived from the fingerprint)
+            compiled: CompiledArchive to serve the data and prebuilt indexes from
+        """
+        self.compiled = compiled
+        self.all_data = LazyArchive(compiled) if compiled is not None else MappingProxyType(dict(all_data))
+        self.fingerprint = tuple(fingerprint)
+        self.version = version or hashlib.sha1(repr(self.fingerprint).encode()).hexdigest()[:12]
+        self.built_at = time.time()
+
+    def index(self, category):
+        """Prebuilt PassageIndex of a category from the compiled snapshot, or None."""
+        return self.compiled.index(category) if self.compiled is not None else None
+
+
+def compile_archive(data_path, out=None):
+    """
+    Compile the archive in data_path (default output: data_path/archive.snapshot). The live
+    categories are left out; the routes always read those from their files.
+
+    Returns:
+        (output path, size in bytes)
+    """
+    data_path = Path(data_path)
+    out = Path(out) if out else data_path / SNAPSHOT_FILE
+    fingerprint = archive_fingerprint(data_path)
+    all_data = load_archive(data_path, strict=True, quiet=True)
+    return out, write_compiled(out, all_data, fingerprint, exclude=LIVE_CATEGORIES)
+
+
+def build_snapshot(data_path, strict=True):
+    """Return a new ArchiveSnapshot of data_path, from its compiled snapshot if that is up to date."""
+    fingerprint = archive_fingerprint(data_path)
+    compiled = open_compiled(Path(data_path) / SNAPSHOT_FILE, fingerprint)
+    if compiled is not None:
+        snapshot = ArchiveSnapshot({}, fingerprint=fingerprint, compiled=compiled)
+        print(f"Opened compiled archive snapshot {snapshot.version} ({len(compiled.categories)} categories, "
+              f"{compiled.passage_count()} passages)", flush=True)
+        return snapshot
+    all_data = load_archive(data_path, strict=strict, quiet=True)
+    snapshot = ArchiveSnapshot(all_data, fingerprint=fingerprint)
+    # Chunk and index items now rather than on the first chat request
+    passage_count = 0
+    for name, items in all_data.items():
+        if isinstance(items, list):
+            passages = passages_for(name, items)
+            index_for(name, passages).neighbours
+            passage_count += len(passages)
+    print(f"Built archive snapshot {snapshot.version} ({len(all_data)} categories, {passage_count} passages)", flush=True)
+    return snapshot
+
+
+class SnapshotHolder:
+    """Holds the current snapshot; readers never block on a rebuild."""
+
+    def __init__(self, data_path):
+        self.data_path = Path(data_path)
+        self._snapshot = None
+        self._build_lock = threading.Lock()
+        self._watcher = None
+
+    def current(self):
+        """The snapshot to use for this request (built on first use)."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._build_lock:
+                if self._snapshot is None:
+                    self._snapshot = build_snapshot(self.data_path, strict=False)
+                snapshot = self._snapshot
+        return snapshot
+
+    def swap(self, snapshot):
+        """Publish a new snapshot. Requests already running keep the one they started with."""
+        self._snapshot = snapshot
+
+    def refresh_if_changed(self):
+        """Rebuild and swap if the archive files changed on disk. Returns True if swapped."""
+        current = self._snapshot
+        if current is not None and archive_fingerprint(self.data_path) == current.fingerprint:
+            return False
+        # Only one rebuild at a time; skip if one is already running
+        if not self._build_lock.acquire(blocking=False):
+            return False
+        try:
+            try:
+                snapshot = build_snapshot(self.data_path, strict=True)
+            except Exception as e:
+                # Most likely a file being written right now; keep serving the old snapshot
+                print(f"Archive snapshot rebuild failed, keeping {getattr(current, 'version', None)}: {e}", flush=True)
+                return False
+            self._snapshot = snapshot
+            return True
+        finally:
+            self._build_lock.release()
+
+    def start_watcher(self, interval=30):
+        """Poll the data folder in a daemon thread and hot-swap when files change."""
+        if self._watcher is not None or not interval:
+            return
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh_if_changed()
+                except Exception as e:
+                    print(f"Archive watcher error: {e}", flush=True)
+
+        self._watcher = threading.Thread(target=watch, name="archive-watcher", daemon=True)
+        self._watcher.start()
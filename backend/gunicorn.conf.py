@@ -0,0 +1,48 @@
+"""
+gunicorn settings for the backend: gunicorn -c gunicorn.conf.py wsgi:app
+
+Chat requests spend most of their time waiting on the LLM, so each worker runs many
+threads; audio processing is CPU-bound and torch runs its own thread pool, so there
+is about one worker per core and the torch/OpenMP threads are divided between them.
+The master loads the archive once (preload_app) and workers share it copy-on-write;
+recycled workers fork from that master, so respawns do not reload anything.
+
+Configuration (environment):
+    PORT / BIND          listen address (default 0.0.0.0:5001)
+    WEB_CONCURRENCY      worker processes (default: number of cores, at least 2)
+    GUNICORN_THREADS     threads per worker (default 16)
+    GUNICORN_TIMEOUT     seconds before a silent worker is restarted (default 900: long recordings)
+    GUNICORN_PRELOAD     0 to load the app in each worker instead of the master
+"""
+import gc
+import multiprocessing
+import os
+
+cores = multiprocessing.cpu_count()
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '5001')}")
+workers = int(os.getenv("WEB_CONCURRENCY", str(max(2, cores))))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") != "0"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "900"))
+graceful_timeout = 30
+keepalive = 5
+max_requests = 2000
+max_requests_jitter = 200
+accesslog = "-"
+
+# Split the cores between the workers' torch/OpenMP pools instead of each worker using all of them
+for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(var, str(max(1, cores // workers)))
+
+
+def when_ready(server):
+    # Move everything loaded by preload() out of the cycle collector's reach, so collections in
+    # the workers do not write to (and un-share) the pages holding the archive
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app import start_background_tasks
+    start_background_tasks(server.app.wsgi())
@@ -0,0 +1,52 @@
+import json
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).parent.parent
+# The scrapers import each other as top-level modules (python archive-scrape/allpermits.py)
+sys.path.insert(0, str(BACKEND_DIR / "archive-scrape"))
+sys.path.insert(0, str(BACKEND_DIR))
+
+from tests.fixture_site import FixtureSite
+from tests.stub_backboard import StubBackboard
+
+
+@pytest.fixture
+def site():
+    """A local HTTP site (tests/fixture_site.py) serving on 127.0.0.1 for one test."""
+    with FixtureSite() as s:
+        yield s
+
+
+@pytest.fixture
+def make_chatbot(tmp_path, monkeypatch):
+    """
+    make_chatbot(client=None) -> EventsChatbot over a two-item archive in tmp_path, talking
+    to a StubBackboard (or client) directly, without the resilient wrapper.
+    """
+    try:
+        import backboard  # noqa: F401
+    except ImportError:
+        stub = types.ModuleType("backboard")
+        stub.BackboardClient = StubBackboard
+        monkeypatch.setitem(sys.modules, "backboard", stub)
+    monkeypatch.setenv("BACKBOARD_API_KEY", "test")
+    monkeypatch.delenv("BACKBOARD_MOCK_URL", raising=False)
+    from chatbot_module.chatbot import EventsChatbot
+
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "bylaws_data.json").write_text(json.dumps([
+        {"name": "Noise bylaw", "text": "Quiet hours start at eleven at night."},
+        {"name": "Fence bylaw", "text": "Fences in front yards may be one metre high."},
+    ]))
+
+    def make(client=None):
+        bot = EventsChatbot(data_folder_path=data_dir)
+        bot.client = client or StubBackboard()
+        return bot
+
+    return make
@@ -0,0 +1,99 @@
+"""
+Local HTTP fixture site for testing the crawler offline.
+
+Pages are registered per path; each is a list of responses served in turn (the
+last one repeats), so a test can script "503, 503, then 200". Every request is
+logged with its arrival time and headers.
+
+    with FixtureSite() as site:
+        site.page("/permits/", links=["/permits/a", "/other/"])
+        site.page("/flaky", responses=[Response(503), Response(200, "ok")])
+        crawler.fetch(site.url("/flaky"))
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Response:
+    """One scripted response: status, body (text or bytes), content type and extra headers."""
+
+    def __init__(self, status=200, body="", headers=None, content_type="text/html; charset=utf-8"):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.content_type = content_type
+
+
+def link_page(title, links):
+    """A minimal HTML page with an <h1> and one <a> per link."""
+    anchors = "".join(f'<a href="{href}">{href}</a>' for href in links)
+    return f"<html><body><main><h1>{title}</h1><p>{title} text</p>{anchors}</main></body></html>"
+
+
+class FixtureSite:
+    def __init__(self):
+        self.pages = {}
+        self.log = []
+        self._lock = threading.Lock()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site._serve(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_address[1]}{path}"
+
+    def page(self, path, links=(), responses=None, etag=None):
+        """
+        Register path. By default it serves link_page(path, links) with links made absolute;
+        responses scripts the status codes instead. With etag, a matching If-None-Match gets a 304.
+        """
+        if responses is None:
+            responses = [Response(200, link_page(path, [self.url(link) for link in links]))]
+        self.pages[path] = {"responses": list(responses), "served": 0, "etag": etag}
+
+    def requests_for(self, path):
+        """(arrival time, headers) of each request for path, in order."""
+        with self._lock:
+            return [(t, headers) for t, p, headers in self.log if p == path]
+
+    def _serve(self, handler):
+        with self._lock:
+            self.log.append((time.monotonic(), handler.path, dict(handler.headers)))
+            page = self.pages.get(handler.path)
+            if page is not None:
+                response = page["responses"][min(page["served"], len(page["responses"]) - 1)]
+                page["served"] += 1
+        if page is None:
+            response = Response(404, "not found")
+        elif page["etag"] and handler.headers.get("If-None-Match") == page["etag"]:
+            response = Response(304)
+        body = response.body if isinstance(response.body, bytes) else response.body.encode("utf-8")
+        handler.send_response(response.status)
+        if page is not None and page["etag"]:
+            handler.send_header("ETag", page["etag"])
+        for name, value in response.headers.items():
+            handler.send_header(name, value)
+        if response.status != 304:
+            handler.send_header("Content-Type", response.content_type)
+            handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        if response.status != 304:
+            handler.wfile.write(body)
@@ -0,0 +1,45 @@
+"""
+Scripted stand-in for the Backboard client, so chatbot tests run offline.
+
+The backboard SDK is not needed either: the chatbot fixture in conftest.py installs
+this module's StubBackboard as backboard.BackboardClient before importing the
+chatbot, then replaces the chatbot's client with a StubBackboard instance.
+"""
+import asyncio
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+
+class StubBackboard:
+    """
+    Answers every question with "answer: <question>" after delay seconds.
+
+    assistant_error is raised by create_assistant; hang makes add_message block its
+    thread (as a stuck HTTP call in a sync client would) for that many seconds.
+    """
+
+    def __init__(self, api_key=None, delay=0.0, assistant_error=None, hang=0.0):
+        self.delay = delay
+        self.assistant_error = assistant_error
+        self.hang = hang
+        self.calls = Counter()
+
+    async def create_assistant(self, **kwargs):
+        self.calls["create_assistant"] += 1
+        # Give concurrent callers the chance to pile up behind this one
+        await asyncio.sleep(0.01)
+        if self.assistant_error is not None:
+            raise self.assistant_error
+        return SimpleNamespace(assistant_id="assistant")
+
+    async def create_thread(self, assistant_id, **kwargs):
+        self.calls["create_thread"] += 1
+        return SimpleNamespace(thread_id=f"thread-{self.calls['create_thread']}")
+
+    async def add_message(self, thread_id, content, **kwargs):
+        self.calls["add_message"] += 1
+        if self.hang:
+            await asyncio.to_thread(time.sleep, self.hang)
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(content="answer: " + content.rsplit("User question: ", 1)[-1])
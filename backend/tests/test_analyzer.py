@@ -0,0 +1,78 @@
+import pytest
+
+from chatbot_module.analyzer import PassageIndex, QueryAnalysis, analyze, edit_distance, stem
+from chatbot_module.chunking import chunk_item
+
+
+def index_of(*texts):
+    return PassageIndex([p for i, text in enumerate(texts) for p in chunk_item("bylaws", {"name": f"Item {i}", "text": text})])
+
+
+@pytest.mark.parametrize("word, expected", [
+    ("permits", "permit"),
+    ("permitted", "permit"),
+    ("permit", "permit"),
+    ("running", "run"),
+    ("runs", "run"),
+    ("fees", "fee"),
+    ("bylaws", "bylaw"),
+    ("policies", "policy"),
+    ("address", "address"),
+    ("bus", "bus"),
+    ("falling", "fall"),
+])
+def test_stem(word, expected):
+    assert stem(word) == expected
+
+
+def test_analyze_drops_stopwords_and_stems():
+    assert analyze("What are the permits I need for a fence?") == ["permit", "fenc"]
+
+
+def test_edit_distance_counts_a_transposition_as_one_edit():
+    assert edit_distance("permit", "premit", 2) == 1
+    assert edit_distance("fence", "fnece", 2) == 1
+    assert edit_distance("permit", "permti", 1) == 1
+    assert edit_distance("permit", "permit", 1) == 0
+    assert edit_distance("permit", "pxrmxt", 1) == 2  # limit + 1 once over the limit
+    assert edit_distance("fence", "fencing", 1) == 2
+
+
+def test_known_terms_are_never_corrected():
+    # "fense" is a (misspelled) word in the archive itself, so it is searched as written
+    index = index_of("Fence permits for front yards", "Fense height rules")
+
+    analysis = QueryAnalysis("fense", {"bylaws": index})
+
+    assert analysis.corrections == {}
+    assert analysis.term_groups(index) == [[("fens", 1.0)]]
+
+
+def test_unknown_terms_are_corrected_within_the_edit_limit():
+    index = index_of("Fence permits for front yards")
+
+    analysis = QueryAnalysis("premit ffence", {"bylaws": index})
+
+    assert analysis.corrections == {"premit": ["permit"], "ffenc": ["fenc"]}
+    assert analysis.term_groups(index) == [[("permit", 0.8)], [("fenc", 0.8)]]
+
+
+def test_short_queries_need_every_term_long_queries_most():
+    index = index_of("x")
+
+    assert QueryAnalysis("fence permit", {"bylaws": index}).min_match == 2
+    assert QueryAnalysis("fence permit height rules", {"bylaws": index}).min_match == 3
+    assert QueryAnalysis("fence permit height rules front yard corner lot", {"bylaws": index}).min_match == 5
+
+
+def test_min_match_decides_which_items_are_returned():
+    index = index_of("Fence height rules", "Fence permit fees", "Pool permit fees")
+
+    def titles(query):
+        analysis = QueryAnalysis(query, {"bylaws": index})
+        return sorted(p["title"] for p in index.search(analysis.term_groups(index), analysis.min_match))
+
+    # Short query: every term must match
+    assert titles("fence permit") == ["Item 1"]
+    # Long query (5 terms, 3 needed): items matching enough of them qualify
+    assert titles("fence permit fees height rules") == ["Item 0", "Item 1"]
@@ -0,0 +1,31 @@
+import json
+
+import bylaws
+from crawl_state import CrawlState
+
+
+def test_missing_output_is_fetched_unconditionally(site, tmp_path, monkeypatch):
+    site.page("/bylaws/", links=["/noise"], etag='"v1"')
+    monkeypatch.setattr(bylaws, "url", site.url("/bylaws/"))
+    # Validators survive from an earlier run, but bylaws_data.json was deleted since
+    state = CrawlState("bylaws", state_dir=tmp_path / "crawl_state")
+    state.pages[site.url("/bylaws/")] = {"etag": '"v1"', "hash": "old"}
+    state.save()
+
+    bylaws.main(output_dir=str(tmp_path))
+
+    assert "If-None-Match" not in site.requests_for("/bylaws/")[0][1]
+    saved = json.loads((tmp_path / "bylaws_data.json").read_text())
+    assert [b["name"] for b in saved] == [site.url("/noise")]
+
+
+def test_not_modified_keeps_existing_output(site, tmp_path, monkeypatch):
+    site.page("/bylaws/", links=["/noise"], etag='"v1"')
+    monkeypatch.setattr(bylaws, "url", site.url("/bylaws/"))
+    bylaws.main(output_dir=str(tmp_path))
+    first = (tmp_path / "bylaws_data.json").read_text()
+
+    bylaws.main(output_dir=str(tmp_path))
+
+    assert site.requests_for("/bylaws/")[1][1]["If-None-Match"] == '"v1"'
+    assert (tmp_path / "bylaws_data.json").read_text() == first
@@ -0,0 +1,210 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from app.coalesce import SingleFlight
+from chatbot_module.analyzer import PassageIndex, QueryAnalysis
+from chatbot_module.chunking import chunk_item
+from chatbot_module.resilient import BackboardUnavailable
+from tests.stub_backboard import StubBackboard
+
+QUESTIONS = ["noise bylaw quiet hours", "fence height front yard", "parking downtown"]
+
+
+def test_batch_creates_the_assistant_once(make_chatbot):
+    client = StubBackboard(delay=0.01)
+    bot = make_chatbot(client)
+
+    results = asyncio.run(bot.get_responses(QUESTIONS, concurrency=3))
+
+    assert [r["response"] for r in results] == [f"answer: {q}" for q in QUESTIONS]
+    assert client.calls["create_assistant"] == 1
+    assert client.calls["add_message"] == 3
+    saved = json.loads((bot.data_path / "ai_responses.json").read_text())
+    assert [r["query"] for r in saved] == QUESTIONS
+
+
+def test_unavailable_backboard_answers_the_whole_batch_from_the_archive(make_chatbot):
+    client = StubBackboard(assistant_error=BackboardUnavailable("down"))
+    bot = make_chatbot(client)
+
+    results = asyncio.run(bot.get_responses(QUESTIONS))
+
+    assert [r["source"] for r in results] == ["fallback"] * 3
+    assert client.calls["create_assistant"] == 1
+    assert client.calls["add_message"] == 0
+
+
+def test_failed_assistant_creation_fails_the_batch(make_chatbot):
+    client = StubBackboard(assistant_error=ValueError("bad key"))
+
+    with pytest.raises(ValueError):
+        asyncio.run(make_chatbot(client).get_responses(QUESTIONS))
+    assert client.calls["create_assistant"] == 1
+
+
+def test_concurrent_questions_share_one_assistant(make_chatbot):
+    client = StubBackboard()
+    bot = make_chatbot(client)
+
+    async def ask_all():
+        return await asyncio.gather(*(bot._ask(q) for q in QUESTIONS))
+
+    asyncio.run(ask_all())
+
+    assert client.calls["create_assistant"] == 1
+
+
+def test_search_passages_batch_matches_single_searches(make_chatbot):
+    bot = make_chatbot()
+    queries = QUESTIONS + ["noyse", ""]
+
+    assert bot.search_passages_batch(queries) == [bot.search_passages(q) for q in queries]
+
+
+def test_search_many_ranks_like_search():
+    items = [{"name": f"Bylaw {i}", "text": f"permit fee {'fence ' * i}noise {i}"} for i in range(6)]
+    index = PassageIndex([p for item in items for p in chunk_item("bylaws", item)])
+    queries = ["fence permit", "noise", "fence noise permit fee", "unknown words here"]
+    analyses = [QueryAnalysis(q, {"bylaws": index}) for q in queries]
+    requests = [(a.term_groups(index), a.min_match) for a in analyses]
+
+    ranked = index.search_many(requests, max_items=3)
+
+    assert ranked == [index.search(groups, min_match, max_items=3) for groups, min_match in requests]
+    assert [p["title"] for p in ranked[0]] == ["Bylaw 5", "Bylaw 4", "Bylaw 3"]
+    assert ranked[3] == []
+
+
+def test_single_flight_follower_shares_the_leader_result():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = {}
+
+    def leader_fn():
+        calls.append("leader")
+        release.wait(5)
+        return "answer"
+
+    def run(name, fn):
+        results[name] = flights.do("key", fn)
+
+    leader = threading.Thread(target=run, args=("leader", leader_fn))
+    leader.start()
+    while not flights.in_flight():
+        pass
+    follower = threading.Thread(target=run, args=("follower", lambda: calls.append("follower")))
+    follower.start()
+    while flights.in_flight().get("key") != 1:
+        pass
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert calls == ["leader"]
+    assert results == {"leader": ("answer", False), "follower": ("answer", True)}
+    # Nothing is kept: the next call runs again
+    assert flights.do("key", lambda: "fresh") == ("fresh", False)
+
+
+def test_single_flight_follower_gets_the_leader_exception():
+    flights = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError("llm down")
+
+    def run(fn):
+        try:
+            flights.do("key", fn)
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=run, args=(failing,))
+    leader.start()
+    while not flights.in_flight():
+        pass
+    follower = threading.Thread(target=run, args=(lambda: "never",))
+    follower.start()
+    while flights.in_flight().get("key") != 1:
+        pass
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert len(errors) == 2 and errors[0] is errors[1]
+    assert flights.in_flight() == {}
+
+
+@pytest.fixture
+def client(make_chatbot, monkeypatch):
+    import app.routes as routes
+    from app import create_app
+
+    stub = StubBackboard()
+    monkeypatch.setattr(routes, "get_chatbot", lambda: make_chatbot(stub))
+    test_client = create_app(start_background=False).test_client()
+    test_client.stub = stub
+    return test_client
+
+
+def test_chat_batch_route(client):
+    response = client.post("/api/chat/batch", json={"questions": QUESTIONS, "concurrency": 2})
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body["count"] == 3 and body["errors"] == 0
+    assert [r["response"] for r in body["results"]] == [f"answer: {q}" for q in QUESTIONS]
+
+
+def test_chat_batch_route_streams_each_answer(client):
+    response = client.post("/api/chat/batch", json={"questions": QUESTIONS, "stream": True})
+
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert sorted(line["index"] for line in lines[:-1]) == [0, 1, 2]
+    assert lines[-1] == {"done": True, "count": 3, "errors": 0}
+
+
+def test_chat_batch_route_rejects_bad_input(client):
+    assert client.post("/api/chat/batch", json={"questions": []}).status_code == 400
+    assert client.post("/api/chat/batch", json={"questions": ["ok", " "]}).status_code == 400
+    assert client.post("/api/chat/batch", json={"questions": ["ok"], "concurrency": "x"}).status_code == 400
+
+
+def test_chat_coalescing_key_includes_the_snapshot_version(client, monkeypatch):
+    import app.routes as routes
+
+    version = ["v1"]
+    holder = type("Holder", (), {"current": lambda self: type("Snap", (), {"version": version[0]})()})()
+    monkeypatch.setattr(routes, "get_snapshot_holder", lambda: holder)
+    keys = []
+    monkeypatch.setattr(routes.CHAT_FLIGHTS, "do", lambda key, fn: (keys.append(key), ({"response": "x"}, False))[1])
+
+    client.post("/api/chat", json={"message": "Noise bylaw?"})
+    client.post("/api/chat", json={"message": "noise   BYLAW"})
+    version[0] = "v2"
+    client.post("/api/chat", json={"message": "noise bylaw"})
+
+    assert keys[0] == keys[1] == ("noise bylaw", "v1")
+    assert keys[2] == ("noise bylaw", "v2")
+
+
+def test_hung_backend_does_not_hold_the_batch(make_chatbot):
+    import app.routes as routes
+    from chatbot_module.resilient import CircuitBreaker, ResilientClient
+
+    client = StubBackboard(hang=3.0)
+    bot = make_chatbot(ResilientClient(client, breaker=CircuitBreaker(), message_timeout=0.2))
+
+    started = time.monotonic()
+    results = routes._run_batch(bot, QUESTIONS[:2], concurrency=2)
+
+    # The deadline answers from the archive; the threads still sleeping are not waited for
+    assert time.monotonic() - started < 2.0
+    assert [r["source"] for r in results] == ["fallback", "fallback"]
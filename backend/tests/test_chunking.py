@@ -0,0 +1,68 @@
+from chatbot_module.chunking import PassageCache, chunk_item, chunk_text
+
+TEXT = " ".join(f"word{i}" for i in range(400))
+
+
+def test_chunks_respect_the_size_and_break_between_words():
+    chunks = chunk_text(TEXT, size=200, overlap=50)
+
+    assert len(chunks) > 1
+    assert all(len(c) <= 200 for c in chunks)
+    words = set(TEXT.split())
+    assert all(w in words for c in chunks for w in c.split())
+
+
+def test_consecutive_chunks_overlap_and_cover_the_text():
+    chunks = chunk_text(TEXT, size=200, overlap=50)
+
+    for prev, nxt in zip(chunks, chunks[1:]):
+        shared = set(prev.split()) & set(nxt.split())
+        assert shared and nxt.split()[0] in prev.split()
+    covered = set(w for c in chunks for w in c.split())
+    assert covered == set(TEXT.split())
+    assert chunks[-1].endswith("word399")
+
+
+def test_short_and_empty_text():
+    assert chunk_text("  a   short\ttext ") == ["a short text"]
+    assert chunk_text("") == []
+    # A single word longer than the size is cut rather than looping forever
+    assert "".join(chunk_text("x" * 25, size=10, overlap=3)).startswith("x" * 10)
+
+
+def test_passages_carry_title_and_stable_ids():
+    item = {"heading": "Fence permits", "text": TEXT, "url": "https://example.org/fences"}
+
+    passages = chunk_item("permits", item, size=200, overlap=50)
+
+    assert [p["id"] for p in passages] == [f"{passages[0]['parent_id']}:{n}" for n in range(len(passages))]
+    assert all(p["title"] == "Fence permits" and p["item"] is item for p in passages)
+    assert "example.org" not in " ".join(p["text"] for p in passages)
+    assert chunk_item("permits", dict(item))[0]["id"] == chunk_item("permits", item)[0]["id"]
+
+
+def test_passage_cache_reuses_items_by_identity():
+    cache = PassageCache()
+    a, b = {"name": "A", "text": "alpha"}, {"name": "B", "text": "bravo"}
+    items = [a, b]
+
+    first = cache.get("bylaws", items)
+    assert cache.get("bylaws", items) is first
+    # A new list with the same objects (a fresh MeetingsStore.load) keeps the same passage list
+    assert cache.get("bylaws", [a, b]) is first
+
+    c = {"name": "A", "text": "alpha, amended"}
+    changed = cache.get("bylaws", [c, b])
+    assert changed is not first
+    assert [p["text"] for p in changed] == ["alpha, amended", "bravo"]
+    # b's passages are reused, not chunked again
+    assert changed[1] is first[1]
+
+
+def test_passage_cache_does_not_reuse_equal_but_new_items():
+    cache = PassageCache()
+    first = cache.get("bylaws", [{"name": "A", "text": "alpha"}])
+
+    again = cache.get("bylaws", [{"name": "A", "text": "alpha"}])
+
+    assert again is not first and again == first
@@ -0,0 +1,38 @@
+import json
+
+from chatbot_module.compiled import open_compiled
+from chatbot_module.snapshot import archive_fingerprint, build_snapshot, compile_archive
+
+
+def make_archive(data_dir):
+    data_dir.mkdir(exist_ok=True)
+    (data_dir / "bylaws_data.json").write_text(json.dumps(
+        [{"heading": f"Bylaw {i}", "text": f"Section {i} about noise and parking"} for i in range(50)]))
+    (data_dir / "ai_responses.json").write_text(json.dumps([{"question": "hi", "response": "hello"}]))
+    (data_dir / "pending_requests.json").write_text(json.dumps([{"id": "a", "title": "Bike lanes"}]))
+    return data_dir
+
+
+def test_live_categories_are_not_compiled(tmp_path):
+    data_dir = make_archive(tmp_path / "data")
+
+    out, _ = compile_archive(data_dir)
+    compiled = open_compiled(out, archive_fingerprint(data_dir))
+
+    assert set(compiled.categories) == {"bylaws_data"}
+    assert build_snapshot(data_dir).compiled is not None
+
+
+def test_decoded_passages_are_bounded(tmp_path):
+    data_dir = make_archive(tmp_path / "data")
+    out, _ = compile_archive(data_dir)
+    passages = open_compiled(out, archive_fingerprint(data_dir)).index("bylaws_data").passages
+    passages.cache_size = 10
+
+    first = passages[0]
+    for pos in range(1, len(passages)):
+        passages[pos]
+
+    assert len(passages._cache) == 10
+    assert passages[0] == first and passages[0] is not first
+    assert passages[len(passages) - 1] is passages[len(passages) - 1]
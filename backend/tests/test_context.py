@@ -0,0 +1,73 @@
+import sys
+
+from chatbot_module import context
+from chatbot_module.context import CONTEXT_HEADER, ContextAssembler, count_tokens
+
+WORDS = "alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima mike".split()
+
+
+def candidate(i, rank=None, weight=1.0, category="bylaws_data"):
+    # Distinct wording per candidate so none is dropped as a near-duplicate
+    filler = " ".join(f"{WORDS[(i + j) % len(WORDS)]}{i}" for j in range(40))
+    return {"category": category, "text": f"Fence permit rules {i}. {filler}",
+            "rank": i if rank is None else rank, "weight": weight}
+
+
+def test_context_stays_within_the_token_budget():
+    candidates = [candidate(i) for i in range(30)]
+    for budget in (250, 400, 1000):
+        result = ContextAssembler(token_budget=budget).assemble("fence permit", candidates)
+        assert result["passages"]
+        assert result["tokens"] <= budget
+        assert result["tokens"] == count_tokens(result["text"])
+
+
+def budget_for(passages, sample):
+    """A budget with room for about passages + 1/2 candidates like sample."""
+    header = count_tokens(CONTEXT_HEADER)
+    one = ContextAssembler(token_budget=10000).assemble("fence permit", [sample])["tokens"] - header
+    return header + passages * one + one // 2
+
+
+def test_lowest_ranked_candidates_are_dropped_first():
+    candidates = [candidate(i) for i in range(10)]
+
+    result = ContextAssembler(token_budget=budget_for(3, candidates[0])).assemble("fence permit", list(reversed(candidates)))
+
+    kept = sorted(p["rank"] for p in result["passages"])
+    assert kept == list(range(len(kept)))
+    assert 0 < len(kept) < 10
+    assert result["dropped"]["budget"] == 10 - len(kept)
+
+
+def test_filler_is_dropped_before_matches():
+    matches = [candidate(i) for i in range(3)]
+    filler = [candidate(i + 3, rank=0, weight=0.5, category="events") for i in range(3)]
+
+    result = ContextAssembler(token_budget=budget_for(3, matches[0])).assemble("fence permit", filler + matches)
+
+    categories = [p["category"] for p in result["passages"]]
+    # Every match fits; filler only gets what is left (possibly one truncated passage)
+    assert categories.count("bylaws_data") == 3
+    assert categories.count("events") <= 1
+    assert result["dropped"]["budget"] >= 2
+
+
+def test_near_duplicates_are_dropped():
+    first = candidate(1)
+    copy = {**first, "category": "permits", "rank": 0, "text": first["text"] + " Contact the city."}
+
+    result = ContextAssembler().assemble("fence permit", [first, copy])
+
+    assert len(result["passages"]) == 1
+    assert result["dropped"]["duplicates"] == 1
+
+
+def test_tiktoken_is_loaded_on_first_count(monkeypatch):
+    monkeypatch.setattr(context, "_encoding", None)
+    monkeypatch.setattr(context, "_encoding_loaded", False)
+    # Importing tiktoken fails: the estimate is used instead
+    monkeypatch.setitem(sys.modules, "tiktoken", None)
+
+    assert count_tokens("Fence permits, explained.") == 7
+    assert context._encoding_loaded and context._encoding is None
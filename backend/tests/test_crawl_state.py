@@ -0,0 +1,51 @@
+from crawl_state import CrawlState, diff_records, load_json, write_json_atomic
+
+
+class FakeResponse:
+    def __init__(self, **headers):
+        self.headers = headers
+
+
+def test_validators_missing_from_a_response_are_kept(tmp_path):
+    state = CrawlState("test", state_dir=tmp_path)
+    url = "https://example.org/page"
+    state.update(url, response=FakeResponse(**{"ETag": '"v1"', "Last-Modified": "Mon, 05 Oct 2026 10:00:00 GMT"}))
+
+    # A 304 that only repeats the ETag
+    state.update(url, response=FakeResponse(ETag='"v1"'))
+
+    assert state.conditional_headers(url) == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 05 Oct 2026 10:00:00 GMT",
+    }
+
+
+def test_new_validators_replace_old_ones(tmp_path):
+    state = CrawlState("test", state_dir=tmp_path)
+    url = "https://example.org/page"
+    state.update(url, response=FakeResponse(ETag='"v1"'))
+    state.update(url, response=FakeResponse(ETag='"v2"'))
+
+    assert state.get(url)["etag"] == '"v2"'
+
+
+def test_state_round_trips_through_disk(tmp_path):
+    state = CrawlState("test", state_dir=tmp_path)
+    state.update("https://example.org/", body_hash="abc", records=[{"a": 1}])
+    state.save()
+
+    assert CrawlState("test", state_dir=tmp_path).get("https://example.org/")["records"] == [{"a": 1}]
+
+
+def test_write_json_atomic_leaves_no_temp_files(tmp_path):
+    write_json_atomic(tmp_path / "sub" / "out.json", {"ok": True})
+
+    assert load_json(tmp_path / "sub" / "out.json") == {"ok": True}
+    assert [p.name for p in (tmp_path / "sub").iterdir()] == ["out.json"]
+
+
+def test_diff_records():
+    changes = diff_records([{"k": 1, "v": "a"}, {"k": 2, "v": "b"}], [{"k": 2, "v": "c"}, {"k": 3, "v": "d"}],
+                           lambda r: r["k"])
+
+    assert changes == {"added": [{"k": 3, "v": "d"}], "modified": [{"k": 2, "v": "c"}], "removed": [{"k": 1, "v": "a"}]}
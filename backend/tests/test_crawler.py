@@ -0,0 +1,113 @@
+import re
+
+from crawl_state import CrawlState
+from crawler import Crawler, retry_after_seconds
+from tests.fixture_site import Response
+
+_HREF_RE = re.compile(r'href="([^"]+)"')
+_TITLE_RE = re.compile(r"<h1>(.*?)</h1>")
+
+
+def parse(url, html):
+    return [{"url": url, "title": _TITLE_RE.search(html).group(1)}], _HREF_RE.findall(html)
+
+
+def quiet_crawler(**options):
+    options = {"rate_per_host": 0, "backoff": 0.01, "progress_every": 0, **options}
+    return Crawler(**options)
+
+
+def test_depth_is_tracked_per_section(site):
+    site.page("/a/", links=["/a/1", "/a/2", "/b/"])
+    site.page("/a/1", links=["/a/1/x"])
+    site.page("/a/2", links=["/a/1"])
+    site.page("/a/1/x", links=["/a/1/x/deep"])
+    site.page("/a/1/x/deep")
+    site.page("/b/", links=["/b/1"])
+    site.page("/b/1")
+
+    results = quiet_crawler().crawl_sections([site.url("/a/"), site.url("/b/")], parse, max_depth=2)
+
+    # /b/ is linked from /a/ but outside it; /a/1/x/deep is three hops away; /a/1 is fetched once
+    assert [r["title"] for r in results[site.url("/a/")]] == ["/a/", "/a/1", "/a/1/x", "/a/2"]
+    assert [r["title"] for r in results[site.url("/b/")]] == ["/b/", "/b/1"]
+    assert site.requests_for("/a/1/x/deep") == []
+    assert len(site.requests_for("/a/1")) == 1
+    assert len(site.requests_for("/b/")) == 1
+
+
+def test_requests_to_one_host_are_rate_limited(site):
+    paths = [f"/p{i}" for i in range(6)]
+    for path in paths:
+        site.page(path)
+    crawler = quiet_crawler(max_workers=6, rate_per_host=20)
+
+    crawler.crawl_sections([site.url(p) for p in paths], parse, max_depth=0)
+
+    arrivals = sorted(t for path in paths for t, _ in site.requests_for(path))
+    gaps = [b - a for a, b in zip(arrivals, arrivals[1:])]
+    assert len(arrivals) == 6
+    # 20 requests/s: at least 50 ms apart (a little slack for timer resolution)
+    assert min(gaps) >= 0.045
+
+
+def test_retries_server_errors_with_backoff(site):
+    site.page("/flaky", responses=[Response(503), Response(502), Response(200, "<h1>ok</h1>")])
+    crawler = quiet_crawler(max_retries=3)
+
+    assert crawler.fetch(site.url("/flaky")) == "<h1>ok</h1>"
+    assert len(site.requests_for("/flaky")) == 3
+    assert crawler.stats.retries == 2
+    assert crawler.stats.failures == 0
+
+
+def test_gives_up_after_max_retries(site):
+    site.page("/down", responses=[Response(500)])
+    crawler = quiet_crawler(max_retries=2)
+
+    assert crawler.fetch(site.url("/down")) is None
+    assert len(site.requests_for("/down")) == 3
+    assert crawler.stats.failures == 1
+
+
+def test_client_errors_are_not_retried(site):
+    crawler = quiet_crawler(max_retries=3)
+
+    assert crawler.fetch(site.url("/missing")) is None
+    assert len(site.requests_for("/missing")) == 1
+
+
+def test_retry_after_is_honoured(site):
+    site.page("/busy", responses=[Response(429, headers={"Retry-After": "1"}), Response(200, "<h1>ok</h1>")])
+    crawler = quiet_crawler(max_retries=1, backoff=0.001)
+
+    assert crawler.fetch(site.url("/busy")) == "<h1>ok</h1>"
+    (first, _), (second, _) = site.requests_for("/busy")
+    assert second - first >= 0.95
+
+
+def test_retry_after_values():
+    assert retry_after_seconds("3") == 3.0
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds("soon") is None
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_not_modified_pages_reuse_the_previous_parse(site, tmp_path):
+    site.page("/page", links=["/page/child"], etag='"v1"')
+    url = site.url("/page")
+    parsed = []
+
+    def counting_parse(url, html):
+        parsed.append(url)
+        return parse(url, html)
+
+    state = CrawlState("test", state_dir=tmp_path)
+    first = quiet_crawler().fetch_page(url, counting_parse, state)
+    crawler = quiet_crawler()
+    second = crawler.fetch_page(url, counting_parse, state)
+
+    assert second == first
+    assert parsed == [url]
+    assert crawler.stats.not_modified == 1
+    assert site.requests_for("/page")[1][1].get("If-None-Match") == '"v1"'
@@ -0,0 +1,133 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import events
+from app.meetings_store import MeetingsStore
+from crawl_state import CrawlState
+
+
+def results_page(rows, pages=None):
+    body = "".join(
+        f'<tr><td>{date}</td><td><a href="/m/{name}">{name}</a></td><td><a href="/a/{name}">Agenda</a></td></tr>'
+        for date, name in rows
+    )
+    pager = "".join(f'<a data-page="{p}">{p + 1}</a>' for p in range(pages or 0))
+    return f"<table><tbody>{body}</tbody></table>{pager}"
+
+
+class FakeSearch:
+    """Serves scripted result pages per (window, page) and logs each fetch."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+
+    def fetch_page(self, start_date, end_date, page):
+        self.fetched.append((start_date, page))
+        return self.pages.get((start_date, page), results_page([]))
+
+
+def test_date_windows_cover_the_range_without_gaps():
+    start, end = datetime(2025, 1, 1), datetime(2025, 3, 5)
+
+    windows = events.date_windows(start, end, 30)
+
+    assert windows[0][0] == start and windows[-1][1] == end
+    assert [b - a for a, b in windows] == [timedelta(days=29), timedelta(days=29), timedelta(days=3)]
+    assert all(nxt[0] - prev[1] == timedelta(days=1) for prev, nxt in zip(windows, windows[1:]))
+    assert events.date_windows(start, start, 30) == [(start, start)]
+
+
+def test_scrape_window_fetches_every_page_of_the_pager():
+    day = datetime(2025, 1, 1)
+    search = FakeSearch({
+        (day, 0): results_page([("January 2, 2025", "Council")], pages=3),
+        (day, 1): results_page([("January 3, 2025", "Planning")], pages=3),
+        (day, 2): results_page([("January 3, 2025", "Planning"), ("January 4, 2025", "Heritage")], pages=3),
+    })
+
+    with ThreadPoolExecutor(4) as pool:
+        meetings = events.scrape_window(search, pool, day, day, batch_size=4)
+
+    assert [m["meeting"] for m in meetings] == ["Council", "Planning", "Heritage"]
+    assert sorted(page for _, page in search.fetched) == [0, 1, 2]
+
+
+def test_scrape_window_without_pager_stops_at_repeated_rows():
+    day = datetime(2025, 1, 1)
+    search = FakeSearch({
+        (day, 0): results_page([("January 2, 2025", "Council")]),
+        (day, 1): results_page([("January 3, 2025", "Planning")]),
+        # The site repeats its last page past the end
+        (day, 2): results_page([("January 3, 2025", "Planning")]),
+        (day, 3): results_page([("January 3, 2025", "Planning")]),
+    })
+
+    with ThreadPoolExecutor(4) as pool:
+        meetings = events.scrape_window(search, pool, day, day, batch_size=2)
+
+    assert [m["meeting"] for m in meetings] == ["Council", "Planning"]
+
+
+def test_finished_past_windows_are_not_fetched_again(tmp_path, monkeypatch):
+    start = datetime(2020, 1, 1)
+    windows = events.date_windows(start, datetime(2020, 2, 29), 30)
+    pages = {(w[0], 0): results_page([(f"{w[0]:%B} {w[0].day}, 2020", f"Meeting {i}")])
+             for i, w in enumerate(windows)}
+    searches = []
+    monkeypatch.setattr(events, "CouncilSearch", lambda crawler: searches.append(FakeSearch(pages)) or searches[-1])
+    state = CrawlState("events", state_dir=tmp_path)
+
+    first = events.scrape_meetings(start, windows[-1][1], window_days=30, max_workers=2, state=state)
+    resumed = events.scrape_meetings(start, windows[-1][1], window_days=30, max_workers=2,
+                                     state=CrawlState("events", state_dir=tmp_path))
+
+    assert [m["meeting"] for m in first] == ["Meeting 0", "Meeting 1"]
+    assert resumed == first
+    assert {s for s, _ in searches[0].fetched} == {w[0] for w in windows}
+    assert searches[1].fetched == []
+
+
+def test_failed_window_is_fetched_on_the_next_run(tmp_path, monkeypatch):
+    start = datetime(2020, 1, 1)
+    windows = events.date_windows(start, datetime(2020, 2, 29), 30)
+    search = FakeSearch({(windows[1][0], 0): results_page([("February 1, 2020", "Council")])})
+    original = search.fetch_page
+    down = [True]
+
+    def fail_first_window(start_date, end_date, page):
+        if start_date == windows[0][0] and down[0]:
+            raise RuntimeError("down")
+        return original(start_date, end_date, page)
+
+    search.fetch_page = fail_first_window
+    monkeypatch.setattr(events, "CouncilSearch", lambda crawler: search)
+
+    events.scrape_meetings(start, windows[-1][1], window_days=30, max_workers=2,
+                           state=CrawlState("events", state_dir=tmp_path))
+    down[0] = False
+    search.fetched.clear()
+    events.scrape_meetings(start, windows[-1][1], window_days=30, max_workers=2,
+                           state=CrawlState("events", state_dir=tmp_path))
+
+    assert {s for s, _ in search.fetched} == {windows[0][0]}
+
+
+def test_merge_places_new_meetings_by_date(tmp_path):
+    store = MeetingsStore(tmp_path)
+    store.replace_all([
+        {"date": "March 3, 2025 6:00 pm", "meeting": "Council"},
+        {"date": "January 5, 2025 6:00 pm", "meeting": "Council"},
+    ])
+    store.append({"date": "April 1, 2025 10:00 AM", "meeting": "Recorded"})
+
+    changes = store.merge([
+        {"date": "February 1, 2025 6:00 pm", "meeting": "Planning"},
+        {"date": "May 1, 2025 6:00 pm", "meeting": "Heritage"},
+        {"date": "January 1, 2024 6:00 pm", "meeting": "Old"},
+        {"date": "March 3, 2025 6:00 pm", "meeting": "Council", "documents": {"Agenda": "a"}},
+    ], events.meeting_key, date=events.meeting_date)
+
+    assert [m["meeting"] for m in store.load()] == ["Heritage", "Recorded", "Council", "Planning", "Council", "Old"]
+    assert [m["meeting"] for m in changes["added"]] == ["Planning", "Heritage", "Old"]
+    assert store.load()[2]["documents"] == {"Agenda": "a"}
@@ -0,0 +1,24 @@
+from extract import extract_page
+
+PAGE = "https://example.org/permits/building/"
+
+
+def test_padded_pdf_href_is_kept_as_pdf():
+    html = '<main><h2>Forms</h2><a href=" forms/a.pdf ">Form A</a><a href=" next/ ">Next</a></main>'
+
+    content, links = extract_page(PAGE, html)
+
+    assert content == [{"heading": "Forms", "text": "",
+                        "pdfs": [{"text": "Form A", "url": PAGE + "forms/a.pdf"}]}]
+    assert links == [PAGE + "next/"]
+
+
+def test_section_text_and_links_in_document_order():
+    html = ("<main><p>Intro <b>text</b></p><h2>Fees</h2><p>One</p><p>Two</p>"
+            '<a href="/fees/">Fees</a><a href="https://other.org/x.PDF">X</a></main>')
+
+    content, links = extract_page(PAGE, html)
+
+    assert [(s["heading"], s["text"]) for s in content] == [(None, "Intro text"), ("Fees", "One Two ")]
+    assert content[1]["pdfs"] == [{"text": "X", "url": "https://other.org/x.PDF"}]
+    assert links == ["https://example.org/fees/"]
@@ -0,0 +1,78 @@
+import time
+import wave
+
+import numpy as np
+
+from app.live import RATE, LiveSession, recover_orphans
+from app.meetings_store import MeetingsStore
+
+
+class FakeEngine:
+    def transcribe(self, samples):
+        return {"text": "hello", "language": "en", "segments": [{"start": 0.0, "end": 1.0, "text": " hello"}]}
+
+
+def speech_pcm(seconds_silence=1.0, seconds_tone=2.0):
+    rng = np.random.default_rng(0)
+    quiet = rng.normal(0, 0.001, int(seconds_silence * RATE))
+    t = np.arange(int(seconds_tone * RATE)) / RATE
+    samples = np.concatenate([quiet, 0.5 * np.sin(2 * np.pi * 220 * t), quiet, quiet])
+    return (samples * 32767).astype("<i2").tobytes()
+
+
+def start_session(tmp_path, sent):
+    session = LiveSession("Budget Committee", sent.append, tmp_path / "recordings", FakeEngine())
+    session.add_audio(speech_pcm())
+    deadline = time.monotonic() + 5
+    while not session.segments and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert session.segments
+    return session
+
+
+def test_finished_session_leaves_no_partial_files(tmp_path):
+    store = MeetingsStore(tmp_path)
+    session = start_session(tmp_path, [])
+
+    meeting = session.finish(store)
+
+    assert [p.name for p in (tmp_path / "recordings").iterdir()] == [session.audio_filename]
+    assert store.get(meeting['id'])['transcript_segments'] == 1
+    assert recover_orphans(tmp_path / "recordings", store) == []
+
+
+def test_orphaned_session_is_saved_as_a_meeting(tmp_path):
+    store = MeetingsStore(tmp_path)
+    session = start_session(tmp_path, [])
+    # Still streaming in this worker: not an orphan
+    assert recover_orphans(tmp_path / "recordings", store) == []
+
+    # The worker dies: the open WAV is never closed and the lock is released by the OS
+    session.wav._file.flush()
+    session._owner.close()
+    recovered = recover_orphans(tmp_path / "recordings", store)
+
+    assert [m['id'] for m in recovered] == [session.meeting_id]
+    meeting = store.get(session.meeting_id)
+    assert meeting['meeting'] == "Budget Committee"
+    assert store.load_transcript(meeting)[0]['text'] == "hello"
+    with wave.open(str(session.audio_path), "rb") as f:
+        assert abs(f.getnframes() / f.getframerate() - 5.0) < 0.01
+    assert [p.name for p in (tmp_path / "recordings").iterdir()] == [session.audio_filename]
+    assert recover_orphans(tmp_path / "recordings", store) == []
+    assert len(store.load()) == 1
+
+
+def test_lock_without_session_files_is_removed(tmp_path):
+    store = MeetingsStore(tmp_path)
+    recordings = tmp_path / "recordings"
+    recordings.mkdir()
+    # A worker crashed after taking its lock but before writing the journal or any audio
+    (recordings / ".live-deadbeef0000.lock").touch()
+    session = start_session(tmp_path, [])
+
+    assert recover_orphans(recordings, store) == []
+
+    # The live session's lock is held, so it stays
+    assert sorted(p.name for p in recordings.iterdir() if p.suffix == ".lock") == [f".live-{session.id}.lock"]
+    session.finish(store)
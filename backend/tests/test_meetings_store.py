@@ -0,0 +1,123 @@
+import json
+
+from app.meetings_store import MeetingsStore
+
+
+def meeting(name, segments=None):
+    record = {"meeting": name, "date": "2025-01-01"}
+    if segments is not None:
+        record["transcript"] = segments
+    return record
+
+
+def test_append_after_torn_line_keeps_earlier_entries(tmp_path):
+    store = MeetingsStore(tmp_path)
+    store.append(meeting("A"))
+    # A crash mid-append leaves half a line behind
+    with open(store.journal_file, "ab") as f:
+        f.write(b'{"meeting": "B", "da')
+
+    store.append(meeting("C"))
+
+    assert [m["meeting"] for m in store.load()] == ["C", "A"]
+    assert store.journal_file.read_bytes().endswith(b"\n")
+
+
+def test_journal_is_compacted_at_the_threshold(tmp_path):
+    store = MeetingsStore(tmp_path, compact_threshold=3)
+    for name in ("A", "B"):
+        store.append(meeting(name))
+    assert not store.meetings_file.exists()
+
+    store.append(meeting("C"))
+
+    assert store.journal_file.read_bytes() == b""
+    assert [m["meeting"] for m in json.loads(store.meetings_file.read_text())] == ["C", "B", "A"]
+    store.append(meeting("D"))
+    assert [m["meeting"] for m in store.load()] == ["D", "C", "B", "A"]
+
+
+def test_journal_appended_by_another_process_is_counted(tmp_path):
+    store = MeetingsStore(tmp_path, compact_threshold=3)
+    other = MeetingsStore(tmp_path, compact_threshold=3)
+    store.append(meeting("A"))
+    other.append(meeting("B"))
+
+    # store's own count says one entry; the journal changed since, so it re-reads and sees two
+    store.append(meeting("C"))
+
+    assert store.journal_file.read_bytes() == b""
+    assert [m["meeting"] for m in store.load()] == ["C", "B", "A"]
+
+
+def test_crash_between_compaction_steps_does_not_duplicate(tmp_path):
+    store = MeetingsStore(tmp_path)
+    for name in ("A", "B"):
+        store.append(meeting(name))
+    journal = store.journal_file.read_bytes()
+    store.compact()
+    # As if the process died after writing meeting_data.json but before emptying the journal
+    store.journal_file.write_bytes(journal)
+
+    fresh = MeetingsStore(tmp_path)
+    assert [m["meeting"] for m in fresh.load()] == ["B", "A"]
+    fresh.compact()
+    assert [m["meeting"] for m in json.loads(store.meetings_file.read_text())] == ["B", "A"]
+
+
+def test_transcript_range_edges(tmp_path):
+    store = MeetingsStore(tmp_path)
+    record = store.append(meeting("A", [
+        {"start": 0.0, "end": 100.0, "text": "long"},  # overlaps everything after it
+        {"start": 10.0, "end": 12.0, "text": "short"},
+        {"start": 20.0, "end": 30.0, "text": "later"},
+        {"start": 30.0, "end": 31.0, "text": "last"},
+    ]))
+
+    def texts(start=None, end=None):
+        return [seg["text"] for seg in store.load_transcript_range(record, start, end)]
+
+    assert texts(13, 15) == ["long"]
+    assert texts(11, 21) == ["long", "short", "later"]
+    # Windows are half-open: a segment ending at start or starting at end is outside
+    assert texts(30, 40) == ["long", "last"]
+    assert texts(None, 20) == ["long", "short"]
+    assert texts(31) == ["long"]
+    assert texts(100) == []
+    assert texts() == ["long", "short", "later", "last"]
+
+
+def test_transcript_range_without_index_matches_indexed_read(tmp_path):
+    store = MeetingsStore(tmp_path)
+    record = store.append(meeting("A", [
+        {"start": 0.0, "end": 50.0, "text": "long"},
+        {"start": 5.0, "end": 6.0, "text": "short"},
+    ]))
+    indexed = store.load_transcript_range(record, 10, 20)
+    (store.transcripts_dir / store._index_name(record["transcript_file"])).unlink()
+
+    assert MeetingsStore(tmp_path).load_transcript_range(record, 10, 20) == indexed == [
+        {"start": 0.0, "end": 50.0, "text": "long"}]
+
+
+def test_hydration_reuses_unchanged_meetings(tmp_path):
+    store = MeetingsStore(tmp_path)
+    store.append(meeting("A", [{"start": 0.0, "end": 1.0, "text": "a"}]))
+    first = store.load(include_transcripts=True)
+
+    store.append(meeting("B", [{"start": 0.0, "end": 1.0, "text": "b"}]))
+    second = store.load(include_transcripts=True)
+
+    assert [m["transcript"][0]["text"] for m in second] == ["b", "a"]
+    assert second[1] is first[0]
+
+
+def test_transcript_cache_is_bounded(tmp_path):
+    store = MeetingsStore(tmp_path, transcript_cache_size=2)
+    records = [store.append(meeting(name, [{"start": 0.0, "end": 1.0, "text": name}])) for name in "ABC"]
+
+    for record in records:
+        store.load_transcript(record)
+    store.load(include_transcripts=True)
+
+    assert list(store._transcript_cache) == [r["transcript_file"] for r in records[1:]]
@@ -0,0 +1,36 @@
+import os
+import threading
+
+from app.metrics import MetricsRegistry
+
+
+def test_counts_from_every_thread_are_summed():
+    registry = MetricsRegistry()
+
+    def work():
+        for _ in range(1000):
+            registry.counter("requests_total", endpoint="/x").inc()
+            registry.histogram("request_duration_seconds", endpoint="/x").observe(0.01)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert registry.counter("requests_total", endpoint="/x").value() == 4000
+    assert registry.histogram("request_duration_seconds", endpoint="/x").snapshot()[1] == 4000
+
+
+def test_series_are_labelled_with_the_worker_pid():
+    registry = MetricsRegistry()
+    registry.counter("requests_total", endpoint="/x").inc()
+    registry.observe_stage("/api/chat", "llm", 0.2)
+
+    text = registry.render_prometheus()
+
+    pid = f'pid="{os.getpid()}"'
+    assert f'kingston_requests_total{{endpoint="/x",{pid}}} 1' in text
+    assert f'kingston_stage_duration_seconds_count{{endpoint="/api/chat",stage="llm",{pid}}} 1' in text
+    assert f'{pid},le="+Inf"' in text
+    assert registry.summary()["pid"] == os.getpid()
@@ -0,0 +1,115 @@
+import shutil
+
+import pytest
+
+import pdf_ingest
+from crawl_state import CrawlState
+from tests.fixture_site import Response
+
+
+def make_pdf(text):
+    """A one-page PDF showing text (Helvetica), with a correct xref table."""
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def serve_pdf(site):
+    site.page("/minutes.pdf", etag='"pdf-v1"',
+              responses=[Response(200, make_pdf("Council approved the site plan"), content_type="application/pdf")])
+    return [{"url": site.url("/minutes.pdf"), "title": "Minutes", "category": "meeting_data"}]
+
+
+def ingest(refs, data_dir):
+    return pdf_ingest.ingest(refs, str(data_dir), max_downloads=2, max_parsers=1, rate_per_host=0)
+
+
+def test_pdf_is_chunked_and_not_downloaded_again(site, tmp_path):
+    refs = serve_pdf(site)
+
+    changes = ingest(refs, tmp_path)
+    assert [r["text"] for r in changes["added"]] == ["Council approved the site plan"]
+
+    changes = ingest(refs, tmp_path)
+    requests = site.requests_for("/minutes.pdf")
+    assert len(requests) == 2
+    assert requests[1][1].get("If-None-Match") == '"pdf-v1"'
+    assert changes == {"added": [], "modified": [], "removed": []}
+
+
+def test_not_modified_pdf_without_cached_text_is_parsed_again(site, tmp_path):
+    refs = serve_pdf(site)
+    ingest(refs, tmp_path)
+    shutil.rmtree(tmp_path / "pdf_cache")
+
+    changes = ingest(refs, tmp_path)
+
+    # 304 to the conditional request, then an unconditional download to re-parse
+    requests = site.requests_for("/minutes.pdf")
+    assert len(requests) == 3
+    assert "If-None-Match" not in requests[2][1]
+    assert changes == {"added": [], "modified": [], "removed": []}
+    assert len(pdf_ingest.load_json(tmp_path / pdf_ingest.OUTPUT_FILE)) == 1
+
+
+def test_state_entry_without_a_hash_is_downloaded_again(site, tmp_path):
+    refs = serve_pdf(site)
+    state = CrawlState("pdfs", state_dir=tmp_path / "crawl_state")
+    state.update(refs[0]["url"], response=Response(headers={"ETag": '"pdf-v1"'}))
+    state.save()
+
+    changes = ingest(refs, tmp_path)
+
+    assert len(changes["added"]) == 1
+
+
+def test_unreferenced_pdfs_are_pruned(site, tmp_path):
+    refs = serve_pdf(site)
+    site.page("/agenda.pdf", responses=[Response(200, make_pdf("Agenda item one"), content_type="application/pdf")])
+    agenda = {"url": site.url("/agenda.pdf"), "title": "Agenda", "category": "meeting_data"}
+    ingest(refs + [agenda], tmp_path)
+    assert len(list((tmp_path / "pdf_cache").glob("*.json"))) == 2
+
+    changes = ingest(refs, tmp_path)
+
+    assert [r["text"] for r in changes["removed"]] == ["Agenda item one"]
+    assert len(list((tmp_path / "pdf_cache").glob("*.json"))) == 1
+    state = CrawlState("pdfs", state_dir=tmp_path / "crawl_state")
+    assert set(state.pages) == {refs[0]["url"]}
+
+
+def test_failed_download_keeps_the_cached_text(site, tmp_path):
+    refs = serve_pdf(site)
+    ingest(refs, tmp_path)
+    site.page("/minutes.pdf", responses=[Response(404)])
+
+    changes = ingest(refs, tmp_path)
+
+    assert changes == {"added": [], "modified": [], "removed": []}
+    assert len(list((tmp_path / "pdf_cache").glob("*.json"))) == 1
+
+
+def test_local_dir_needs_an_explicit_data_folder(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr("sys.argv", ["pdf_ingest.py", "--local-dir", str(tmp_path)])
+
+    with pytest.raises(SystemExit) as exc:
+        pdf_ingest.main()
+
+    assert exc.value.code == 2
+    assert "--data" in capsys.readouterr().err
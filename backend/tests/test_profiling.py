@@ -0,0 +1,47 @@
+from flask import Flask, jsonify
+
+from app import profiling
+
+
+def make_client(monkeypatch, token):
+    if token is None:
+        monkeypatch.delenv('PROFILE_ADMIN_TOKEN', raising=False)
+    else:
+        monkeypatch.setenv('PROFILE_ADMIN_TOKEN', token)
+    monkeypatch.delenv('PROFILE_SAMPLE_RATE', raising=False)
+    store = profiling.ProfileStore()
+    app = Flask(__name__)
+    profiling.init_app(app, store=store)
+
+    @app.route('/work')
+    def work():
+        return jsonify({'ok': True})
+
+    @app.route('/profiles')
+    def profiles():
+        if not profiling.admin_allowed():
+            return jsonify({'error': 'Forbidden'}), 403
+        return jsonify(store.list())
+
+    return app.test_client(), store
+
+
+def test_profiling_is_disabled_without_a_token(monkeypatch):
+    client, store = make_client(monkeypatch, None)
+
+    r = client.get('/work?profile=1', headers={'X-Profile': '1', 'X-Admin-Token': ''})
+
+    assert 'X-Profile-Id' not in r.headers
+    assert store.list() == []
+    assert client.get('/profiles').status_code == 403
+
+
+def test_profiling_needs_the_configured_token(monkeypatch):
+    client, store = make_client(monkeypatch, 's3cret')
+
+    assert 'X-Profile-Id' not in client.get('/work', headers={'X-Profile': '1', 'X-Admin-Token': 'wrong'}).headers
+    r = client.get('/work', headers={'X-Profile': '1', 'X-Admin-Token': 's3cret'})
+
+    assert r.headers['X-Profile-Id'] == store.list()[0]['id']
+    assert client.get('/profiles').status_code == 403
+    assert client.get('/profiles', headers={'X-Admin-Token': 's3cret'}).status_code == 200
@@ -0,0 +1,59 @@
+import json
+
+from app import refresh
+from app.meetings_store import MeetingsStore
+from app.refresh import ArchiveRefresher
+from chatbot_module.snapshot import SnapshotHolder
+
+
+def make_refresher(data_dir, interval=3600):
+    data_dir.mkdir(exist_ok=True)
+    (data_dir / "bylaws_data.json").write_text(json.dumps([{"name": "Noise bylaw", "url": "https://example.org/noise"}]))
+    return ArchiveRefresher(data_dir, SnapshotHolder(data_dir), MeetingsStore(data_dir), scrapers=[], interval=interval)
+
+
+def test_one_refresh_per_interval_across_processes(tmp_path):
+    data_dir = tmp_path / "data"
+    first, second = make_refresher(data_dir), make_refresher(data_dir)
+
+    assert first.refresh_once()
+    # Another worker's timer fires within the same interval
+    assert not second.refresh_once()
+    assert second.refresh_once(force=True)
+
+
+def test_refresh_is_due_again_after_the_interval(tmp_path):
+    data_dir = tmp_path / "data"
+    refresher = make_refresher(data_dir, interval=3600)
+    refresher.stamp_file.write_text(str(0))
+
+    assert refresher.refresh_once()
+    assert refresher.last_run() > 0
+
+
+def test_pdf_cache_is_shared_with_staging(tmp_path):
+    refresher = make_refresher(tmp_path / "data")
+
+    staging = refresher._stage()
+
+    assert (tmp_path / "data" / "pdf_cache").is_dir()
+    assert (staging / "pdf_cache").resolve() == (tmp_path / "data" / "pdf_cache").resolve()
+
+
+def test_staged_pdf_cache_is_kept_without_symlinks(tmp_path, monkeypatch):
+    def no_symlinks(*args, **kwargs):
+        raise OSError("symlinks not supported")
+
+    monkeypatch.setattr(refresh.os, "symlink", no_symlinks)
+    refresher = make_refresher(tmp_path / "data")
+    staging = refresher._stage()
+    # What pdf_ingest leaves behind in staging
+    (staging / "pdf_cache").mkdir()
+    (staging / "pdf_cache" / "abc.json").write_text('{"hash": "abc", "pages": ["text"]}')
+    (staging / "crawl_state").mkdir()
+    (staging / "crawl_state" / "pdfs.json").write_text('{}')
+
+    refresher._publish(staging)
+
+    assert (tmp_path / "data" / "pdf_cache" / "abc.json").exists()
+    assert (tmp_path / "data" / "crawl_state" / "pdfs.json").exists()
@@ -0,0 +1,27 @@
+from chatbot_module.resilient import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def test_recovery_clears_every_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+    breaker.record_failure("create_thread")
+    breaker.record_failure("add_message")
+    breaker.record_failure("add_message")
+    assert breaker.state == OPEN
+
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    breaker.record_success("add_message")
+
+    assert breaker.state == CLOSED
+    assert breaker.failures == {}
+    breaker.record_failure("create_thread")
+    assert breaker.state == CLOSED
+
+
+def test_success_while_closed_only_resets_its_own_call():
+    breaker = CircuitBreaker(failure_threshold=3)
+    breaker.record_failure("add_message")
+    breaker.record_failure("create_thread")
+
+    breaker.record_success("create_thread")
+
+    assert breaker.failures == {"add_message": 1}
@@ -0,0 +1,31 @@
+import json
+import multiprocessing
+
+from app.storage import extend_json_list
+
+
+def _writer(path, lock_path, name, count):
+    for i in range(count):
+        extend_json_list(path, [{"query": f"{name}-{i}"}], lock_path)
+
+
+def test_concurrent_writers_keep_every_entry(tmp_path):
+    path = tmp_path / "ai_responses.json"
+    lock_path = tmp_path / ".ai_responses.lock"
+    ctx = multiprocessing.get_context("spawn")
+    writers = [ctx.Process(target=_writer, args=(path, lock_path, name, 40)) for name in ("a", "b")]
+    for p in writers:
+        p.start()
+    for p in writers:
+        p.join(60)
+        assert p.exitcode == 0
+
+    queries = [r["query"] for r in json.loads(path.read_text(encoding="utf-8"))]
+    assert sorted(queries) == sorted(f"{name}-{i}" for name in ("a", "b") for i in range(40))
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_extend_creates_missing_file(tmp_path):
+    path = tmp_path / "ai_responses.json"
+    assert extend_json_list(path, [{"query": "q"}], tmp_path / ".lock") == [{"query": "q"}]
+    assert extend_json_list(path, [], tmp_path / ".lock") == [{"query": "q"}]
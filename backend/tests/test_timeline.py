@@ -0,0 +1,65 @@
+import json
+
+from app.aggregates import AggregatesService
+from app.meetings_store import MeetingsStore
+from app.timeline import STATUSES, timeline_page
+from chatbot_module.snapshot import SnapshotHolder
+
+
+def make_service(data_dir):
+    data_dir.mkdir(exist_ok=True)
+    (data_dir / "bylaws_data.json").write_text(json.dumps(
+        [{"heading": f"Bylaw {i}", "text": "noise" if i % 2 else "parking"} for i in range(5)] + ["plain text record"]))
+    (data_dir / "meeting_data.json").write_text(json.dumps([
+        {"meeting": "City Council", "date": "February 08, 2026 03:34 AM", "meeting_url": "https://example.org/m1"},
+        {"meeting": "Planning Committee", "date": "January 12, 2026 06:00 PM", "meeting_url": "https://example.org/m2"},
+    ]))
+    (data_dir / "pending_requests.json").write_text(json.dumps([
+        {"id": "a", "title": "Bike lanes", "status": "passed", "submittedDate": "2/7/2026"},
+        {"id": "b", "title": "Night market", "status": "failed", "submittedDate": "1/3/2026"},
+        {"id": "c", "title": "Tree planting", "status": "pending", "submittedDate": "3/1/2026"},
+        {"id": "d", "title": "Dog park", "submittedDate": "2/20/2026"},
+    ]))
+    return AggregatesService(data_dir, SnapshotHolder(data_dir), MeetingsStore(data_dir))
+
+
+def test_summary_counts_match_the_timeline(tmp_path):
+    service = make_service(tmp_path / "data")
+    counts = service.compute()['timeline']
+    events = service.timeline()
+
+    assert counts == {'inProgress': 2, 'completed': 9, 'failed': 1}
+    for status, key in zip(STATUSES, ('inProgress', 'completed', 'failed')):
+        assert timeline_page(events, status=status)[0] == counts[key]
+
+
+def test_pages_are_newest_first_with_undated_records_last(tmp_path):
+    events = make_service(tmp_path / "data").timeline()
+
+    total, first = timeline_page(events, offset=0, limit=4)
+    _, rest = timeline_page(events, offset=4, limit=100)
+
+    assert total == 12
+    assert [e['date'] for e in first] == ["March 1, 2026", "February 20, 2026", "February 8, 2026", "February 7, 2026"]
+    assert all(e['date'] == "" for e in rest[-6:])
+    assert all(not any(k.startswith('_') for k in e) for e in first + rest)
+
+
+def test_search_and_status_filter(tmp_path):
+    events = make_service(tmp_path / "data").timeline()
+
+    assert timeline_page(events, query="NOISE")[0] == 2
+    total, items = timeline_page(events, query="night", status="failed")
+    assert total == 1 and items[0]['title'] == "✗ Rejected: Night market"
+    assert timeline_page(events, query="night", status="completed")[0] == 0
+
+
+def test_timeline_is_rebuilt_when_pending_requests_change(tmp_path):
+    data_dir = tmp_path / "data"
+    service = make_service(data_dir)
+    before = service.timeline()
+    assert service.timeline() is before
+
+    (data_dir / "pending_requests.json").write_text(json.dumps([{"id": "e", "title": "Skate park"}]))
+
+    assert len(service.timeline()) == len(before) - 3
@@ -0,0 +1,66 @@
+from app.meetings_store import MeetingsStore
+from app.transcript_index import TranscriptIndex
+
+
+def add_meeting(store, name, texts):
+    return store.append({
+        'meeting': name,
+        'date': "February 08, 2026 03:34 AM",
+        'meeting_url': '',
+        'documents': {},
+        'transcript': [{'speaker': f"SPEAKER_0{i % 2}", 'start': 5.0 * i, 'end': 5.0 * i + 4, 'text': text}
+                       for i, text in enumerate(texts)],
+    })
+
+
+def test_indexing_does_not_fill_the_transcript_cache(tmp_path):
+    store = MeetingsStore(tmp_path)
+    add_meeting(store, "Council", ["The site plan was approved", "Parking permits next"])
+    index = TranscriptIndex(store)
+
+    total, hits = index.search('"site plan"')
+
+    assert total == 1 and hits[0]['segment'] == 0
+    assert store._transcript_cache == {}
+
+
+def test_hit_text_is_read_at_the_segment_offset(tmp_path):
+    store = MeetingsStore(tmp_path)
+    texts = ["Opening remarks", "Budget for the new library", "Questions from the public", "Library hours"]
+    meeting = add_meeting(store, "Council", texts)
+    index = TranscriptIndex(store)
+
+    _, hits = index.search("library")
+
+    assert sorted(store.load_segment(hit['meeting'], hit['segment'])['text'] for hit in hits) == [texts[1], texts[3]]
+    assert [store.load_segment(meeting, n)['text'] for n in range(len(texts))] == texts
+    assert store._transcript_cache == {}
+
+
+def test_inline_transcripts_and_missing_index(tmp_path):
+    store = MeetingsStore(tmp_path)
+    meeting = add_meeting(store, "Council", ["one", "two"])
+    (store.transcripts_dir / store._index_name(meeting['transcript_file'])).unlink()
+    store._index_cache.clear()
+
+    assert store.load_segment(meeting, 1)['text'] == "two"
+    assert store.load_segment({'transcript': [{'text': "inline"}]}, 0)['text'] == "inline"
+
+
+def test_filters_follow_new_meetings(tmp_path):
+    store = MeetingsStore(tmp_path)
+    first = add_meeting(store, "Council", ["Parking permits", "Parking fines"])
+    index = TranscriptIndex(store)
+
+    assert index.search("parking", speaker="SPEAKER_01")[0] == 1
+    columns = index._filter_columns
+    assert index.search("parking", meeting_id=first['id'])[0] == 2
+    assert index._filter_columns is columns
+
+    second = add_meeting(store, "Planning", ["Parking minimums", "Parking study", "Parking garage"])
+
+    total, hits = index.search("parking", speaker="SPEAKER_00", meeting_id=second['id'])
+    assert total == 2
+    assert {hit['segment'] for hit in hits} == {0, 2}
+    assert index.search("parking", speaker="SPEAKER_00")[0] == 3
+    assert index.search("parking", meeting_id="missing")[0] == 0
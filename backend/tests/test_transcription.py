@@ -0,0 +1,57 @@
+import threading
+import time
+
+from app.transcription import FasterWhisperEngine, TranscriptionEngine, WhisperEngine
+
+
+class CountingEngine(TranscriptionEngine):
+    """Records how many transcribe calls run at once."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.running = 0
+        self.most = 0
+        self._count_lock = threading.Lock()
+
+    def _load(self):
+        return object()
+
+    def _transcribe(self, audio):
+        self.load()
+        with self._count_lock:
+            self.running += 1
+            self.most = max(self.most, self.running)
+        time.sleep(0.02)
+        with self._count_lock:
+            self.running -= 1
+        return {"text": audio, "language": "en", "segments": []}
+
+
+def run_concurrently(engine, calls=6):
+    threads = [threading.Thread(target=engine.transcribe, args=(str(i),)) for i in range(calls)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def test_engines_that_are_not_thread_safe_decode_one_at_a_time():
+    engine = CountingEngine()
+
+    run_concurrently(engine)
+
+    assert engine.most == 1
+
+
+def test_thread_safe_engines_are_not_serialized():
+    engine = CountingEngine()
+    engine.thread_safe = True
+
+    run_concurrently(engine)
+
+    assert engine.most > 1
+
+
+def test_shipped_engines():
+    assert not WhisperEngine.thread_safe
+    assert FasterWhisperEngine.thread_safe
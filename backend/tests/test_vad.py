@@ -0,0 +1,60 @@
+import wave
+
+import numpy as np
+
+from app import vad
+
+
+def write_wav(path, samples, rate=16000, channels=1):
+    pcm = (np.clip(samples, -1, 1) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(np.repeat(pcm, channels).tobytes())
+
+
+def meeting(rate=16000):
+    """Quiet noise with two loud bursts, at 3-5 s and 9-12 s of 15 s."""
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0, 0.001, 15 * rate)
+    for start, end in ((3, 5), (9, 12)):
+        t = np.arange((end - start) * rate) / rate
+        samples[start * rate:end * rate] += 0.5 * np.sin(2 * np.pi * 220 * t)
+    return samples
+
+
+def test_chunked_energies_match_the_whole_file(tmp_path):
+    samples = meeting()
+    write_wav(tmp_path / "a.wav", samples, channels=2)
+
+    db, hop, rate, total = vad.frame_energies(tmp_path / "a.wav", chunk_seconds=0.7)
+
+    expected = vad._frame_db(vad._to_float((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes(), 2, 1), hop)
+    assert total == len(samples) and rate == 16000
+    np.testing.assert_allclose(db, expected, atol=1e-3)
+
+
+def test_energy_regions_from_the_file(tmp_path):
+    write_wav(tmp_path / "a.wav", meeting())
+
+    regions = vad.energy_regions_file(tmp_path / "a.wav", pad=0)
+
+    assert [(round(a), round(b)) for a, b in regions] == [(3, 5), (9, 12)]
+
+
+def test_detect_speech_writes_the_speech_only_copy(tmp_path):
+    write_wav(tmp_path / "a.wav", meeting())
+
+    speech = vad.detect_speech(tmp_path / "a.wav", tmp_path / "a.speech.wav", engine="energy")
+
+    assert speech.report["applied"] and speech.report["regions"] == 2
+    assert speech.path == tmp_path / "a.speech.wav"
+
+
+def test_whole_recording():
+    speech = vad.whole_recording("a.wav", 12.345, "error", error="boom")
+
+    assert speech.path == "a.wav" and speech.speech_map is None
+    assert speech.report["totalSeconds"] == 12.35 and speech.report["error"] == "boom"
+    assert speech.remap([{"start": 1, "end": 2}]) == [{"start": 1, "end": 2}]
@@ -0,0 +1,11 @@
+"""
+Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+
+The archive is loaded and indexed here, in the gunicorn master (preload_app), so
+workers fork with it already in memory; background threads are started per worker
+by the post_fork hook in gunicorn.conf.py.
+"""
+from app import create_app, preload
+
+app = create_app(start_background=False)
+preload()
@@ -1,7 +1,7 @@
 /* eslint-disable @typescript-eslint/no-explicit-any */
 "use client";
 
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import axios from "axios";
 
 interface TranscriptSegment {
@@ -11,12 +11,22 @@ interface TranscriptSegment {
   text: string;
 }
 
+// Audio of a live session, kept so it can be torn down when the session ends
+interface LiveCapture {
+  socket: WebSocket;
+  stream: MediaStream;
+  context: AudioContext;
+  processor: ScriptProcessorNode;
+}
+
 interface Meeting {
+  id?: string;
   date: string;
   meeting: string;
   meeting_url: string;
   documents: Record<string, string>;
   transcript?: TranscriptSegment[];
+  transcript_segments?: number;
   audio_file?: string | null;
 }
 
@@ -34,10 +44,117 @@ export default function Meetings() {
     null,
   );
 
+  const [isLive, setIsLive] = useState(false);
+  const [liveStatus, setLiveStatus] = useState("");
+  const [liveSegments, setLiveSegments] = useState<TranscriptSegment[]>([]);
+  const liveCapture = useRef<LiveCapture | null>(null);
+
   useEffect(() => {
     fetchMeetings();
+    // Leaving the page ends a live session like Stop does (the server saves what it has)
+    return () => {
+      const capture = liveCapture.current;
+      stopCapture();
+      capture?.socket.close();
+    };
   }, []);
 
+  const stopCapture = () => {
+    const capture = liveCapture.current;
+    if (!capture) return;
+    liveCapture.current = null;
+    capture.processor.disconnect();
+    capture.context.close();
+    capture.stream.getTracks().forEach((track) => track.stop());
+  };
+
+  // Live transcription: microphone PCM is streamed over a WebSocket and segments come back as they are transcribed
+  const startLiveTranscription = async () => {
+    const meetingName = prompt("Enter meeting name:", `Meeting - ${new Date().toLocaleString()}`);
+    if (!meetingName) {
+      return; // User cancelled
+    }
+
+    let stream: MediaStream;
+    try {
+      stream = await navigator.mediaDevices.getUserMedia({ audio: { channelCount: 1, echoCancellation: true } });
+    } catch (error) {
+      console.error("Error accessing microphone:", error);
+      alert("Unable to access microphone. Please check permissions.");
+      return;
+    }
+
+    const context = new AudioContext();
+    const source = context.createMediaStreamSource(stream);
+    const processor = context.createScriptProcessor(4096, 1, 1);
+    const socket = new WebSocket("ws://localhost:5001/api/live-transcription");
+    socket.binaryType = "arraybuffer";
+    liveCapture.current = { socket, stream, context, processor };
+
+    setLiveSegments([]);
+    setLiveStatus("Connecting...");
+    setIsLive(true);
+
+    socket.onopen = () => {
+      socket.send(JSON.stringify({ type: "start", meeting_name: meetingName, sample_rate: context.sampleRate }));
+    };
+
+    socket.onmessage = async (event) => {
+      const message = JSON.parse(event.data);
+      if (message.type === "ready") {
+        setLiveStatus("Listening...");
+        // 16-bit little-endian mono PCM at the context's sample rate, as the server expects
+        processor.onaudioprocess = (e) => {
+          if (socket.readyState !== WebSocket.OPEN) return;
+          const samples = e.inputBuffer.getChannelData(0);
+          const pcm = new Int16Array(samples.length);
+          for (let i = 0; i < samples.length; i++) {
+            const s = Math.max(-1, Math.min(1, samples[i]));
+            pcm[i] = s < 0 ? s * 0x8000 : s * 0x7fff;
+          }
+          socket.send(pcm.buffer);
+        };
+        source.connect(processor);
+        processor.connect(context.destination);
+      } else if (message.type === "segment") {
+        setLiveSegments((prev) => {
+          const next = [...prev];
+          next[message.index] = message.segment;
+          return next;
+        });
+      } else if (message.type === "saved") {
+        socket.close();
+        setIsLive(false);
+        setLiveStatus("");
+        setLiveSegments([]);
+        await fetchMeetings();
+      } else if (message.type === "error") {
+        console.error("Live transcription error:", message.error);
+        setLiveStatus(`Error: ${message.error}`);
+      }
+    };
+
+    socket.onerror = () => {
+      setLiveStatus("Connection to the transcription server failed");
+    };
+
+    socket.onclose = () => {
+      stopCapture();
+      setIsLive(false);
+    };
+  };
+
+  const stopLiveTranscription = () => {
+    const capture = liveCapture.current;
+    if (!capture) return;
+    stopCapture();
+    setLiveStatus("Finishing transcript...");
+    // The server transcribes what is left, saves the meeting and answers with "saved"
+    if (capture.socket.readyState === WebSocket.OPEN) {
+      capture.socket.send(JSON.stringify({ type: "stop" }));
+    }
+  };
+
   const startRecording = async () => {
     try {
       const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
@@ -143,7 +260,7 @@ export default function Meetings() {
         .map((meeting) => ({
           ...meeting,
           parsedDate: parseDate(meeting.date),
-          hasTranscript: meeting.transcript && meeting.transcript.length > 0,
+          hasTranscript: (meeting.transcript_segments ?? meeting.transcript?.length ?? 0) > 0,
         }))
         .sort((a, b) => {
           // First, prioritize meetings with transcripts
@@ -157,6 +274,11 @@ export default function Meetings() {
         .map(({ parsedDate, hasTranscript, ...meeting }) => meeting); // Remove helper fields
 
       setMeetings(sortedMeetings);
+
+      // The listing only carries segment counts; load the transcripts themselves separately
+      sortedMeetings
+        .filter((meeting) => meeting.id && meeting.transcript_segments && !meeting.transcript)
+        .forEach((meeting) => fetchTranscript(meeting.id as string));
     } catch (error) {
       console.error("Error fetching meetings:", error);
     } finally {
@@ -164,6 +286,22 @@ export default function Meetings() {
     }
   };
 
+  const fetchTranscript = async (meetingId: string) => {
+    try {
+      const response = await axios.get(
+        `http://localhost:5001/api/meetings/${encodeURIComponent(meetingId)}/transcript`,
+      );
+      const segments: TranscriptSegment[] = response.data.segments || [];
+      setMeetings((prev) =>
+        prev.map((meeting) =>
+          meeting.id === meetingId ? { ...meeting, transcript: segments } : meeting,
+        ),
+      );
+    } catch (error) {
+      console.error("Error fetching transcript:", error);
+    }
+  };
+
   const parseDate = (dateString: string): Date | null => {
     try {
       // Handle formats like "November 4, 2024 6:00 pm - 8:00 pm" or "October 19, 2026 5:30 pm"
@@ -203,6 +341,19 @@ export default function Meetings() {
           Recent Meetings
         </h2>
         <div className="flex gap-2">
+          <button
+            onClick={isLive ? stopLiveTranscription : startLiveTranscription}
+            disabled={isRecording}
+            className={`flex items-center gap-2 px-4 py-2 rounded-lg font-medium transition whitespace-nowrap ${
+              isLive
+                ? "bg-red-600 text-white hover:bg-red-700"
+                : isRecording
+                ? "bg-gray-400 text-white cursor-not-allowed"
+                : "bg-white text-[#22529F] border border-[#22529F] hover:bg-indigo-50"
+            }`}
+          >
+            {isLive ? "Stop Live Transcription" : "Live Transcription"}
+          </button>
           {isRecording && (
             <button
               onClick={stopRecording}
@@ -216,9 +367,9 @@ export default function Meetings() {
           )}
           <button
             onClick={startRecording}
-            disabled={isRecording}
+            disabled={isRecording || isLive}
             className={`flex items-center gap-2 px-4 py-2 rounded-lg font-medium transition whitespace-nowrap ${
-              isRecording
+              isRecording || isLive
                 ? "bg-gray-400 text-white cursor-not-allowed"
                 : "bg-[#22529F] text-white hover:bg-[#00377c]"
             }`}
@@ -239,6 +390,33 @@ export default function Meetings() {
         </div>
       </div>
 
+      {(isLive || liveStatus) && (
+        <div className="bg-white rounded-lg shadow-md p-6 border border-red-200">
+          <div className="flex items-center gap-2 mb-3">
+            {isLive && <span className="inline-block w-3 h-3 rounded-full bg-red-600 animate-pulse"></span>}
+            <h3 className="text-lg font-semibold text-gray-900">Live Transcript</h3>
+            <span className="text-sm text-gray-500">{liveStatus}</span>
+          </div>
+          {liveSegments.length === 0 ? (
+            <p className="text-sm text-gray-500">Segments appear here as people speak.</p>
+          ) : (
+            <div className="space-y-3 bg-gray-50 p-4 rounded-lg max-h-96 overflow-y-auto">
+              {liveSegments.filter(Boolean).map((segment, segIdx) => (
+                <div key={segIdx} className="bg-white p-3 rounded border-l-4 border-red-500">
+                  <div className="flex items-center justify-between mb-1">
+                    <span className="font-semibold text-[#22529F]">Speaker {segment.speaker}</span>
+                    <span className="text-xs text-gray-500">
+                      {formatTime(segment.start)} - {formatTime(segment.end)}
+                    </span>
+                  </div>
+                  <p className="text-sm text-gray-700">{segment.text}</p>
+                </div>
+              ))}
+            </div>
+          )}
+        </div>
+      )}
+
       <div className="space-y-4">
         {meetings.length === 0 ? (
           <p className="text-gray-500">No meetings found</p>
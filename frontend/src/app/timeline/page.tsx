@@ -1,7 +1,6 @@
-/* eslint-disable @typescript-eslint/no-explicit-any */
 "use client";
 
-import { useState, useEffect, useRef, useCallback, useMemo } from "react";
+import { useState, useEffect, useRef, useCallback } from "react";
 import axios from "axios";
 
 interface TimelineEvent {
@@ -17,158 +16,84 @@ interface TimelineEvent {
   category?: string;
 }
 
+interface Stats {
+  timeline: { inProgress: number; completed: number; failed: number };
+}
+
+const ITEMS_PER_PAGE = 10;
+
 export default function Timeline() {
   const [searchQuery, setSearchQuery] = useState("");
+  const [debouncedQuery, setDebouncedQuery] = useState("");
   const [statusFilter, setStatusFilter] = useState<"all" | "in-progress" | "completed" | "failed">("all");
-  const [allEvents, setAllEvents] = useState<TimelineEvent[]>([]);
   const [displayedEvents, setDisplayedEvents] = useState<TimelineEvent[]>([]);
+  const [total, setTotal] = useState(0);
   const [loading, setLoading] = useState(true);
-  const [page, setPage] = useState(0);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [showBackToTop, setShowBackToTop] = useState(false);
+  const [stats, setStats] = useState<Stats | null>(null);
   const observerTarget = useRef<HTMLDivElement>(null);
-  const ITEMS_PER_PAGE = 10;
+  // Bumped on every new search/filter so responses for an older one are ignored
+  const requestId = useRef(0);
 
-  // Fetch all data and convert to timeline events
+  // Summary counts come precomputed from the backend, by the same rules as the timeline items
   useEffect(() => {
-    const fetchAllData = async () => {
-      try {
-        // Fetch all data from the API
-        const [dataResponse, pendingResponse, meetingsResponse] = await Promise.all([
-          axios.get("http://localhost:5001/api/data"),
-          axios.get("http://localhost:5001/api/pending-requests"),
-          axios.get("http://localhost:5001/api/events"),
-        ]);
-
-        const allData = dataResponse.data;
-        const pendingRequests = pendingResponse.data;
-        const meetings = meetingsResponse.data;
-
-        const events: TimelineEvent[] = [];
-
-        // Convert meetings to timeline events
-        meetings.forEach((meeting: any, idx: number) => {
-          const meetingDate = new Date(meeting.date.split(" - ")[0]);
-          // Create unique ID using meeting URL or combination of date and title with index
-          const uniqueId = meeting.meeting_url || `meeting_${meetingDate.getTime()}_${idx}`;
-          events.push({
-            id: uniqueId,
-            date: meetingDate.toLocaleDateString("en-US", { 
-              year: "numeric", 
-              month: "long", 
-              day: "numeric" 
-            }),
-            title: meeting.meeting,
-            description: `City Council Meeting - ${meeting.meeting}`,
-            type: "debate" as const,
-            status: "completed" as const,
-            details: Object.entries(meeting.documents).map(([key, value]) => `${key}: Available`),
-            category: "Council Meeting",
-          });
-        });
-
-        // Convert pending requests to timeline events
-        pendingRequests
-          .filter((req: any) => req.status === "passed" || req.status === "failed")
-          .forEach((req: any, idx: number) => {
-            events.push({
-              id: `pending_${req.id || idx}_${Date.now()}_${idx}`,
-              date: req.submittedDate || new Date().toLocaleDateString(),
-              title: `${req.status === "passed" ? "✓ Approved" : "✗ Rejected"}: ${req.title}`,
-              description: req.description,
-              type: req.status === "passed" ? ("decision" as const) : ("rejection" as const),
-              status: req.status === "passed" ? ("completed" as const) : ("failed" as const),
-              details: req.details || [],
-              reason: req.failureReason,
-              isPendingRequest: true,
-              category: req.type,
-            });
-          });
-
-        // Convert data from various categories to timeline events
-        Object.entries(allData).forEach(([category, items]: [string, any]) => {
-          if (Array.isArray(items)) {
-            items.forEach((item: any, idx: number) => {
-              // Extract a timestamp or date if available
-              const dateStr = item.timestamp || item.date || item.submittedDate || new Date().toISOString();
-              const itemDate = new Date(dateStr);
-              
-              // Create a title from the item
-              const title = item.heading || item.title || item.meeting || `${category.replace(/_/g, " ")} Entry`;
-              
-              // Create description from text or other fields
-              const description = item.text || item.description || JSON.stringify(item).substring(0, 200);
-
-              events.push({
-                id: `data_${category}_${idx}_${itemDate.getTime()}`,
-                date: itemDate.toLocaleDateString("en-US", { 
-                  year: "numeric", 
-                  month: "long", 
-                  day: "numeric" 
-                }),
-                title: title,
-                description: description,
-                type: "proposal" as const,
-                status: "completed" as const,
-                details: [
-                  `Category: ${category.replace(/_/g, " ")}`,
-                  ...(item.pdfs && item.pdfs.length > 0 ? [`Documents: ${item.pdfs.length} available`] : []),
-                ],
-                category: category,
-              });
-            });
-          }
-        });
-
-        // Sort events by date (most recent first)
-        events.sort((a, b) => {
-          const dateA = new Date(a.date);
-          const dateB = new Date(b.date);
-          return dateB.getTime() - dateA.getTime();
-        });
-
-        setAllEvents(events);
-      } catch (error) {
-        console.error("Error fetching data:", error);
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    fetchAllData();
+    axios
+      .get("http://localhost:5001/api/stats")
+      .then((response) => setStats(response.data))
+      .catch((error) => console.error("Error fetching stats:", error));
   }, []);
 
-  const filteredTimeline = useMemo(() => {
-    return allEvents.filter((event) => {
-      const matchesSearch =
-        searchQuery === "" ||
-        event.title.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        event.description.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        event.details.some((detail) => detail.toLowerCase().includes(searchQuery.toLowerCase()));
-
-      const matchesStatus = statusFilter === "all" || event.status === statusFilter;
+  // Search on the server once typing pauses
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedQuery(searchQuery.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
+
+  // Timeline events are built, searched and filtered on the server and fetched a page at a time
+  const fetchPage = useCallback(
+    (offset: number) =>
+      axios.get("http://localhost:5001/api/timeline", {
+        params: {
+          q: debouncedQuery || undefined,
+          status: statusFilter === "all" ? undefined : statusFilter,
+          offset,
+          limit: ITEMS_PER_PAGE,
+        },
+      }),
+    [debouncedQuery, statusFilter]
+  );
 
-      return matchesSearch && matchesStatus;
-    });
-  }, [allEvents, searchQuery, statusFilter]);
+  // First page whenever the search or the filter changes
+  useEffect(() => {
+    const id = ++requestId.current;
+    setLoading(true);
+    fetchPage(0)
+      .then((response) => {
+        if (id !== requestId.current) return;
+        setDisplayedEvents(response.data.items);
+        setTotal(response.data.total);
+      })
+      .catch((error) => console.error("Error fetching timeline:", error))
+      .finally(() => {
+        if (id === requestId.current) setLoading(false);
+      });
+  }, [fetchPage]);
 
   // Lazy loading logic
   const loadMoreEvents = useCallback(() => {
-    const nextPage = page + 1;
-    const start = nextPage * ITEMS_PER_PAGE;
-    const end = start + ITEMS_PER_PAGE;
-    const newEvents = filteredTimeline.slice(start, end);
-    
-    if (newEvents.length > 0) {
-      setDisplayedEvents((prev) => [...prev, ...newEvents]);
-      setPage(nextPage);
-    }
-  }, [page, filteredTimeline, ITEMS_PER_PAGE]);
-
-  // Reset displayed events when filters change
-  useEffect(() => {
-    setPage(0);
-    setDisplayedEvents(filteredTimeline.slice(0, ITEMS_PER_PAGE));
-  }, [filteredTimeline, ITEMS_PER_PAGE]);
+    if (loadingMore || displayedEvents.length >= total) return;
+    const id = requestId.current;
+    setLoadingMore(true);
+    fetchPage(displayedEvents.length)
+      .then((response) => {
+        if (id !== requestId.current) return;
+        setDisplayedEvents((prev) => [...prev, ...response.data.items]);
+        setTotal(response.data.total);
+      })
+      .catch((error) => console.error("Error fetching timeline:", error))
+      .finally(() => setLoadingMore(false));
+  }, [fetchPage, loadingMore, displayedEvents.length, total]);
 
   // Intersection Observer for infinite scroll
   useEffect(() => {
@@ -307,7 +232,7 @@ export default function Timeline() {
           <div className="bg-white rounded-lg shadow-lg p-8 text-center">
             <p className="text-gray-500 text-base sm:text-lg">Loading timeline...</p>
           </div>
-        ) : filteredTimeline.length === 0 ? (
+        ) : displayedEvents.length === 0 ? (
           <div className="bg-white rounded-lg shadow-lg p-8 text-center">
             <p className="text-gray-500 text-base sm:text-lg">
               No timeline events found matching your search.
@@ -397,7 +322,7 @@ export default function Timeline() {
               
               {/* Infinite scroll trigger */}
               <div ref={observerTarget} className="h-10 flex items-center justify-center">
-                {displayedEvents.length < filteredTimeline.length && (
+                {displayedEvents.length < total && (
                   <p className="text-gray-500 text-sm">Loading more...</p>
                 )}
               </div>
@@ -409,19 +334,19 @@ export default function Timeline() {
         <div className="grid grid-cols-1 sm:grid-cols-3 gap-4 mt-12">
           <div className="bg-blue-50 rounded-lg p-6 text-center border border-blue-200">
             <p className="text-2xl sm:text-3xl font-bold text-blue-600">
-              {allEvents.filter((e) => e.status === "in-progress").length}
+              {stats ? stats.timeline.inProgress : "–"}
             </p>
             <p className="text-gray-700 text-sm sm:text-base mt-2">In Progress</p>
           </div>
           <div className="bg-green-50 rounded-lg p-6 text-center border border-green-200">
             <p className="text-2xl sm:text-3xl font-bold text-green-600">
-              {allEvents.filter((e) => e.status === "completed").length}
+              {stats ? stats.timeline.completed : "–"}
             </p>
             <p className="text-gray-700 text-sm sm:text-base mt-2">Completed</p>
           </div>
           <div className="bg-red-50 rounded-lg p-6 text-center border border-red-200">
             <p className="text-2xl sm:text-3xl font-bold text-red-600">
-              {allEvents.filter((e) => e.status === "failed").length}
+              {stats ? stats.timeline.failed : "–"}
             </p>
             <p className="text-gray-700 text-sm sm:text-base mt-2">Failed/Delayed</p>
           </div>